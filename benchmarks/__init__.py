@@ -0,0 +1,7 @@
+#!/usr/bin/env python3
+"""
+性能測定用のベンチマーク
+
+python -m benchmarks --output result.json
+python -m benchmarks --compare baseline.json
+"""
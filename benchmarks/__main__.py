@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+import sys
+import argparse
+
+import benchmarks.suite
+from benchmarks.runner import BENCHMARKS, run_benchmarks, compare, print_report, load_report, save_report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ベンチマークを実行する")
+    parser.add_argument("names", nargs="*", help="実行するベンチマーク名(省略時は全て)")
+    parser.add_argument("--repeat", type=int, default=5, help="計測の繰り返し回数")
+    parser.add_argument("--output", default=None, help="結果を保存するJSONファイル")
+    parser.add_argument("--compare", default=None, help="比較する基準のJSONファイル")
+    parser.add_argument("--threshold", type=float, default=1.2, help="遅くなったとみなす比率")
+    parser.add_argument("--list", action="store_true", help="ベンチマーク名を表示する")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error("unknown benchmarks: {}".format(", ".join(sorted(unknown))))
+
+    report = run_benchmarks(args.names or None, repeat=args.repeat)
+    if args.output is not None:
+        save_report(report, args.output)
+    if args.compare is None:
+        print_report(report)
+        return 0
+    rows = compare(report, load_report(args.compare), args.threshold)
+    print_report(report, rows)
+    #遅くなったベンチマークがあれば失敗
+    return int(any(slow_flag for *_, slow_flag in rows))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
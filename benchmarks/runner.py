@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+import sys
+import json
+import time
+import platform
+import statistics
+
+import numpy as np
+
+#登録されたベンチマーク
+#{name : (setup, number)}
+BENCHMARKS = {}
+
+
+def benchmark(name, number=1):
+    """
+    ベンチマークを登録するデコレータ
+    登録する関数は計測する関数(引数なし)を返す
+
+    Parameters
+    -----
+    name : str
+        ベンチマーク名
+    number : int
+        1回の計測で呼ぶ回数
+    """
+    def decorator(setup):
+        BENCHMARKS[name] = (setup, number)
+        return setup
+    return decorator
+
+
+def run_benchmarks(names=None, repeat=5):
+    """
+    ベンチマークを実行
+
+    Parameters
+    -----
+    names : list of str, optional
+        実行するベンチマーク名(省略時は全て)
+    repeat : int
+        計測の繰り返し回数
+
+    Returns
+    -----
+    report : dict
+        meta : 実行環境
+        results : {name : {min, median, number, repeat}}(1回あたりの秒数)
+    """
+    results = {}
+    for name, (setup, number) in BENCHMARKS.items():
+        if names is not None and name not in names:
+            continue
+        func = setup()
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            times.append((time.perf_counter() - start) / number)
+        results[name] = dict(min=min(times), median=statistics.median(times), number=number, repeat=repeat)
+    meta = dict(python=platform.python_version(), numpy=np.__version__, platform=platform.platform())
+    return dict(meta=meta, results=results)
+
+
+def compare(report, baseline, threshold=1.2):
+    """
+    基準の結果と比較して遅くなったベンチマークを探す
+
+    Parameters
+    -----
+    report : dict
+        今回の結果
+    baseline : dict
+        基準の結果
+    threshold : float
+        遅くなったとみなす比率(最小時間の比)
+
+    Returns
+    -----
+    rows : list of (name, baseline_min, current_min, ratio, slow_flag)
+        両方にあるベンチマークの比較結果
+    """
+    rows = []
+    for name, result in report["results"].items():
+        if name not in baseline["results"]:
+            continue
+        base_min = baseline["results"][name]["min"]
+        ratio = result["min"] / base_min if base_min > 0 else float("inf")
+        rows.append((name, base_min, result["min"], ratio, ratio > threshold))
+    return rows
+
+
+def print_report(report, rows=None, file=sys.stdout):
+    """
+    結果を表示
+
+    Parameters
+    -----
+    report : dict
+        今回の結果
+    rows : list, optional
+        compareの結果
+    file : file object
+        出力先
+    """
+    if rows is None:
+        for name, result in report["results"].items():
+            file.write("{:<32} {:>12.6f} s (median {:.6f} s)\n".format(name, result["min"], result["median"]))
+    else:
+        for name, base_min, current_min, ratio, slow_flag in rows:
+            file.write("{:<32} {:>12.6f} s -> {:>12.6f} s  x{:.2f}{}\n".format(
+                name, base_min, current_min, ratio, "  SLOWER" if slow_flag else ""))
+
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_report(report, path):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
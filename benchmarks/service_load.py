@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import collections
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from pkg.service import GameService, GameClient, serve
+
+
+async def _run_player(api, latencies, n_legs, score, bull_type, out_type, sigma, seed):
+    """
+    1人のプレイヤーでレッグを投げきる
+    操作ごとの応答時間をlatenciesに追加する
+    """
+    async def timed_call(op, *args):
+        start = time.perf_counter()
+        result = await getattr(api, op)(*args)
+        latencies[op].append(time.perf_counter() - start)
+        return result
+
+    session_id = await timed_call("create_session", score, bull_type, out_type, sigma, seed)
+    n_darts = 0
+    for leg in range(n_legs):
+        if leg > 0:
+            await timed_call("start_leg", session_id)
+        finished = False
+        while not finished:
+            await timed_call("get_aims", session_id)
+            state = await timed_call("throw", session_id)
+            n_darts += 1
+            finished = state["finished"]
+            if state["result"] is not None or len(state["round_darts"]) == 0:
+                await timed_call("get_state", session_id)
+    await timed_call("close_session", session_id)
+    return n_darts
+
+
+async def _measure_loop_lag(lags, stop, interval=0.01):
+    """
+    イベントループの遅れ(sleepが予定より遅れた時間)を計測する
+    """
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def run_load(n_sessions=1000, n_legs=1, score=501, bull_type="fat", out_type="double", sigma=20
+                   , transport="inprocess", n_connections=4, use_policy=False, n_workers=0, seed=0):
+    """
+    GameServiceに負荷をかけて、スループットと応答時間を計測する
+
+    Parameters
+    -----
+    n_sessions : int
+        同時に進めるセッション数
+    n_legs : int
+        セッションごとのレッグ数
+    score : int
+        レッグ開始時のスコア
+    bull_type : str (sepa or fat)
+        bullの種類
+    out_type : str (everything, master, double)
+        上がり方の種類
+    sigma : float
+        命中精度(標準偏差)
+    transport : str (inprocess or socket)
+        直接呼ぶか、UNIXドメインソケット経由で呼ぶか
+    n_connections : int
+        ソケットの接続数
+    use_policy : bool
+        戦略クラスの方策テーブルを使うかどうか
+    n_workers : int
+        戦略の計算に使うプロセス数(0はイベントループのデフォルトのスレッド)
+    seed : int
+        乱数のシード(セッションごとにseed+idx)
+
+    Returns
+    -----
+    report : dict
+        n_sessions, n_darts, n_requests, elapsed, requests_per_sec, darts_per_sec
+        , latency : {op : {count, mean, p50, p90, p99, max}}(秒), loop_lag : 同じ形式
+    """
+    executor = ProcessPoolExecutor(n_workers) if n_workers > 0 else None
+    service = GameService(executor, use_policy=use_policy)
+    latencies = collections.defaultdict(list)
+    lags = []
+    stop = asyncio.Event()
+    server, clients, tmp_dir = None, [], None
+    try:
+        if transport == "socket":
+            tmp_dir = tempfile.mkdtemp()
+            path = os.path.join(tmp_dir, "service.sock")
+            server = await serve(service, path=path)
+            clients = [await GameClient.connect(path=path) for _ in range(n_connections)]
+            apis = clients
+        else:
+            apis = [service]
+        lag_task = asyncio.ensure_future(_measure_loop_lag(lags, stop))
+        start = time.perf_counter()
+        n_darts = await asyncio.gather(*[_run_player(apis[idx % len(apis)], latencies, n_legs, score, bull_type
+                                                     , out_type, sigma, seed+idx) for idx in range(n_sessions)])
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await lag_task
+    finally:
+        for client in clients:
+            await client.close()
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+        if tmp_dir is not None:
+            os.remove(os.path.join(tmp_dir, "service.sock"))
+            os.rmdir(tmp_dir)
+        if executor is not None:
+            executor.shutdown()
+
+    n_requests = sum(len(values) for values in latencies.values())
+    all_latencies = [value for values in latencies.values() for value in values]
+    latency = {op: _summarize(values) for op, values in latencies.items()}
+    latency["all"] = _summarize(all_latencies)
+    return dict(n_sessions=n_sessions, n_darts=int(sum(n_darts)), n_requests=n_requests, elapsed=elapsed
+                , requests_per_sec=n_requests/elapsed, darts_per_sec=sum(n_darts)/elapsed
+                , latency=latency, loop_lag=_summarize(lags))
+
+
+def _summarize(values):
+    if len(values) == 0:
+        return dict(count=0, mean=np.nan, p50=np.nan, p90=np.nan, p99=np.nan, max=np.nan)
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return dict(count=len(values), mean=float(np.mean(values)), p50=float(p50), p90=float(p90)
+                , p99=float(p99), max=float(np.max(values)))
+
+
+def print_report(report, file=sys.stdout):
+    """
+    run_loadの結果を表示
+    """
+    file.write("sessions {n_sessions}, darts {n_darts}, requests {n_requests}, elapsed {elapsed:.2f}s\n".format(**report))
+    file.write("throughput {:.0f} requests/s, {:.0f} darts/s\n".format(report["requests_per_sec"], report["darts_per_sec"]))
+    file.write("{:<16} {:>10} {:>10} {:>10} {:>10} {:>10}\n".format("op", "count", "p50[ms]", "p90[ms]", "p99[ms]", "max[ms]"))
+    rows = list(report["latency"].items()) + [("loop_lag", report["loop_lag"])]
+    for op, stat in rows:
+        file.write("{:<16} {:>10} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f}\n".format(
+            op, stat["count"], stat["p50"]*1e3, stat["p90"]*1e3, stat["p99"]*1e3, stat["max"]*1e3))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GameServiceの負荷試験")
+    parser.add_argument("--sessions", type=int, default=1000, help="同時に進めるセッション数")
+    parser.add_argument("--legs", type=int, default=1, help="セッションごとのレッグ数")
+    parser.add_argument("--score", type=int, default=501, help="レッグ開始時のスコア")
+    parser.add_argument("--sigma", type=float, default=20, help="命中精度(標準偏差)")
+    parser.add_argument("--bull-type", choices=["fat", "sepa"], default="fat", help="bullの種類")
+    parser.add_argument("--out-type", choices=["master", "double", "everything"], default="double", help="上がり方")
+    parser.add_argument("--transport", choices=["inprocess", "socket"], default="inprocess", help="呼び出し方")
+    parser.add_argument("--connections", type=int, default=4, help="ソケットの接続数")
+    parser.add_argument("--policy", action="store_true", help="方策テーブルを使う")
+    parser.add_argument("--workers", type=int, default=0, help="戦略の計算に使うプロセス数(0はスレッド)")
+    parser.add_argument("--seed", type=int, default=0, help="乱数のシード")
+    parser.add_argument("--output", default=None, help="結果を保存するJSONファイル")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_load(args.sessions, args.legs, args.score, args.bull_type, args.out_type, args.sigma
+                                  , args.transport, args.connections, args.policy, args.workers, args.seed))
+    print_report(report)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
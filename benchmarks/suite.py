@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+import os
+import sys
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.runner import benchmark
+from pkg import arrange_helper
+from pkg.board import Board
+from pkg.rules import ZeroOneRules
+from pkg.simulator import ZeroOneSimulator
+from pkg.strategy.zeroone import ZeroOne
+from pkg.throw import Throw
+from pkg.tournament import PlayerProfile, play_matches
+
+SEED = 0
+#リポジトリのルート(起動時間の計測でPYTHONPATHに使う)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#探索する状態(ラウンド開始時の残りポイント, 取ったポイント)
+SEARCH_STATES = [(point, get) for point in range(2, 181, 3) for get in [[], [20], [60, 19]]]
+
+
+def _clear_search_cache():
+    arrange_helper.clear_cache()
+
+
+@benchmark("arrange_search_cold")
+def bench_arrange_search_cold():
+    helper = arrange_helper.get_arrange_helper("fat", "double")
+    def func():
+        _clear_search_cache()
+        for point, get in SEARCH_STATES:
+            helper.search(point, get_init=get)
+    return func
+
+
+@benchmark("arrange_search_warm", number=10)
+def bench_arrange_search_warm():
+    helper = arrange_helper.get_arrange_helper("fat", "double")
+    def func():
+        for point, get in SEARCH_STATES:
+            helper.search(point, get_init=get)
+    func()
+    return func
+
+
+@benchmark("arrange_search_top_cold")
+def bench_arrange_search_top_cold():
+    helper = arrange_helper.get_arrange_helper("fat", "double")
+    def func():
+        _clear_search_cache()
+        for point, get in SEARCH_STATES:
+            helper.search_top(point, get_init=get, k=1)
+    return func
+
+
+@benchmark("arrange_search_top_warm", number=10)
+def bench_arrange_search_top_warm():
+    helper = arrange_helper.get_arrange_helper("fat", "double")
+    def func():
+        for point, get in SEARCH_STATES:
+            helper.search_top(point, get_init=get, k=1)
+    func()
+    return func
+
+
+@benchmark("arrange_search_threads")
+def bench_arrange_search_threads():
+    #全ルールの探索を4スレッドで同時に行う
+    helpers = [arrange_helper.get_arrange_helper(bull_type, out_type)
+               for bull_type in arrange_helper.BULL_TYPES for out_type in arrange_helper.OUT_TYPES]
+    def search_all(helper):
+        for point, get in SEARCH_STATES:
+            helper.search(point, get_init=get)
+    def func():
+        _clear_search_cache()
+        with ThreadPoolExecutor(4) as executor:
+            list(executor.map(search_all, helpers))
+    return func
+
+
+@benchmark("zeroone_calc_scores_cold")
+def bench_zeroone_calc_scores_cold():
+    def func():
+        _clear_search_cache()
+        ZeroOne("fat", "double", use_cache=False)
+    return func
+
+
+@benchmark("zeroone_init_cached", number=10)
+def bench_zeroone_init_cached():
+    ZeroOne("fat", "double")
+    return lambda: ZeroOne("fat", "double")
+
+
+@benchmark("zeroone_get_aims")
+def bench_zeroone_get_aims():
+    strategy = ZeroOne("fat", "double")
+    states = [(left, get) for left in range(2, 502, 7) for get in [[], [20], [60, 19]] if sum(get) < left]
+    def func():
+        for left, get in states:
+            strategy._calc_aims(left, get)
+    return func
+
+
+@benchmark("zeroone_get_aims_policy", number=10)
+def bench_zeroone_get_aims_policy():
+    strategy = ZeroOne("fat", "double", use_policy=True)
+    states = [(left, get) for left in range(2, 502, 7) for get in [[], [20], [60, 19]] if sum(get) < left]
+    def func():
+        for left, get in states:
+            strategy.get_aims(left, get)
+    return func
+
+
+@benchmark("throw_aim_scalar")
+def bench_throw_aim_scalar():
+    throw = Throw(20, seed=SEED)
+    def func():
+        for _ in range(10000):
+            throw.aim(108, 0.0)
+    return func
+
+
+@benchmark("throw_aim_many_1m")
+def bench_throw_aim_many():
+    throw = Throw(20, seed=SEED)
+    return lambda: throw.aim_many(108, 0.0, 1000000)
+
+
+@benchmark("board_calc_throw_result_scalar")
+def bench_board_calc_throw_result_scalar():
+    board = Board("fat")
+    rng = np.random.default_rng(SEED)
+    coordinates = list(zip(rng.uniform(0, 200, 10000), rng.uniform(0, 2*np.pi, 10000)))
+    def func():
+        for r, theta in coordinates:
+            board.calc_throw_result(r, theta)
+    return func
+
+
+@benchmark("board_calc_throw_results_1m")
+def bench_board_calc_throw_results():
+    board = Board("fat")
+    rng = np.random.default_rng(SEED)
+    r, theta = rng.uniform(0, 200, 1000000), rng.uniform(0, 2*np.pi, 1000000)
+    return lambda: board.calc_throw_results(r, theta)
+
+
+@benchmark("rules_apply_throw_scalar")
+def bench_rules_apply_throw_scalar():
+    rules = ZeroOneRules("fat", "double")
+    rng = np.random.default_rng(SEED)
+    throws = list(zip(rng.integers(2, 502, 10000).tolist(), rng.integers(0, 61, 10000).tolist()
+                      , rng.choice(Board.place_names, 10000).tolist()))
+    def func():
+        for score, point, mark in throws:
+            rules.apply_throw(score, 0, point, mark)
+    return func
+
+
+@benchmark("rules_apply_throws_1m")
+def bench_rules_apply_throws():
+    rules = ZeroOneRules("fat", "double")
+    rng = np.random.default_rng(SEED)
+    score, round_point = rng.integers(2, 502, 1000000), rng.integers(0, 121, 1000000)
+    point, place_code = rng.integers(0, 61, 1000000), rng.integers(0, len(Board.place_names), 1000000)
+    return lambda: rules.apply_throws(score, round_point, point, place_code)
+
+
+@benchmark("simulate_leg", number=10)
+def bench_simulate_leg():
+    strategy = ZeroOne("fat", "double")
+    simulator = ZeroOneSimulator(20, "fat", "double", seed=SEED, strategy=strategy)
+    simulator.run(100)
+    return lambda: simulator.run(1)
+
+
+@benchmark("simulate_10k_legs")
+def bench_simulate_legs():
+    strategy = ZeroOne("fat", "double")
+    simulator = ZeroOneSimulator(20, "fat", "double", seed=SEED, strategy=strategy)
+    simulator.run(1000)
+    return lambda: simulator.run(10000)
+
+
+@benchmark("simulate_10k_legs_policy")
+def bench_simulate_legs_policy():
+    strategy = ZeroOne("fat", "double", use_policy=True)
+    simulator = ZeroOneSimulator(20, "fat", "double", seed=SEED, strategy=strategy)
+    simulator.run(1000)
+    return lambda: simulator.run(10000)
+
+
+@benchmark("tournament_1k_matches")
+def bench_tournament_matches():
+    profile_a, profile_b = PlayerProfile("a", 20), PlayerProfile("b", 25)
+    play_matches(profile_a, profile_b, 100, seed=SEED)
+    return lambda: play_matches(profile_a, profile_b, 1000, legs=5, seed=SEED)
+
+
+def _bench_startup(use_policy):
+    """
+    新しいプロセスでimportしてから最初の狙う場所を得るまで(インタプリタの起動を含む)
+    ユーザーのキャッシュは空にして、同梱テーブルを読む
+    """
+    code = ("from pkg.strategy.zeroone import ZeroOne\n"
+            "ZeroOne('fat', 'double', use_policy={}).get_aims(501)\n".format(use_policy))
+    cache_dir = tempfile.mkdtemp()
+    env = dict(os.environ, DARTS_CACHE_DIR=cache_dir, PYTHONPATH=ROOT_DIR)
+    def func():
+        subprocess.run([sys.executable, "-c", code], env=env, check=True)
+    return func
+
+
+@benchmark("startup_first_aim")
+def bench_startup_first_aim():
+    return _bench_startup(False)
+
+
+@benchmark("startup_first_aim_policy")
+def bench_startup_first_aim_policy():
+    return _bench_startup(True)
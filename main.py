@@ -1,69 +1,94 @@
 #!/usr/bin/env python3
-import time
 import sys
+import csv
+import json
+import argparse
 from logging import getLogger
 
 from pkg.logger_util import init_logger
-from pkg.player import Player
+from pkg.event_store import ThrowEventStore
+from pkg.simulator import ZeroOneSimulator
 
 
-#parameter
-bull_type = "fat"
-out_type = "everything"
-#標準偏差
-sigma = 100
+def parse_args(argv=None):
+    """
+    引数の解析
 
-init_logger("darts.log")
-logger = getLogger("darts")
+    Parameters
+    -----
+    argv : list of str, optional
+        引数(省略時はsys.argv)
 
-player = Player(score=501, sigma=10, game_type="01", bull_type="fat", out_type="everything")
-for round_num in range(1, 21):
-    logger.info("=================")
-    logger.info("Start round  {} : ".format(round_num))
-    logger.info("Point  {} : ".format(player.score))
-    #狙うポイントを計算
-    player.calc_aims()
-    #当たったところを覚えておく配列
-    hit_point_list = []
-    for hit_result, throw_result in player.play():
-        point = throw_result["point"]
-        mark = throw_result["mark"]
-        place = throw_result["place"]
-        print(f"point : {point}, mark : {mark}, place : {place}")
-        logger.info(f"point : {point}, mark : {mark}, place : {place}")
-        hit_point_list.append(point)
-        
-        #BURSTチェック
-        #物理的に取れない点数になった場合
-        if player.score - sum(hit_point_list) < (0 + int(out_type in ["double", "master"])):
-            logger.info("BURST : {}".format(player.score - sum(hit_point_list) ))
-            hit_point_list = []
-            break
-        elif player.score - sum(hit_point_list) == 0 and (out_type in ["double", "master"]):
-            mark_rules = ["inner_bull", "double"]
-            if out_type == "master" :
-                mark_rules += ["outer_bull", "triple"]
-            if mark not in mark_rules:
-                logger.info("BURST : {}".format(player.score - sum(hit_point_list) ))
-                hit_point_list = []
-                break
+    Returns
+    -----
+    args : argparse.Namespace
+        解析した引数
+    """
+    parser = argparse.ArgumentParser(description="01のレッグをまとめてシミュレーションする")
+    parser.add_argument("--legs", type=int, default=1, help="レッグ数")
+    parser.add_argument("--sigma", type=float, default=10, help="命中精度(標準偏差)")
+    parser.add_argument("--score", type=int, default=501, help="レッグ開始時のスコア")
+    parser.add_argument("--bull-type", choices=["fat", "sepa"], default="fat", help="bullの種類")
+    parser.add_argument("--out-type", choices=["master", "double", "everything"], default="everything", help="上がり方")
+    parser.add_argument("--max-rounds", type=int, default=50, help="1レッグの最大ラウンド数")
+    parser.add_argument("--seed", type=int, default=None, help="乱数のシード")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl", help="出力形式")
+    parser.add_argument("--output", default=None, help="出力ファイル(省略時は標準出力)")
+    parser.add_argument("--events", default=None, help="1投ごとの記録を保存するディレクトリ(省略時は保存しない)")
+    parser.add_argument("--log-file", default=None, help="ログファイル(省略時はログを出さない)")
+    return parser.parse_args(argv)
 
-        #上がりチェック
-        if player.score - sum(hit_point_list) == 0:
-            if out_type == "double" and (mark in ["inner_bull", "double"]):
-                logger.info("Finished")
-                sys.exit(0)
-            elif out_type == "master" and (mark in ["inner_bull", "outer_bull", "double", "triple"]):
-                logger.info("Finished")
-                sys.exit(0)
-            elif out_type == "everything":
-                logger.info("Finished")
-                sys.exit(0)
-                
-        #外れた場合の目標再計算
-        player.calc_aims(hit_point_list)
-    
-    print("hit_point_list", hit_point_list)
-    player.score = player.score - sum(hit_point_list)
-    time.sleep(1)
 
+def write_results(f, n_darts, round_scores, output_format):
+    """
+    レッグごとの結果を出力
+
+    Parameters
+    -----
+    f : file object
+        出力先
+    n_darts : numpy.ndarray of int
+        上がるまでに投げた本数(上がれなかった場合は-1)
+    round_scores : numpy.ndarray of int
+        ラウンドごとの得点
+    output_format : str (jsonl or csv)
+        出力形式
+    """
+    #実際に投げたラウンド数
+    n_rounds = [(d+2)//3 if d > 0 else round_scores.shape[1] for d in n_darts.tolist()]
+    if output_format == "jsonl":
+        for leg, (d, n_round, scores) in enumerate(zip(n_darts.tolist(), n_rounds, round_scores.tolist())):
+            f.write(json.dumps(dict(leg=leg, n_darts=d, finished=d > 0, round_scores=scores[:n_round])) + "\n")
+    else:
+        max_round = max(n_rounds, default=0)
+        writer = csv.writer(f)
+        writer.writerow(["leg", "n_darts", "finished"] + ["round_{}".format(i) for i in range(1, max_round+1)])
+        for leg, (d, scores) in enumerate(zip(n_darts.tolist(), round_scores[:, :max_round].tolist())):
+            writer.writerow([leg, d, int(d > 0)] + scores)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.log_file is not None:
+        init_logger(args.log_file, use_queue=True)
+    logger = getLogger("darts")
+
+    simulator = ZeroOneSimulator(args.sigma, args.bull_type, args.out_type, score=args.score, seed=args.seed)
+    logger.info("Start {} legs : sigma {}, bull_type {}, out_type {}".format(args.legs, args.sigma
+                                                                             , args.bull_type, args.out_type))
+    if args.events is None:
+        n_darts, round_scores = simulator.run(args.legs, args.max_rounds)
+    else:
+        with ThrowEventStore(args.events) as event_store:
+            n_darts, round_scores = simulator.run(args.legs, args.max_rounds, event_store=event_store)
+    logger.info("Finished {} / {} legs".format(int((n_darts > 0).sum()), args.legs))
+
+    if args.output is None:
+        write_results(sys.stdout, n_darts, round_scores, args.format)
+    else:
+        with open(args.output, "w", newline="") as f:
+            write_results(f, n_darts, round_scores, args.format)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,155 +1,429 @@
 #!/usr/bin/env python
 
-import argparse
+import heapq
+import types
+
 import numpy as np
-import pandas as pd
+
+from pkg import instrument
+
+#bullの種類
+BULL_TYPES = ["fat", "sepa"]
+#上がり方の種類
+OUT_TYPES = ["master", "double", "everything"]
+
+#部分問題の探索結果(全インスタンス・全スレッドで共有し、書き換えない)
+#{(unenough_point, n_throw, out_flag, bull_type, out_type) : tuple of tuple}
+_memo = {}
+
+#ソート済みの探索結果(全インスタンス・全スレッドで共有し、書き換えない)
+#{(unenough_point, n_throw, out_flag, bull_type, out_type) : tuple of tuple}
+_search_cache = {}
+
+#スコアの高い順の上位k件の探索結果(全インスタンス・全スレッドで共有し、書き換えない)
+#{(unenough_point, n_throw, out_flag, bull_type, out_type, k) : tuple of tuple}
+_top_cache = {}
+
+#作成済みのArrangeHelper
+#{(bull_type, out_type) : ArrangeHelper}
+_helpers = {}
+
+
+def get_arrange_helper(bull_type="fat", out_type="everything"):
+    """
+    ArrangeHelperを取得(bull_type, out_typeごとに使い回す)
+
+    Parameters
+    -----
+    bull_type : str (sepa or fat)
+        ブルのタイプ
+    out_type : str (everything, master, double)
+        上がり方
+
+    Returns
+    -----
+    helper : ArrangeHelper
+        上がりの探索
+    """
+    key = (bull_type, out_type)
+    helper = _helpers.get(key)
+    if helper is None:
+        #同時に作られた場合は先に登録された方を使う
+        helper = _helpers.setdefault(key, ArrangeHelper(bull_type, out_type))
+    return helper
+
+
+def clear_cache():
+    """
+    探索結果のキャッシュを消す
+    """
+    _memo.clear()
+    _search_cache.clear()
+    _top_cache.clear()
+
 
 class ArrangeHelper(object):
-    
-    #{n_mark:[points]}
-    point_master = {n_mark:[place*n_mark for place in range(1, 21)] for n_mark in range(1,4)}
+    """
+    1ラウンドで上がれる点の組み合わせの探索
+    ルール(bull_type, out_type)は作成時に決めて変更しない
+    探索中の状態は引数で渡し、探索結果は書き換えないtupleで共有するので、
+    同じインスタンスを複数のスレッドから同時に使える
+
+    Attributes
+    -----
+    bull_type : str (sepa or fat)
+        ブルのタイプ
+    out_type : str (everything, master, double)
+        上がり方
+    point_master : mapping of {n_mark : tuple of int}
+        マークの数ごとの取れるポイント(0はbull)
+    """
 
     #{n_mark : String}
     n_mark_master = {0:"bull", 1:"single", 2:"double", 3:"triple"}
 
-    @classmethod
-    def _check_args(cls, **args):
+    def __init__(self, bull_type="fat", out_type="everything"):
         """
-        引数のチェック
-        
         Parameters
         -----
-        bull_type : str 
+        bull_type : str (sepa or fat)
             ブルのタイプ
-        out_type : str
-            アウトのタイプ
-        
+        out_type : str (everything, master, double)
+            上がり方
+
         Raises
-        ------
-        SystemExit
-            argparserによる引数のミスの検知
+        -----
+        ValueError
+            bull_type, out_typeが不正な場合
         """
-        
-        parser = argparse.ArgumentParser()
-        parser.add_argument("bull_type", choices=["fat", "sepa"])
-        parser.add_argument("out_type", choices=["master", "double", "everything"])
-        #引数の確認
-        args = parser.parse_args([args["bull_type"], args["out_type"]])
-        
-        #変数の追加
-        cls.bull_type = args.bull_type
-        if args.bull_type == "fat":
-            cls.point_master[0] = [50]
+        if bull_type not in BULL_TYPES:
+            raise ValueError("bull_type must be one of {} : {}".format(BULL_TYPES, bull_type))
+        if out_type not in OUT_TYPES:
+            raise ValueError("out_type must be one of {} : {}".format(OUT_TYPES, out_type))
+        self._bull_type = bull_type
+        self._out_type = out_type
+
+        #{n_mark : (points)}(bullは最後に確認する)
+        point_master = {n_mark: tuple(place*n_mark for place in range(1, 21)) for n_mark in range(1, 4)}
+        point_master[0] = (50,) if bull_type == "fat" else (25, 50)
+        self._point_master = types.MappingProxyType(point_master)
+
+        #上がり条件を満たしている時・満たしていない時に上がれるポイント
+        all_points = frozenset(point_master[0] + point_master[1] + point_master[2] + point_master[3])
+        if out_type == "double":
+            out_points = frozenset((50,) + point_master[2])
+        elif out_type == "master":
+            out_points = frozenset(point_master[0] + point_master[2] + point_master[3])
+        else:
+            out_points = frozenset()
+        self._finish_points = {True: all_points, False: out_points}
+        #1投で上がり条件を満たすポイント
+        if out_type == "double":
+            self._out_condition_points = frozenset(point_master[2] + (50,))
+        elif out_type == "master":
+            self._out_condition_points = frozenset(point_master[2] + point_master[3] + point_master[0])
         else:
-            cls.point_master[0] = [25, 50]
-            
-        #上がり方のチェック
-        cls.out_type = args.out_type
-        
-    @classmethod
-    def search(cls, point, get_init=[], bull_type="fat", out_type="everything"):
+            self._out_condition_points = frozenset()
+
+    @property
+    def bull_type(self):
+        return self._bull_type
+
+    @property
+    def out_type(self):
+        return self._out_type
+
+    @property
+    def point_master(self):
+        return self._point_master
+
+    @instrument.timed("ArrangeHelper.search")
+    def search(self, point, get_init=[]):
         """
         1ラウンドで上がれるかを確認
         Parameters
         -----
         point : int
             ラウンド最初のポイント
-        get_init : 
+        get_init :
             すでに確定している得点
-        bull_type : str
-            ブルのタイプ
-        out_type : str
-            上がり方
-        
+
         Returns
         -----
         flag : Bool
             上がれるかどうか
         points : list of list
-            とるべきポイントの一覧
+            とるべきポイントの一覧(呼び出しごとに新しいlist)
         """
-        
-        #引数チェック
-        cls._check_args(bull_type=bull_type, out_type=out_type)
-        cls.get_init = get_init
-        
-        #組み合わせList
-        cls.finishable_points = []
-        
-        #探索
-        if out_type == "everything":
-            cls._search_points(point, get=get_init, out_flag=True)
-        else:
-            cls._search_points(point, get=get_init, out_flag=False)
-        
-        #すでに確定しているスローを消す
-        
-        if len(cls.finishable_points) != 0:
-            return True, sorted(cls.finishable_points, key=cls.calc_score, reverse=True)
+
+        #探索(すでに確定しているスローは残りポイントと残りトス数に反映する)
+        key = (point-sum(get_init), 3-len(get_init), self._out_type == "everything", self._bull_type, self._out_type)
+        finishable_points = _search_cache.get(key)
+        instrument.count_cache("ArrangeHelper.search", finishable_points is not None)
+        if finishable_points is None:
+            finishable_points = tuple(sorted(self._search_points(*key[:3]), key=self.calc_score, reverse=True))
+            finishable_points = _search_cache.setdefault(key, finishable_points)
+
+        if len(finishable_points) != 0:
+            return True, [list(points) for points in finishable_points]
         else:
             return False, None
-    
-    @classmethod
-    def _search_points(cls, point, get=[], out_flag=False):
+
+    def iter_ranked(self, point, get_init=[]):
         """
-        上がることのできる or 次上がれる可能性のある点の組み合わせを探す
-        
+        上がれる点の組み合わせをスコアの高い順に返すジェネレータ
+        searchと同じ順番(同じスコアは深さ優先探索で見つかった順)だが、全体を探索せず取り出した分だけ探索する
+        探索の途中の状態はスコアの上限(_calc_score_bound)でヒープに入れ、上限が高い状態から展開する
+        (部分問題をメモ化しないので、全件が必要な場合はsearchの方が速い)
+
         Parameters
         -----
         point : int
-            取得したい得点
-        get : list of int
-            同じラウンド中にとった得点
+            ラウンド最初のポイント
+        get_init :
+            すでに確定している得点
+
+        Yields
+        -----
+        points : list of int
+            とるべきポイント
+        """
+        key = (point-sum(get_init), 3-len(get_init), self._out_type == "everything")
+        finishable_points = _search_cache.get(key + (self._bull_type, self._out_type))
+        if finishable_points is not None:
+            for points in finishable_points:
+                yield list(points)
+            return
+        #(-スコア or -スコアの上限, 探索順, 組み合わせ, 探索の状態)の最小ヒープ
+        #探索順は深さ優先探索の経路(その場所で上がる組み合わせは-1, 子は候補のindex)で、全て異なる
+        heap = []
+        self._push_ranked(heap, (), (), *key)
+        found = set()
+        while heap:
+            _, order, points, state = heapq.heappop(heap)
+            if state is not None:
+                self._push_ranked(heap, order, *state)
+            elif points not in found:
+                found.add(points)
+                yield list(points)
+
+    def _push_ranked(self, heap, order, prefix, unenough_point, n_throw, out_flag):
+        """
+        iter_rankedの探索の状態を1つ展開し、その場所で上がる組み合わせと子の状態をheapに入れる
+
+        Parameters
+        -----
+        heap : list
+            iter_rankedのヒープ
+        order : tuple of int
+            展開する状態の探索順
+        prefix : tuple of int
+            ここまでにとったポイント
+        unenough_point : int
+            足りないポイント
+        n_throw : int
+            残りのトス数
         out_flag : bool
             上がり条件を満たしているかどうか
         """
-        #足りないポイントを計算
-        unenough_point = point-sum(get)
-        if unenough_point < 0 :
+        if unenough_point < 0 or n_throw <= 0:
             return
-        #3投投げたのでおしまい
-        if len(get) == 3:
+        if self._check_finish(unenough_point, out_flag):
+            points = tuple(sorted(prefix + (unenough_point,)))
+            heapq.heappush(heap, (-self.calc_score(points), order + (-1,), points, None))
+        for idx, candidate_point in enumerate(self._get_candidate_points(unenough_point, n_throw)):
+            next_prefix = prefix + (candidate_point,)
+            bound = self._calc_score_bound(next_prefix, unenough_point-candidate_point, n_throw-1)
+            state = (next_prefix, unenough_point-candidate_point, n_throw-1
+                     , self._check_out_condition(out_flag, candidate_point))
+            heapq.heappush(heap, (-bound, order + (idx,), None, state))
+
+    @instrument.timed("ArrangeHelper.search_top")
+    def search_top(self, point, get_init=[], k=1):
+        """
+        スコアの高い上位k件の上がれる点の組み合わせを探す
+        searchの結果の先頭k件と同じになる
+        大きさkのヒープで上位を持ち、k件目のスコアを超えられない枝は探索しない
+
+        Parameters
+        -----
+        point : int
+            ラウンド最初のポイント
+        get_init :
+            すでに確定している得点
+        k : int
+            探す件数
+
+        Returns
+        -----
+        points : list of list
+            とるべきポイントの一覧(スコアの高い順, 上がれない場合は空)
+        """
+        key = (point-sum(get_init), 3-len(get_init), self._out_type == "everything", self._bull_type, self._out_type, k)
+        top_points = _top_cache.get(key)
+        instrument.count_cache("ArrangeHelper.search_top", top_points is not None)
+        if top_points is None:
+            #(スコア, -見つかった順, 組み合わせ)の最小ヒープ
+            heap = []
+            if k > 0:
+                self._search_top(key[0], key[1], key[2], (), heap, {}, k)
+            top_points = tuple(points for _, _, points in sorted(heap, reverse=True))
+            top_points = _top_cache.setdefault(key, top_points)
+        return [list(points) for points in top_points]
+
+    def _search_top(self, unenough_point, n_throw, out_flag, prefix, heap, found, k):
+        """
+        _search_pointsと同じ順番で深さ優先探索し、上位k件をheapに残す
+
+        Parameters
+        -----
+        unenough_point : int
+            足りないポイント
+        n_throw : int
+            残りのトス数
+        out_flag : bool
+            上がり条件を満たしているかどうか
+        prefix : tuple of int
+            ここまでにとったポイント
+        heap : list of (score, order, points)
+            上位k件の最小ヒープ(orderは見つかった順の符号反転)
+        found : dict of {points : None}
+            見つかった組み合わせ(長さが見つかった順)
+        k : int
+            探す件数
+        """
+        if unenough_point < 0 or n_throw <= 0:
             return
-        
-        #上がれるパターンを追加
-        if cls._check_finish(unenough_point, out_flag):
-            #初期確定しているポイント分を削除
-            get_real = get[len(cls.get_init):]
-            points_list = sorted(get_real + [unenough_point])
-            if points_list not in cls.finishable_points:
-                cls.finishable_points.append(points_list)
-        #得点の候補作成
-        #=====
-        # 50 < point <= 60 : tripleのみ
-        # 40 < point <= 50 : triple + double bull
-        # 25 < point <= 40 : triple + double bull + double
-        # 20 < point <= 25 : triple + double bull + double + inner_bull
-        # point <= 20 : triple + double bull + double + inner_bull + single
-        #=====
+        if self._check_finish(unenough_point, out_flag):
+            points = tuple(sorted(prefix + (unenough_point,)))
+            if points not in found:
+                found[points] = None
+                item = (self.calc_score(points), -len(found), points)
+                if len(heap) < k:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+        for candidate_point in self._get_candidate_points(unenough_point, n_throw):
+            next_prefix = prefix + (candidate_point,)
+            #k件目のスコアを超えられない枝は探索しない(同じスコアは先に見つかった方が上位)
+            if len(heap) == k and self._calc_score_bound(next_prefix, unenough_point-candidate_point, n_throw-1) <= heap[0][0]:
+                continue
+            self._search_top(unenough_point-candidate_point, n_throw-1
+                             , self._check_out_condition(out_flag, candidate_point), next_prefix, heap, found, k)
+
+    def _calc_score_bound(self, prefix, unenough_point, n_throw):
+        """
+        prefixの後に1投以上とって上がる組み合わせのcalc_scoreの上限
+
+        Parameters
+        -----
+        prefix : tuple of int
+            ここまでにとったポイント
+        unenough_point : int
+            足りないポイント
+        n_throw : int
+            残りのトス数
+
+        Returns
+        -----
+        bound : float
+            スコアの上限
+        """
+        if self._bull_type == "sepa" or self._out_type == "double":
+            if (25 in prefix) or (50 in prefix):
+                return 0
+            return 4 - (len(prefix) + 1)
+        if self._out_type == "everything":
+            #1投ごとに-1, single以下なら+1(残りをsingleだけで取れない場合は1投はsingleより大きい)
+            bound = 4 - len(prefix) + sum(1 for p in prefix if p <= 20)
+            if unenough_point > 20*n_throw:
+                bound -= 1
+            return bound
+        #1投ごとに-1, masterはbullを含む時の+1.5が最大
+        return 4 - (len(prefix) + 1) + 1.5
+
+    def _search_points(self, unenough_point, n_throw, out_flag):
+        """
+        上がることのできる or 次上がれる可能性のある点の組み合わせを探す
+        部分問題の結果はメモ化し、組み合わせはソート済みtupleで重複を除く
+
+        Parameters
+        -----
+        unenough_point : int
+            足りないポイント
+        n_throw : int
+            残りのトス数
+        out_flag : bool
+            上がり条件を満たしているかどうか
+
+        Returns
+        -----
+        finishable_points : tuple of tuple
+            上がれる点の組み合わせ(深さ優先探索で見つかった順)
+        """
+        key = (unenough_point, n_throw, out_flag, self._bull_type, self._out_type)
+        memo = _memo.get(key)
+        if memo is not None:
+            return memo
+
+        #順序付きの集合として使う
+        finishable_points = {}
+        #ポイントが足りている or 3投投げたのでおしまい
+        if unenough_point >= 0 and n_throw > 0:
+            #上がれるパターンを追加
+            if self._check_finish(unenough_point, out_flag):
+                finishable_points[(unenough_point,)] = None
+            for candidate_point in self._get_candidate_points(unenough_point, n_throw):
+                #上がり条件を確認
+                out_condition_flag = self._check_out_condition(out_flag, candidate_point)
+                #さらに探索
+                for points in self._search_points(unenough_point-candidate_point, n_throw-1, out_condition_flag):
+                    finishable_points.setdefault(tuple(sorted((candidate_point,) + points)))
+
+        #同時に計算された場合は先に登録された方を使う(内容は同じ)
+        return _memo.setdefault(key, tuple(finishable_points))
+
+    def _get_candidate_points(self, unenough_point, n_throw):
+        """
+        得点の候補作成
+        =====
+        50 < point <= 60 : tripleのみ
+        40 < point <= 50 : triple + double bull
+        25 < point <= 40 : triple + double bull + double
+        20 < point <= 25 : triple + double bull + double + inner_bull
+        point <= 20 : triple + double bull + double + inner_bull + single
+        =====
+
+        Parameters
+        -----
+        unenough_point : int
+            足りないポイント
+        n_throw : int
+            残りのトス数
+
+        Returns
+        -----
+        candidate_point_list : list of int
+            得点の候補(足りないポイントを超えるものは除く)
+        """
         candidate_point_list = []
-        if unenough_point <= 60*(3-len(get)):
-            candidate_point_list += list(cls.point_master[3])
-        if unenough_point <= 50*(3-len(get)):
+        if unenough_point <= 60*n_throw:
+            candidate_point_list += list(self._point_master[3])
+        if unenough_point <= 50*n_throw:
             candidate_point_list += [50]
-        if unenough_point <= 40*(3-len(get)):
-            candidate_point_list += list(cls.point_master[2])
-        if cls.bull_type == "sepa" and unenough_point <= 25*(3-len(get)):
+        if unenough_point <= 40*n_throw:
+            candidate_point_list += list(self._point_master[2])
+        if self._bull_type == "sepa" and unenough_point <= 25*n_throw:
             candidate_point_list += [25]
-        if unenough_point <= 20*(3-len(get)):
-            candidate_point_list += list(cls.point_master[1])
-
-        candidate_point_list = list(set(candidate_point_list))
-        for candidate_point in candidate_point_list:
-            #上がり条件を確認
-            out_condition_flag = cls._check_out_condition(out_flag, candidate_point)
-            #さらに探索
-            cls._search_points(point, get+[candidate_point], out_condition_flag)
-    
-    @classmethod
-    def _check_finish(cls, point, out_flag):
+        if unenough_point <= 20*n_throw:
+            candidate_point_list += list(self._point_master[1])
+
+        return [p for p in list(set(candidate_point_list)) if p <= unenough_point]
+
+    def _check_finish(self, point, out_flag):
         """
         上がれるかチェック
-        
+
         Parameters
         -----
         point : int
@@ -161,30 +435,9 @@ class ArrangeHelper(object):
         finishable_flag : bool
             終われるかどうか
         """
-        #とって良いポイント
-        candidate_points = []
-        #上がり条件を満たしている時
-        if out_flag:
-            candidate_points += list(cls.point_master[0])
-            candidate_points += list(cls.point_master[1])
-            candidate_points += list(cls.point_master[2])
-            candidate_points += list(cls.point_master[3])
-        else : 
-            if cls.out_type == "double":
-                candidate_points += [50]
-                candidate_points += list(cls.point_master[2])
-            elif cls.out_type == "master":
-                candidate_points += list(cls.point_master[0])
-                candidate_points += list(cls.point_master[2])
-                candidate_points += list(cls.point_master[3])
-            
-        if point in candidate_points:
-            return True
-        else :
-            return False
-     
-    @classmethod
-    def _check_out_condition(cls, out_flag, point):
+        return point in self._finish_points[bool(out_flag)]
+
+    def _check_out_condition(self, out_flag, point):
         """
         上がり条件を満たしているか確認
         Parameters
@@ -193,7 +446,7 @@ class ArrangeHelper(object):
             現在の上がり条件フラグ
         point : int
             確認するポイント
-        
+
         Returns
         -----
         out_condition_flag : bool
@@ -204,17 +457,9 @@ class ArrangeHelper(object):
         if out_flag :
             return True
         #満たしていない場合、確認
-        if cls.out_type == "double" and (point in cls.point_master[2] or point==50):
-            return True
-        elif cls.out_type == "master" and (point in cls.point_master[2]
-                                          or point in cls.point_master[3]
-                                          or point in cls.point_master[0]):
-            return True
-        #どの条件も満たさない場合、False
-        return False
+        return point in self._out_condition_points
 
-    @classmethod
-    def calc_score(cls, points):
+    def calc_score(self, points):
         """
         ソートに用いる
         スコアを計算。
@@ -225,28 +470,28 @@ class ArrangeHelper(object):
             * double : bull無視
             * master : bull->double->tripleで優先順位をつける
             * everything : single優先
-        
+
         Parameters
-        ----- 
+        -----
         points : list of int
             とるポイント
-        
+
         Returns
         -----
         score : float
             とるポイントの組み合わせのスコア
         """
         score = 4-len(points)
-        if cls.bull_type == "sepa" or cls.out_type == "double": #sepaブルかdoubleアウトはブルを狙わない
+        if self._bull_type == "sepa" or self._out_type == "double": #sepaブルかdoubleアウトはブルを狙わない
             if (25 in points) or (50 in points):
                 return 0
             else:
                 return score
-        if cls.out_type == "everything" : 
+        if self._out_type == "everything" :
             for p in points:
                 if p <= 20 :
                     score = score + 1
-        elif cls.out_type == "master":
+        elif self._out_type == "master":
             for p in sorted(points, reverse=True):
                 if p == 50 : # bullが一番良い
                     score = score + 1.5
@@ -255,49 +500,48 @@ class ArrangeHelper(object):
                     score = score + 1
                     break
             else: #最後トリプル
-                score = score + 0.5 
+                score = score + 0.5
         return score
-            
-    @classmethod
-    def convert_point(cls, point, last_flag):
+
+    def convert_point(self, point, last_flag):
         """
         ポイントをボードの場所に変換
         Parameters
         -----
-        point : int 
+        point : int
             狙うポイント
         last_flag : bool
             上がるチャンスかどうか
-        
+
         Returns
         -----
         board_place : list of [mark_name, place]
             ボードの場所
-        
+
         Notes
         -----
         mark_name : str
             inner_bull, outer_bull, inner_single, outer_single,  double or triple
         """
-            
+
         # 上がり方に制限があるとき
-        if last_flag and cls.out_type != "everything":
-            if cls.out_type == "double":
+        if last_flag and self._out_type != "everything":
+            if self._out_type == "double":
                 mark_name = "double"
                 place = int(point/2)
-            elif  cls.out_type == "master":
+            elif  self._out_type == "master":
                 #masterアウトではbull -> double -> singleで優先順位をつける
-                if point in cls.point_master[0]:
+                if point in self._point_master[0]:
                     mark_name = "inner_bull"
                     place = 25
-                elif point in cls.point_master[2]:
+                elif point in self._point_master[2]:
                     mark_name = "double"
                     place = int(point/2)
-                elif point in cls.point_master[3]:
+                elif point in self._point_master[3]:
                     mark_name = "triple"
                     place = int(point/3)
         else : #どれでも良い
-            for n_mark, points in cls.point_master.items():
+            for n_mark, points in self._point_master.items():
                 if n_mark == 0:
                     mark_name = "inner_bull"
                     place = 25
@@ -305,7 +549,7 @@ class ArrangeHelper(object):
                 else:
                     if point in points:
                         place = int(point/n_mark)
-                        mark_name = cls.n_mark_master[n_mark]
+                        mark_name = self.n_mark_master[n_mark]
                         if mark_name == "bull" :
                             mark_name = "inner_" + mark_name
                         elif mark_name == "single":
@@ -314,4 +558,4 @@ class ArrangeHelper(object):
                     else:
                         #取得できるポイントがなかった場合
                         continue
-        return [mark_name, place]
\ No newline at end of file
+        return [mark_name, place]
@@ -12,6 +12,8 @@ class Board(object):
         ブルの種類に対応したpoint
     total : int
         ボード半径
+    place_names : list of str
+        当たった場所の名前(index が当たった場所のコード)
     Notes
     -----
         単位(mm)
@@ -23,6 +25,17 @@ class Board(object):
         duble = 20
         totla = 198
     """
+    
+    #当たった場所の名前
+    place_names = ["inner_bull", "outer_bull", "single", "triple", "double", "out_board"]
+    #リングの外側の半径
+    _ring_edges = np.array([9, 22, 106, 126, 178, 198])
+    #_ring_edgesで区切った区間の当たった場所のコード
+    _ring_place_codes = np.array([0, 1, 2, 3, 2, 4, 5])
+    #ピザの境界の角度
+    _segment_edges = np.arange(1, 40, 2) * np.pi / 20
+    #_segment_edgesで区切った区間の基礎ポイント(角度0から反時計回り)
+    _segment_points = np.array([20, 1, 18, 4, 13, 6, 10, 15, 2, 17, 3, 19, 7, 16, 8, 11, 14, 9, 12, 5, 20])
 
     def __init__(self, bull_type="fat"):
         """
@@ -41,6 +54,9 @@ class Board(object):
             self.bull["outer_bull"] = 50
         else:
             raise ValueError("bull_type must be fat or sepa")
+        #当たった場所のコードごとの係数とbullのポイント
+        self._place_coef = np.array([0, 0, 1, 3, 2, 0])
+        self._place_bull_point = np.array([self.bull["inner_bull"], self.bull["outer_bull"], 0, 0, 0, 0])
         
     def get_aim_coordinate(self, point, place):
         """ 
@@ -87,15 +103,36 @@ class Board(object):
             当たった場所の基礎ポイント
         """
         
-        place, coef = self._get_place(r)
-        if "bull" in place:
-            return self.bull[place], place, 25
-        else:
-            base_point = self._get_point(theta)
-            if place == "out_board":
-                base_point = 0
-            return coef * base_point, place, base_point
+        point, place_code, base_point = self.calc_throw_results(np.array([r]), np.array([theta]))
+        return int(point[0]), self.place_names[place_code[0]], int(base_point[0])
     
+    def calc_throw_results(self, r, theta):
+        """
+        複数の当たった座標のポイントをまとめて計算
+        
+        Parameters
+        -----
+        r : numpy.ndarray of float
+            当たった座標の距離成分
+        theta : numpy.ndarray of float
+            当たった座標の角度成分
+            
+        Returns
+        -----
+        point : numpy.ndarray of int
+            当たった場所に応じたポイント
+        place_code : numpy.ndarray of int
+            当たった場所のコード(place_namesのindex)
+        base_point : numpy.ndarray of int
+            当たった場所の基礎ポイント
+        """
+        
+        place_code = self._get_place(np.asarray(r))
+        base_point = self._get_point(np.asarray(theta))
+        #bullは25, ボード外は0
+        base_point = np.where(place_code <= 1, 25, np.where(place_code == 5, 0, base_point))
+        point = self._place_coef[place_code] * base_point + self._place_bull_point[place_code]
+        return point, place_code, base_point
     
     def _get_place(self, r):
         """
@@ -103,91 +140,45 @@ class Board(object):
         
         Parameters
         -----
-        r : float
+        r : numpy.ndarray of float
             座標の距離成分
             
         Returns
         -----
-        place : str
-            inner_bull, outer_bull, single, double, triple, out_board
-        coef : int
-            計算に用いるための係数
+        place_code : numpy.ndarray of int
+            当たった場所のコード(place_namesのindex)
+        
+        Notes
+        -----
+        各リングは外側の境界を含む(例 : 9 < r <= 22 はouter_bull)
         """
         
-        if 0 <= r <= 9:
-            return "inner_bull", 1
-        elif 9 < r <= 22:
-            return "outer_bull", 1
-        elif 22 < r <= 106 or 126 < r <= 178:
-            return "single", 1
-        elif 106 < r <= 126:
-            return "triple", 3
-        elif 178 < r <= 198:
-            return "double", 2
-        else:
-            return "out board", 0
+        place_code = self._ring_place_codes[np.searchsorted(self._ring_edges, r, side="left")]
+        return np.where(r < 0, 5, place_code)
     
     def _get_point(self, theta):
         """
-        距離からbull, single, duble, tripleを判定
+        角度から基礎ポイントを判定
         
         Parameters
         -----
-        theta : float 
+        theta : numpy.ndarray of float
             座標の角度成分
             
         Returns
         -----
-        point : int
-            0 ~ 20の整数
+        point : numpy.ndarray of int
+            1 ~ 20の整数
             
         Notes
         -----
         一つのピザの角度はπ/10
+        各ピザは反時計回り側の境界を含む
         """
         
-        if 0 <= theta <= np.pi/20 or 39*np.pi/20 < theta <= 2*np.pi:
-            return 20
-        elif 1*np.pi/20 < theta <= 3*np.pi/20:
-            return 1
-        elif 3*np.pi/20 < theta <= 5*np.pi/20:
-            return 18
-        elif 5*np.pi/20 < theta <= 7*np.pi/20:
-            return 4
-        elif 7*np.pi/20 < theta <= 9*np.pi/20:
-            return 13
-        elif 9*np.pi/20 < theta <= 11*np.pi/20:
-            return 6
-        elif 11*np.pi/20 < theta <= 13*np.pi/20:
-            return 10
-        elif 13*np.pi/20 < theta <= 15*np.pi/20:
-            return 15
-        elif 15*np.pi/20 < theta <= 17*np.pi/20:
-            return 2
-        elif 17*np.pi/20 < theta <= 19*np.pi/20:
-            return 17
-        elif 19*np.pi/20 < theta <= 21*np.pi/20:
-            return 3
-        elif 21*np.pi/20 < theta <= 23*np.pi/20:
-            return 19
-        elif 23*np.pi/20 < theta <= 25*np.pi/20:
-            return 7
-        elif 25*np.pi/20 < theta <= 27*np.pi/20:
-            return 16
-        elif 27*np.pi/20 < theta <= 29*np.pi/20:
-            return 8
-        elif 29*np.pi/20 < theta <= 31*np.pi/20:
-            return 11
-        elif 31*np.pi/20 < theta <= 33*np.pi/20:
-            return 14
-        elif 33*np.pi/20 < theta <= 35*np.pi/20:
-            return 19
-        elif 35*np.pi/20 < theta <= 37*np.pi/20:
-            return 12
-        elif 37*np.pi/20 < theta <= 39*np.pi/20:
-            return 5
-        else:
+        if np.any((theta < 0) | (2*np.pi < theta)):
             raise ValueError("theta must be 0 <= theta <= 2*np.pi")
+        return self._segment_points[np.searchsorted(self._segment_edges, theta, side="left")]
             
     def _get_radious(self, place):
         """
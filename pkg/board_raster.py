@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+import sys
+
+import numpy as np
+
+from pkg import board
+from pkg import cache_util
+from pkg import probability
+from pkg.board import Board
+
+#ワイヤーをまたぐマスのコード
+WIRE = -1
+
+#読み込み済みのラスター
+#{resolution : numpy.ndarray}
+_rasters = {}
+#作成済みのBoardRaster
+#{(bull_type, resolution) : BoardRaster}
+_board_rasters = {}
+
+
+def get_board_raster(bull_type="fat", resolution=0.1, use_cache=True):
+    """
+    ボードのラスターを取得(bull_type, resolutionごとにキャッシュする)
+
+    Parameters
+    -----
+    bull_type : str (sepa or fat)
+        bullの種類
+    resolution : float
+        マスの大きさ(mm)
+    use_cache : bool
+        ディスクのキャッシュから読み書きするかどうか
+
+    Returns
+    -----
+    board_raster : BoardRaster
+        ボードのラスター
+    """
+    key = (bull_type, resolution)
+    if key not in _board_rasters:
+        _board_rasters[key] = BoardRaster(bull_type, resolution, use_cache)
+    return _board_rasters[key]
+
+
+class BoardRaster(object):
+    """
+    直交座標からのポイント計算を配列の参照で行うクラス
+    ボードを正方形のマスに分け、マスごとに当たる場所(probability.OUTCOMES)のindexを持つ
+    ワイヤーをまたぐマスだけBoardで極座標から正確に計算する
+
+    ラスターの当たる場所はbull_typeによらないので全bull_typeで共有し、
+    ポイントへの変換表だけbull_typeごとに持つ
+
+    Attributes
+    -----
+    bull_type : str (sepa or fat)
+        bullの種類
+    resolution : float
+        マスの大きさ(mm)
+    raster : numpy.ndarray of int8
+        (n, n)のマスごとの当たる場所のindex(ワイヤーをまたぐマスはWIRE)
+        [i, j]がx = origin + i*resolution, y = origin + j*resolutionのマス
+    origin : float
+        ラスターの端の座標
+    """
+
+    def __init__(self, bull_type="fat", resolution=0.1, use_cache=True):
+        """
+        Parameters
+        -----
+        bull_type : str (sepa or fat)
+            bullの種類
+        resolution : float
+            マスの大きさ(mm)
+        use_cache : bool
+            ディスクのキャッシュから読み書きするかどうか
+        """
+        self.bull_type = bull_type
+        self.resolution = resolution
+        self._board = Board(bull_type)
+        #ボードの外側に1マス余裕を持たせる
+        self._n_cells = int(np.ceil(2 * (self._board.total + resolution) / resolution))
+        self.origin = -self._n_cells * resolution / 2
+
+        if resolution not in _rasters:
+            raster = None
+            name = "board_raster_{}".format(resolution)
+            version = cache_util.calc_source_hash(board, probability, sys.modules[__name__])
+            if use_cache:
+                raster = cache_util.load_array(name, version)
+            if raster is None:
+                raster = self._calc_raster()
+                #保存できた場合はメモリマップに置き換える(保存できなければ計算した配列をそのまま使う)
+                if use_cache and cache_util.save_array(name, version, raster):
+                    mapped = cache_util.load_array(name, version)
+                    if mapped is not None:
+                        raster = mapped
+            _rasters[resolution] = raster
+        self.raster = _rasters[resolution]
+
+        #当たる場所のindexからポイントなどへの変換表
+        self._outcome_place_codes = np.array([Board.place_names.index(place) for place, _ in probability.OUTCOMES])
+        self._outcome_base_points = np.array([point for _, point in probability.OUTCOMES])
+        self._outcome_points = (self._board._place_coef[self._outcome_place_codes] * self._outcome_base_points
+                                + self._board._place_bull_point[self._outcome_place_codes])
+
+    def _calc_raster(self, chunk_rows=64):
+        """
+        マスごとの当たる場所を計算する
+        マスの距離の範囲にリングの境界がある or 角度の範囲にピザの境界があるマスはWIRE
+
+        Returns
+        -----
+        raster : numpy.ndarray of int8
+            (n, n)のマスごとの当たる場所のindex
+        """
+        n = self._n_cells
+        edges = self.origin + np.arange(n + 1) * self.resolution
+        raster = np.empty((n, n), dtype=np.int8)
+        segment_edges = self._board._segment_edges
+        bull_edge, board_edge = self._board._ring_edges[1], self._board._ring_edges[-1]
+        for start in range(0, n, chunk_rows):
+            x0 = edges[start:min(start+chunk_rows, n)][:, None]
+            x1 = edges[start+1:min(start+chunk_rows, n)+1][:, None]
+            y0, y1 = edges[None, :-1], edges[None, 1:]
+            #マスの中心の当たる場所
+            center_x, center_y = (x0 + x1) / 2, (y0 + y1) / 2
+            center_r = np.sqrt(center_x**2 + center_y**2)
+            center_theta = np.arctan2(center_y, center_x)
+            center_theta[center_theta < 0] += 2*np.pi
+            _, place_code, base_point = self._board.calc_throw_results(center_r, center_theta)
+            codes = probability._outcome_index[place_code, base_point]
+
+            #マスの原点からの距離の範囲
+            dx = np.maximum(np.maximum(x0, -x1), 0)
+            dy = np.maximum(np.maximum(y0, -y1), 0)
+            r_min = np.sqrt(dx**2 + dy**2)
+            r_max = np.sqrt(np.maximum(np.abs(x0), np.abs(x1))**2 + np.maximum(np.abs(y0), np.abs(y1))**2)
+            ring_edges = self._board._ring_edges
+            wire = (np.searchsorted(ring_edges, r_min, side="left") != np.searchsorted(ring_edges, r_max, side="right"))
+
+            #ピザに分かれるリングのマスの角度の範囲(マスは原点を含まないので角の角度で決まる)
+            sliced = ~wire & (r_min > bull_edge) & (r_max <= board_edge)
+            corner_theta = np.stack([np.arctan2(y, x) for x in [x0, x1] for y in [y0, y1]], axis=-1)[sliced]
+            relative = np.mod(corner_theta - center_theta[sliced][:, None] + np.pi, 2*np.pi) - np.pi
+            edge_relative = np.mod(segment_edges[None, :] - center_theta[sliced][:, None] + np.pi, 2*np.pi) - np.pi
+            crossed = ((relative.min(axis=1)[:, None] <= edge_relative)
+                       & (edge_relative <= relative.max(axis=1)[:, None])).any(axis=1)
+            wire[sliced] = crossed
+
+            raster[start:start+len(x0)] = np.where(wire, WIRE, codes)
+        return raster
+
+    def calc_throw_results(self, x, y):
+        """
+        直交座標の当たった座標のポイントをまとめて計算
+        Board.calc_throw_resultsと同じ結果になる
+
+        Parameters
+        -----
+        x : numpy.ndarray of float
+            当たった座標のx成分(theta=0の方向)
+        y : numpy.ndarray of float
+            当たった座標のy成分
+
+        Returns
+        -----
+        point : numpy.ndarray of int
+            当たった場所に応じたポイント
+        place_code : numpy.ndarray of int
+            当たった場所のコード(Board.place_namesのindex)
+        base_point : numpy.ndarray of int
+            当たった場所の基礎ポイント
+        """
+        x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+        i = np.floor((x - self.origin) / self.resolution).astype(np.int64)
+        j = np.floor((y - self.origin) / self.resolution).astype(np.int64)
+        inside = (0 <= i) & (i < self._n_cells) & (0 <= j) & (j < self._n_cells)
+        #ラスターの外はボードの外
+        codes = np.full(x.shape, len(probability.OUTCOMES) - 1, dtype=np.int64)
+        codes[inside] = self.raster[i[inside], j[inside]]
+
+        #ワイヤーをまたぐマスは極座標で計算する
+        wire = codes == WIRE
+        if wire.any():
+            r = np.sqrt(x[wire]**2 + y[wire]**2)
+            theta = np.arctan2(y[wire], x[wire])
+            theta[theta < 0] += 2*np.pi
+            _, place_code, base_point = self._board.calc_throw_results(r, theta)
+            codes[wire] = probability._outcome_index[place_code, base_point]
+        return self._outcome_points[codes], self._outcome_place_codes[codes], self._outcome_base_points[codes]
+
+    def calc_throw_result(self, x, y):
+        """
+        直交座標の当たった座標のポイント計算
+
+        Returns
+        -----
+        point : int
+            当たった場所に応じたポイント
+        place : str
+            当たった場所の名前
+        base_point : int
+            当たった場所の基礎ポイント
+        """
+        point, place_code, base_point = self.calc_throw_results(np.array([x]), np.array([y]))
+        return int(point[0]), Board.place_names[place_code[0]], int(base_point[0])
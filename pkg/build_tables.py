@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+import os
+import sys
+import glob
+import argparse
+import tempfile
+
+import numpy as np
+
+from pkg import cache_util
+from pkg.strategy.zeroone import ZeroOne, TABLE_VERSION
+
+
+def build_tables(bull_types=["fat", "sepa"], out_types=["everything", "master", "double"], max_score=501
+                 , data_dir=None):
+    """
+    ZeroOneのスコアマスタと方策テーブルを計算して、パッケージに同梱するディレクトリに保存する
+    ZeroOne.TABLE_VERSIONを上げたら作り直す(古いバージョンのファイルは消す)
+
+    Parameters
+    -----
+    bull_types : list of str
+        bullの種類の一覧
+    out_types : list of str
+        上がり方の種類の一覧
+    max_score : int, optional
+        方策テーブルに含めるラウンド開始時の残りポイントの最大値(Noneは方策テーブルを作らない)
+    data_dir : str, optional
+        保存先(省略時はcache_util.get_data_dir)
+
+    Returns
+    -----
+    names : list of str
+        保存したファイル名
+    """
+    data_dir = cache_util.get_data_dir() if data_dir is None else data_dir
+    names = []
+    for bull_type in bull_types:
+        for out_type in out_types:
+            strategy = ZeroOne(bull_type, out_type, use_cache=False)
+            names += strategy.export_tables(data_dir, max_score)
+    #古いバージョンのファイルを消す
+    for path in glob.glob(os.path.join(data_dir, "zeroone_*.npz")):
+        if os.path.basename(path) not in names:
+            os.remove(path)
+    return names
+
+
+def check_tables(bull_types=["fat", "sepa"], out_types=["everything", "master", "double"], max_score=501
+                 , data_dir=None):
+    """
+    同梱テーブルが今のバージョンのファイル名で、今のコードの計算結果と一致するか確認する
+    max_score=Noneの場合は方策テーブルを作らず、スコアマスタだけ比べる(方策テーブルはバージョンだけ確認する)
+
+    Parameters
+    -----
+    bull_types, out_types, max_score, data_dir :
+        build_tablesと同じ
+
+    Returns
+    -----
+    errors : list of str
+        一致しなかった内容(一致した場合は空)
+    """
+    data_dir = cache_util.get_data_dir() if data_dir is None else data_dir
+    errors = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        names = build_tables(bull_types, out_types, max_score, tmp_dir)
+        for name in names:
+            path = os.path.join(data_dir, name)
+            if not os.path.exists(path):
+                errors.append("missing : {}".format(name))
+                continue
+            with np.load(path) as shipped, np.load(os.path.join(tmp_dir, name)) as built:
+                if sorted(shipped.files) != sorted(built.files):
+                    errors.append("different arrays : {}".format(name))
+                    continue
+                for key in built.files:
+                    if not np.array_equal(shipped[key], built[key]):
+                        errors.append("different values : {} ({})".format(name, key))
+    #作っていないテーブル(max_score=Noneの方策テーブルなど)は、バージョンだけ確認する
+    suffix = "_{}.npz".format(cache_util.make_version(TABLE_VERSION))
+    for path in sorted(glob.glob(os.path.join(data_dir, "zeroone_*.npz"))):
+        if not os.path.basename(path).endswith(suffix):
+            errors.append("stale : {}".format(os.path.basename(path)))
+    return errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="パッケージに同梱する計算済みテーブルを作成する")
+    parser.add_argument("--max-score", type=int, default=501, help="方策テーブルに含める残りポイントの最大値")
+    parser.add_argument("--no-policy", action="store_true", help="方策テーブルを作らない")
+    parser.add_argument("--check", action="store_true", help="作り直さずに同梱テーブルが今のコードと一致するか確認する")
+    args = parser.parse_args(argv)
+    if args.check:
+        errors = check_tables(max_score=None if args.no_policy else args.max_score)
+        for error in errors:
+            print(error)
+        return 1 if len(errors) > 0 else 0
+    for name in build_tables(max_score=None if args.no_policy else args.max_score):
+        print(name)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
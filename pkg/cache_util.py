@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+import os
+import glob
+import hashlib
+import tempfile
+from logging import getLogger
+
+import numpy as np
+
+logger = getLogger("darts")
+
+#キャッシュ形式のバージョン(形式を変えたら上げる)
+CACHE_FORMAT_VERSION = 1
+
+
+def get_cache_dir():
+    """
+    キャッシュを置くディレクトリを取得
+    環境変数DARTS_CACHE_DIRで変更できる
+
+    Returns
+    -----
+    cache_dir : str
+        キャッシュディレクトリ
+    """
+    return os.environ.get("DARTS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "darts_app"))
+
+
+def get_data_dir():
+    """
+    パッケージに同梱した計算済みテーブルのディレクトリを取得
+
+    Returns
+    -----
+    data_dir : str
+        同梱テーブルのディレクトリ
+
+    See Also
+    -----
+    pkg.build_tables : 同梱テーブルの作成
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+def calc_source_hash(*modules):
+    """
+    モジュールのソースからキャッシュのバージョンを計算
+    ルールのコードが変わるとバージョンが変わり、キャッシュが無効になる
+
+    Parameters
+    -----
+    modules : module
+        キャッシュする値の計算に関わるモジュール
+
+    Returns
+    -----
+    version : str
+        バージョン文字列
+    """
+    sha = hashlib.sha256(str(CACHE_FORMAT_VERSION).encode())
+    for module in modules:
+        with open(module.__file__, "rb") as f:
+            sha.update(f.read())
+    return sha.hexdigest()[:16]
+
+
+def make_version(table_version):
+    """
+    明示的なバージョン定数からキャッシュのバージョンを作る
+    calc_source_hashと違い、コメントなどの計算結果に関係ない変更では変わらない(同梱テーブル用)
+
+    Parameters
+    -----
+    table_version : int
+        計算結果が変わる変更をしたら上げるバージョン
+
+    Returns
+    -----
+    version : str
+        バージョン文字列
+    """
+    return "v{}-{}".format(CACHE_FORMAT_VERSION, table_version)
+
+
+def _get_cache_path(name, version, cache_dir=None):
+    return os.path.join(get_cache_dir() if cache_dir is None else cache_dir, "{}_{}.npz".format(name, version))
+
+
+def load_arrays(name, version, bundled_version=None):
+    """
+    キャッシュから配列を読み込む
+    キャッシュになければ同梱テーブルから読み込む
+
+    Parameters
+    -----
+    name : str
+        キャッシュ名
+    version : str
+        キャッシュのバージョン文字列(calc_source_hashなど)
+    bundled_version : str, optional
+        同梱テーブルのバージョン文字列(make_versionなど, 省略時はversion)
+
+    Returns
+    -----
+    arrays : dict of numpy.ndarray or None
+        キャッシュがない or 壊れている場合はNone
+    """
+    bundled_version = version if bundled_version is None else bundled_version
+    for cache_dir, cache_version in [(get_cache_dir(), version), (get_data_dir(), bundled_version)]:
+        try:
+            with np.load(_get_cache_path(name, cache_version, cache_dir)) as npz:
+                return {key: npz[key] for key in npz.files}
+        except (OSError, ValueError):
+            pass
+    #同梱テーブルが別のバージョンしかない場合は、計算し直すことになるので知らせる
+    stale_paths = glob.glob(os.path.join(glob.escape(get_data_dir()), glob.escape(name) + "_*.npz"))
+    if len(stale_paths) > 0:
+        logger.warning("bundled table {} does not match version {} ({}), recomputing. "
+                       "run python -m pkg.build_tables to rebuild".format(
+                           name, bundled_version, ", ".join(sorted(os.path.basename(path) for path in stale_paths))))
+    return None
+
+
+def save_arrays(name, version, cache_dir=None, compress=False, **arrays):
+    """
+    配列をキャッシュに保存する
+    書き込み途中のファイルを読まないよう、一時ファイルに書いてから置き換える
+
+    Parameters
+    -----
+    name : str
+        キャッシュ名
+    version : str
+        バージョン文字列
+    cache_dir : str, optional
+        保存先(省略時はget_cache_dir)
+    compress : bool
+        圧縮するかどうか
+    arrays : dict of numpy.ndarray
+        保存する配列
+
+    Returns
+    -----
+    saved : bool
+        保存できたかどうか
+    """
+    cache_dir = get_cache_dir() if cache_dir is None else cache_dir
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=cache_dir, suffix=".npz", delete=False) as f:
+            (np.savez_compressed if compress else np.savez)(f, **arrays)
+        os.chmod(f.name, 0o644)
+        os.replace(f.name, _get_cache_path(name, version, cache_dir))
+    except OSError:
+        return False
+    return True
+
+
+def load_array(name, version, mmap_mode="r"):
+    """
+    キャッシュから1つの配列を読み込む(メモリマップできる)
+
+    Parameters
+    -----
+    name : str
+        キャッシュ名
+    version : str
+        バージョン文字列
+    mmap_mode : str or None
+        numpy.loadのmmap_mode
+
+    Returns
+    -----
+    array : numpy.ndarray or None
+        キャッシュがない or 壊れている場合はNone
+    """
+    try:
+        return np.load(os.path.join(get_cache_dir(), "{}_{}.npy".format(name, version)), mmap_mode=mmap_mode)
+    except (OSError, ValueError):
+        return None
+
+
+def save_array(name, version, array):
+    """
+    1つの配列をキャッシュに保存する(load_arrayでメモリマップできる形式)
+
+    Parameters
+    -----
+    name : str
+        キャッシュ名
+    version : str
+        バージョン文字列
+    array : numpy.ndarray
+        保存する配列
+
+    Returns
+    -----
+    saved : bool
+        保存できたかどうか
+    """
+    cache_dir = get_cache_dir()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=cache_dir, suffix=".npy", delete=False) as f:
+            np.save(f, array)
+        os.chmod(f.name, 0o644)
+        os.replace(f.name, os.path.join(cache_dir, "{}_{}.npy".format(name, version)))
+    except OSError:
+        return False
+    return True
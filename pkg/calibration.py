@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+import numpy as np
+
+from pkg.board import Board
+from pkg.strategy.zeroone import ZeroOne
+
+
+def calc_displacements(aim_r, aim_theta, hit_r, hit_theta):
+    """
+    狙った座標から当たった座標へのずれを、狙った方向(ボードの中心から外向き)とその垂直方向に分ける
+
+    Parameters
+    -----
+    aim_r, aim_theta : numpy.ndarray of float
+        狙った座標(Board.get_aim_coordinateと同じ極座標)
+    hit_r, hit_theta : numpy.ndarray of float
+        当たった座標
+
+    Returns
+    -----
+    radial : numpy.ndarray of float
+        距離方向のずれ
+    tangential : numpy.ndarray of float
+        角度方向のずれ
+    """
+    aim_r, aim_theta = np.asarray(aim_r, dtype=float), np.asarray(aim_theta, dtype=float)
+    hit_r, hit_theta = np.asarray(hit_r, dtype=float), np.asarray(hit_theta, dtype=float)
+    #狙った方向に回転した座標系で計算する
+    diff = hit_theta - aim_theta
+    radial = hit_r*np.cos(diff) - aim_r
+    tangential = hit_r*np.sin(diff)
+    return radial, tangential
+
+
+def fit_sigma(aim_r, aim_theta, hit_r, hit_theta):
+    """
+    Throwのsigmaを最尤推定する
+    Throwはずれの距離が半正規分布、向きが一様なので、推定値はずれの距離の二乗平均の平方根
+
+    Parameters
+    -----
+    aim_r, aim_theta : numpy.ndarray of float
+        狙った座標(Board.get_aim_coordinateと同じ極座標)
+    hit_r, hit_theta : numpy.ndarray of float
+        当たった座標
+
+    Returns
+    -----
+    result : dict
+        sigma : 推定値
+        stderr : 推定値の標準誤差
+        log_likelihood : 対数尤度
+        n_throws : 投げた数
+    """
+    radial, tangential = calc_displacements(aim_r, aim_theta, hit_r, hit_theta)
+    n_throws = len(radial)
+    if n_throws == 0:
+        raise ValueError("at least one throw is required")
+    sigma = np.sqrt(np.mean(radial**2 + tangential**2))
+    return dict(sigma=sigma, stderr=sigma/np.sqrt(2*n_throws)
+                , log_likelihood=_calc_log_likelihood(radial, tangential, sigma, sigma), n_throws=n_throws)
+
+
+def fit_anisotropic_sigma(aim_r, aim_theta, hit_r, hit_theta, max_iter=50, tol=1e-10):
+    """
+    距離方向と角度方向で別々のsigmaを最尤推定する
+    ずれを(sigma_r, sigma_t)で割ると、Throwと同じ向きが一様で距離が標準半正規分布のずれになるモデル
+    対数尤度は(log sigma_r, log sigma_t)について凹なので、ニュートン法で解く
+
+    Parameters
+    -----
+    aim_r, aim_theta : numpy.ndarray of float
+        狙った座標(Board.get_aim_coordinateと同じ極座標)
+    hit_r, hit_theta : numpy.ndarray of float
+        当たった座標
+    max_iter : int
+        ニュートン法の最大反復回数
+    tol : float
+        収束判定(log sigmaの変化量)
+
+    Returns
+    -----
+    result : dict
+        sigma_r : 距離方向の推定値
+        sigma_t : 角度方向の推定値
+        log_likelihood : 対数尤度(fit_sigmaと比べられる)
+        n_throws : 投げた数
+    """
+    radial, tangential = calc_displacements(aim_r, aim_theta, hit_r, hit_theta)
+    n_throws = len(radial)
+    if n_throws == 0:
+        raise ValueError("at least one throw is required")
+    radial_sq, tangential_sq = radial**2, tangential**2
+
+    #各方向のずれの二乗平均はsigma**2/2
+    log_sigma = 0.5 * np.log(2 * np.array([radial_sq.mean(), tangential_sq.mean()]))
+    for _ in range(max_iter):
+        p = radial_sq * np.exp(-2*log_sigma[0])
+        q = tangential_sq * np.exp(-2*log_sigma[1])
+        s = np.maximum(p + q, 1e-300)
+        pq = (p*q/s**2).sum()
+        gradient = np.array([p.sum() + (p/s).sum() - n_throws, q.sum() + (q/s).sum() - n_throws])
+        hessian = np.array([[-2*p.sum() - 2*pq, 2*pq], [2*pq, -2*q.sum() - 2*pq]])
+        step = np.clip(np.linalg.solve(hessian, -gradient), -1, 1)
+        log_sigma += step
+        if np.abs(step).max() <= tol:
+            break
+
+    sigma_r, sigma_t = np.exp(log_sigma)
+    return dict(sigma_r=sigma_r, sigma_t=sigma_t
+                , log_likelihood=_calc_log_likelihood(radial, tangential, sigma_r, sigma_t), n_throws=n_throws)
+
+
+def fit_events(events, anisotropic=False):
+    """
+    1投ごとの記録(THROW_EVENT_DTYPE)からsigmaを推定する
+
+    Parameters
+    -----
+    events : numpy.ndarray
+        THROW_EVENT_DTYPEの構造化配列(狙った場所が不明な記録は除く)
+    anisotropic : bool
+        距離方向と角度方向で別々に推定するかどうか
+
+    Returns
+    -----
+    result : dict
+        fit_sigma or fit_anisotropic_sigmaの結果
+    """
+    events = events[events["aim_mark"] >= 0]
+    #狙った場所の種類ごとに座標を計算する
+    board = Board()
+    aims, inverse = np.unique(np.stack([events["aim_place"], events["aim_mark"]], axis=1), axis=0, return_inverse=True)
+    coordinates = np.array([board.get_aim_coordinate(int(place), ZeroOne.mark_names[mark]) for place, mark in aims])
+    coordinates = coordinates[inverse.ravel()].reshape(-1, 2)
+    fit = fit_anisotropic_sigma if anisotropic else fit_sigma
+    return fit(coordinates[:, 0], coordinates[:, 1], events["r"], events["theta"])
+
+
+def _calc_log_likelihood(radial, tangential, sigma_r, sigma_t):
+    """
+    ずれの対数尤度
+    ずれを(sigma_r, sigma_t)で割った距離rhoは標準半正規分布、向きは一様なので
+    密度はsqrt(2/pi)*exp(-rho**2/2) / (2*pi*rho) / (sigma_r*sigma_t)
+    """
+    rho = np.sqrt((radial/sigma_r)**2 + (tangential/sigma_t)**2)
+    rho = np.maximum(rho, 1e-300)
+    return float((0.5*np.log(2/np.pi) - rho**2/2 - np.log(2*np.pi*rho)).sum() - len(rho)*np.log(sigma_r*sigma_t))
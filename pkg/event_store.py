@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+import os
+import glob
+import json
+import tempfile
+
+import numpy as np
+
+#記録の型のバージョン(THROW_EVENT_DTYPEを変えたら上げる)
+#1 : leftがない形式(バージョンのファイルがない)
+EVENT_SCHEMA_VERSION = 2
+
+#1投の記録の型
+THROW_EVENT_DTYPE = np.dtype([
+    ("leg", np.int64),          #レッグのID
+    ("round", np.int32),        #ラウンド(0始まり)
+    ("dart", np.int8),          #ラウンドで何投目か(0始まり)
+    ("left", np.int16),         #投げる前の残りポイント
+    ("aim_point", np.int16),    #狙ったポイント
+    ("aim_mark", np.int8),      #狙った場所のコード(ZeroOne.mark_names, 不明は-1)
+    ("aim_place", np.int8),     #狙った場所の基礎ポイント
+    ("r", np.float64),          #当たった座標の距離成分
+    ("theta", np.float64),      #当たった座標の角度成分
+    ("point", np.int16),        #取ったポイント
+    ("mark", np.int8),          #当たった場所のコード(Board.place_names)
+    ("base_point", np.int8),    #当たった場所の基礎ポイント
+    ("burst", np.bool_),        #BURSTしたかどうか
+    ("finish", np.bool_),       #上がったかどうか
+])
+
+
+def to_events(**columns):
+    """
+    列の値から記録を作成する
+    省略した列は0(aim_markは-1)になる
+
+    Parameters
+    -----
+    columns : dict of array_like
+        列名と値(同じ長さの配列 or スカラー)
+
+    Returns
+    -----
+    events : numpy.ndarray
+        THROW_EVENT_DTYPEの構造化配列
+    """
+    n = _count_rows(columns)
+    events = np.zeros(n, dtype=THROW_EVENT_DTYPE)
+    events["aim_mark"] = -1
+    for name, values in columns.items():
+        events[name] = values
+    return events
+
+
+def _count_rows(columns):
+    """
+    列の値から件数を求める(配列の列の長さ, 全てスカラーなら1件, 空の配列なら0件)
+    """
+    sizes = [np.size(values) for values in columns.values() if np.ndim(values) > 0]
+    return max(sizes) if len(sizes) > 0 else 1
+
+
+class ThrowEventStore(object):
+    """
+    投げた結果を列指向のバイナリで保存する追記専用のストア
+    ディレクトリにchunk_size件ずつの構造化配列(.npy)と、記録の型のバージョン(schema.json)を置く
+    読み込みはメモリマップなのでコピーしない
+
+    Attributes
+    -----
+    path : str
+        保存先のディレクトリ
+    chunk_size : int
+        1ファイルの件数
+    next_leg_id : int
+        次に割り当てるレッグのID
+    """
+
+    def __init__(self, path, chunk_size=1000000):
+        """
+        Parameters
+        -----
+        path : str
+            保存先のディレクトリ(なければ作成する)
+        chunk_size : int
+            1ファイルの件数
+
+        Raises
+        -----
+        ValueError
+            ディレクトリの記録が別のバージョンの型で書かれている場合
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        os.makedirs(path, exist_ok=True)
+        self._n_chunks = len(self._chunk_paths())
+        self._check_schema()
+
+        #書き込み待ちのバッファ(読むだけの場合は作らないよう、最初のappendで作る)
+        self._buffer = None
+        self._n_buffered = 0
+
+        #既存の記録の続きからレッグのIDを割り当てる
+        self.next_leg_id = 0
+        if self._n_chunks > 0:
+            last_chunk = np.load(self._chunk_paths()[-1], mmap_mode="r")
+            if len(last_chunk) > 0:
+                self.next_leg_id = int(last_chunk["leg"].max()) + 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    def _chunk_paths(self):
+        return sorted(glob.glob(os.path.join(self.path, "chunk_*.npy")))
+
+    def _check_schema(self):
+        """
+        ディレクトリの記録の型のバージョンを確認する(新しいディレクトリには今のバージョンを書く)
+        """
+        schema_path = os.path.join(self.path, "schema.json")
+        try:
+            with open(schema_path) as f:
+                version = json.load(f)["version"]
+        except FileNotFoundError:
+            #バージョンのファイルがない記録はバージョン1
+            version = 1 if self._n_chunks > 0 else None
+        if version is None:
+            with tempfile.NamedTemporaryFile("w", dir=self.path, suffix=".tmp", delete=False) as f:
+                json.dump(dict(version=EVENT_SCHEMA_VERSION), f)
+            os.replace(f.name, schema_path)
+        elif version != EVENT_SCHEMA_VERSION:
+            raise ValueError("event store {} has schema version {}, but version {} is required. "
+                             "write the events to a new directory".format(self.path, version, EVENT_SCHEMA_VERSION))
+
+    def allocate_legs(self, n_legs):
+        """
+        レッグのIDを割り当てる
+
+        Parameters
+        -----
+        n_legs : int
+            レッグ数
+
+        Returns
+        -----
+        start_leg_id : int
+            割り当てた最初のID(start_leg_id ~ start_leg_id+n_legs-1)
+        """
+        start_leg_id = self.next_leg_id
+        self.next_leg_id += n_legs
+        return start_leg_id
+
+    def append(self, **columns):
+        """
+        記録をまとめて追加する
+        省略した列は0(aim_markは-1)になる
+
+        Parameters
+        -----
+        columns : dict of array_like
+            列名と値(同じ長さの配列 or スカラー)
+        """
+        n = _count_rows(columns)
+        if n > 0 and self._buffer is None:
+            self._buffer = np.zeros(self.chunk_size, dtype=THROW_EVENT_DTYPE)
+        start = 0
+        while start < n:
+            size = min(n - start, self.chunk_size - self._n_buffered)
+            rows = self._buffer[self._n_buffered:self._n_buffered+size]
+            rows["aim_mark"] = -1
+            for name, values in columns.items():
+                values = np.asarray(values)
+                rows[name] = values[start:start+size] if values.ndim > 0 else values
+            self._n_buffered += size
+            start += size
+            if self._n_buffered == self.chunk_size:
+                self.flush()
+
+    def flush(self):
+        """
+        バッファの記録をファイルに書き出す
+        """
+        if self._n_buffered == 0:
+            return
+        chunk_path = os.path.join(self.path, "chunk_{:06d}.npy".format(self._n_chunks))
+        #書き込み途中のファイルを読まないよう、一時ファイルに書いてから置き換える
+        with tempfile.NamedTemporaryFile(dir=self.path, suffix=".tmp", delete=False) as f:
+            np.save(f, self._buffer[:self._n_buffered])
+        os.replace(f.name, chunk_path)
+        self._buffer[:self._n_buffered] = 0
+        self._n_buffered = 0
+        self._n_chunks += 1
+
+    def iter_chunks(self):
+        """
+        書き出した記録をファイルごとに読む(メモリマップ)
+
+        Returns
+        -----
+        chunks : generator of numpy.memmap
+            THROW_EVENT_DTYPEの構造化配列
+        """
+        for chunk_path in self._chunk_paths():
+            chunk = np.load(chunk_path, mmap_mode="r")
+            if chunk.dtype != THROW_EVENT_DTYPE:
+                raise ValueError("{} does not match THROW_EVENT_DTYPE (schema version {})".format(
+                    chunk_path, EVENT_SCHEMA_VERSION))
+            yield chunk
+
+    def read(self):
+        """
+        書き出した記録を全て読む
+        コピーしないようファイルごとのメモリマップを返す(1つの配列が必要ならnumpy.concatenateする)
+
+        Returns
+        -----
+        chunks : list of numpy.memmap
+            THROW_EVENT_DTYPEの構造化配列
+        """
+        return list(self.iter_chunks())
+
+    def __len__(self):
+        return sum(len(chunk) for chunk in self.iter_chunks()) + self._n_buffered
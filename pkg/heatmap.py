@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+import math
+
+import numpy as np
+
+from pkg.board import Board
+from pkg.throw import Throw
+
+#計算済みのヒートマップ
+#{(sigma, bull_type, resolution, oversample) : HeatMap}
+_heatmaps = {}
+
+
+def get_heatmap(sigma, bull_type="fat", resolution=1.0, oversample=4):
+    """
+    ヒートマップを取得(sigma, bull_typeごとにキャッシュする)
+
+    Parameters
+    -----
+    sigma : float
+        命中精度(標準偏差)
+    bull_type : str (sepa or fat)
+        bullの種類
+    resolution : float
+        格子の間隔(mm)
+    oversample : int
+        ボードを描く時の1マスあたりの分割数(縦横それぞれ)
+
+    Returns
+    -----
+    heatmap : HeatMap
+        ヒートマップ
+    """
+    key = (sigma, bull_type, resolution, oversample)
+    if key not in _heatmaps:
+        _heatmaps[key] = HeatMap(sigma, bull_type, resolution, oversample)
+    return _heatmaps[key]
+
+
+class HeatMap(object):
+    """
+    狙う場所ごとの期待得点・命中確率のマップ
+    ボードの得点を直交格子に描き、Throwの誤差分布とFFTで畳み込む
+
+    Attributes
+    -----
+    sigma : float
+        命中精度(標準偏差)
+    resolution : float
+        格子の間隔(mm)
+    x : numpy.ndarray of float
+        格子のx座標(theta=0の方向, 20の方向)
+    y : numpy.ndarray of float
+        格子のy座標
+    score : numpy.ndarray of float
+        (len(x), len(y))のマスごとの平均ポイント
+
+    Notes
+    -----
+    マップは[i, j]が狙う座標(x[i], y[j])に対応する
+    """
+
+    def __init__(self, sigma, bull_type="fat", resolution=1.0, oversample=4):
+        """
+        Parameters
+        -----
+        sigma : float
+            命中精度(標準偏差)
+        bull_type : str (sepa or fat)
+            bullの種類
+        resolution : float
+            格子の間隔(mm)
+        oversample : int
+            ボードを描く時の1マスあたりの分割数(縦横それぞれ)
+        """
+        self.sigma = sigma
+        self.resolution = resolution
+        self._oversample = oversample
+        self._board = Board(bull_type)
+
+        #ボード全体を含む格子
+        n_half = int(math.ceil(self._board.total / resolution)) + 1
+        self.x = np.arange(-n_half, n_half+1) * resolution
+        self.y = self.x.copy()
+        #マスを分割した細かい格子でボードを描く
+        sub = (np.arange(oversample) + 0.5) / oversample - 0.5
+        fine = (self.x[:, None] + sub[None, :]*resolution).ravel()
+        xx, yy = np.meshgrid(fine, fine, indexing="ij")
+        theta = np.arctan2(yy, xx)
+        theta[theta < 0] += 2*np.pi
+        fine_score, self._fine_place_code, self._fine_base_point = self._board.calc_throw_results(
+            np.sqrt(xx**2+yy**2), theta)
+        self.score = self._block_mean(fine_score)
+
+        self._kernel = self._calc_kernel()
+        #畳み込みのFFTサイズ
+        self._fft_shape = tuple(n + m - 1 for n, m in zip(self.score.shape, self._kernel.shape))
+        self._kernel_fft = np.fft.rfft2(self._kernel[::-1, ::-1], self._fft_shape)
+
+        #計算済みのマップ
+        self._expected_score = None
+        self._hit_probabilities = {}
+
+    def _calc_kernel(self):
+        """
+        誤差の分布を格子に描く
+        誤差距離は|N(0, sigma)|, 誤差角度はThrowの候補から一様
+
+        Returns
+        -----
+        kernel : numpy.ndarray of float
+            中心からのずれごとの確率
+        """
+        #5sigmaより外は無視する
+        n_half = int(math.ceil(5*self.sigma / self.resolution))
+        edges = (np.arange(-n_half, n_half+2) - 0.5) * self.resolution
+
+        #誤差距離を細かい区間に分けて、区間の確率を中点に置く
+        r_edges = np.linspace(0, (n_half+0.5)*self.resolution, 4*(2*n_half+1)+1)
+        r_cdf = np.array([math.erf(r / (self.sigma*math.sqrt(2))) for r in r_edges])
+        r_mid = (r_edges[1:] + r_edges[:-1]) / 2
+        r_mass = np.diff(r_cdf)
+
+        theta_d = Throw._theta_d_candidates
+        dx = np.outer(r_mid, np.cos(theta_d)).ravel()
+        dy = np.outer(r_mid, np.sin(theta_d)).ravel()
+        weights = np.repeat(r_mass / len(theta_d), len(theta_d))
+        kernel, _, _ = np.histogram2d(dx, dy, bins=[edges, edges], weights=weights)
+        return kernel
+
+    def _block_mean(self, fine_values):
+        """
+        細かい格子の値をマスごとに平均する
+
+        Parameters
+        -----
+        fine_values : numpy.ndarray
+            細かい格子の値
+
+        Returns
+        -----
+        values : numpy.ndarray of float
+            (len(x), len(y))のマスごとの平均
+        """
+        n, k = len(self.x), self._oversample
+        return fine_values.reshape(n, k, n, k).mean(axis=(1, 3))
+
+    def _convolve(self, values):
+        """
+        格子上の値を誤差の分布で畳み込む(狙った場合の期待値)
+
+        Parameters
+        -----
+        values : numpy.ndarray of float
+            当たった座標ごとの値
+
+        Returns
+        -----
+        expected : numpy.ndarray of float
+            狙った座標ごとの期待値
+        """
+        full = np.fft.irfft2(np.fft.rfft2(values, self._fft_shape) * self._kernel_fft, self._fft_shape)
+        offset = [(m - 1) // 2 for m in self._kernel.shape]
+        return full[offset[0]:offset[0]+values.shape[0], offset[1]:offset[1]+values.shape[1]]
+
+    def expected_score(self):
+        """
+        狙う座標ごとの期待得点
+
+        Returns
+        -----
+        expected_score : numpy.ndarray of float
+            (len(x), len(y))の期待得点
+        """
+        if self._expected_score is None:
+            self._expected_score = self._convolve(self.score)
+        return self._expected_score
+
+    def hit_probability(self, place, point=None):
+        """
+        狙う座標ごとの指定した場所に当たる確率
+
+        Parameters
+        -----
+        place : str
+            当たる場所(Board.place_names)
+        point : int, optional
+            当たる場所の基礎ポイント(1~20, 25)。省略時は全ての基礎ポイント
+
+        Returns
+        -----
+        probability : numpy.ndarray of float
+            (len(x), len(y))の命中確率
+        """
+        key = (place, point)
+        if key not in self._hit_probabilities and place == "out_board":
+            #格子の外に外れる分も含めるため、ボードのどこかに当たる確率の残りにする
+            on_board = sum(self.hit_probability(name) for name in self._board.place_names if name != "out_board")
+            self._hit_probabilities[key] = np.clip(1 - on_board, 0, 1)
+        if key not in self._hit_probabilities:
+            hit_flags = self._fine_place_code == self._board.place_names.index(place)
+            if point is not None:
+                hit_flags &= self._fine_base_point == point
+            self._hit_probabilities[key] = np.clip(self._convolve(self._block_mean(hit_flags)), 0, 1)
+        return self._hit_probabilities[key]
+
+    def best_aim(self, values):
+        """
+        マップの値が最大になる狙う座標
+
+        Parameters
+        -----
+        values : numpy.ndarray of float
+            (len(x), len(y))のマップ
+
+        Returns
+        -----
+        r : float
+            狙う座標の距離部分
+        theta : float
+            狙う座標の角度部分
+        value : float
+            その座標のマップの値
+        """
+        i, j = np.unravel_index(np.argmax(values), values.shape)
+        theta = np.arctan2(self.y[j], self.x[i])
+        if theta < 0:
+            theta += 2*np.pi
+        return float(np.hypot(self.x[i], self.y[j])), float(theta), float(values[i, j])
+
+    def lookup(self, values, r, theta):
+        """
+        狙う座標のマップの値(格子点から双線形補間)
+
+        Parameters
+        -----
+        values : numpy.ndarray of float
+            (len(x), len(y))のマップ
+        r : float or numpy.ndarray of float
+            狙う座標の距離部分
+        theta : float or numpy.ndarray of float
+            狙う座標の角度部分
+
+        Returns
+        -----
+        value : float or numpy.ndarray of float
+            マップの値
+        """
+        fi = np.clip((r*np.cos(theta) - self.x[0]) / self.resolution, 0, len(self.x)-1)
+        fj = np.clip((r*np.sin(theta) - self.y[0]) / self.resolution, 0, len(self.y)-1)
+        i = np.minimum(np.floor(fi).astype(int), len(self.x)-2)
+        j = np.minimum(np.floor(fj).astype(int), len(self.y)-2)
+        di, dj = fi - i, fj - j
+        return ((1-di)*(1-dj)*values[i, j] + di*(1-dj)*values[i+1, j]
+                + (1-di)*dj*values[i, j+1] + di*dj*values[i+1, j+1])
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+import sys
+import time
+import random
+import inspect
+import cProfile
+import pstats
+import functools
+import contextlib
+import tracemalloc
+
+import numpy as np
+
+#計測するかどうか(無効な時はフラグの確認だけ)
+_enabled = False
+#関数ごとの実行時間
+#{name : _TimerStat}
+_timer_stats = {}
+#キャッシュごとのヒット数とミス数
+#{name : [hits, misses]}
+_cache_stats = {}
+#パーセンタイル計算のために残す実行時間の数
+MAX_SAMPLES = 100000
+
+
+class _TimerStat(object):
+    """
+    実行時間の集計
+    実行時間はMAX_SAMPLES個までリザーバーサンプリングで残す
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = []
+
+    def add(self, elapsed):
+        self.count += 1
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(elapsed)
+        else:
+            idx = random.randrange(self.count)
+            if idx < MAX_SAMPLES:
+                self.samples[idx] = elapsed
+
+
+def enable():
+    """
+    計測を有効にする
+    """
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """
+    計測を無効にする
+    """
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    """
+    計測結果を消す
+    """
+    _timer_stats.clear()
+    _cache_stats.clear()
+
+
+def record_time(name, elapsed):
+    """
+    実行時間を記録する
+
+    Parameters
+    -----
+    name : str
+        計測名
+    elapsed : float
+        実行時間(秒)
+    """
+    if name not in _timer_stats:
+        _timer_stats[name] = _TimerStat()
+    _timer_stats[name].add(elapsed)
+
+
+def count_cache(name, hit):
+    """
+    キャッシュのヒット・ミスを数える(無効な時は何もしない)
+
+    Parameters
+    -----
+    name : str
+        キャッシュ名
+    hit : bool
+        ヒットしたかどうか
+    """
+    if not _enabled:
+        return
+    if name not in _cache_stats:
+        _cache_stats[name] = [0, 0]
+    _cache_stats[name][0 if hit else 1] += 1
+
+
+def timed(name):
+    """
+    実行時間を計測するデコレータ
+    ジェネレータ関数の場合は1要素を返すまでの時間を計測する
+
+    Parameters
+    -----
+    name : str
+        計測名
+    """
+    def decorator(func):
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                generator = func(*args, **kwargs)
+                while True:
+                    start = time.perf_counter() if _enabled else None
+                    try:
+                        item = next(generator)
+                    except StopIteration:
+                        return
+                    if start is not None:
+                        record_time(name, time.perf_counter() - start)
+                    yield item
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not _enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    record_time(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def report():
+    """
+    計測結果を取得
+
+    Returns
+    -----
+    result : dict
+        timers : {name : {count, total, mean, p50, p90, p99, max}}(秒)
+        caches : {name : {hits, misses, hit_rate}}
+    """
+    timers = {}
+    for name, stat in _timer_stats.items():
+        p50, p90, p99 = np.percentile(stat.samples, [50, 90, 99])
+        timers[name] = dict(count=stat.count, total=stat.total, mean=stat.total/stat.count
+                            , p50=p50, p90=p90, p99=p99, max=stat.max)
+    caches = {}
+    for name, (hits, misses) in _cache_stats.items():
+        caches[name] = dict(hits=hits, misses=misses, hit_rate=hits/(hits+misses))
+    return dict(timers=timers, caches=caches)
+
+
+def dump_report(file=sys.stdout):
+    """
+    計測結果を表示
+
+    Parameters
+    -----
+    file : file object
+        出力先
+    """
+    result = report()
+    file.write("{:<28} {:>10} {:>12} {:>10} {:>10} {:>10} {:>10}\n".format(
+        "timer", "count", "total[s]", "mean[us]", "p50[us]", "p90[us]", "p99[us]"))
+    for name, stat in sorted(result["timers"].items(), key=lambda item: -item[1]["total"]):
+        file.write("{:<28} {:>10} {:>12.4f} {:>10.1f} {:>10.1f} {:>10.1f} {:>10.1f}\n".format(
+            name, stat["count"], stat["total"], stat["mean"]*1e6, stat["p50"]*1e6, stat["p90"]*1e6, stat["p99"]*1e6))
+    file.write("{:<28} {:>10} {:>12} {:>10}\n".format("cache", "hits", "misses", "hit_rate"))
+    for name, stat in sorted(result["caches"].items()):
+        file.write("{:<28} {:>10} {:>12} {:>10.3f}\n".format(name, stat["hits"], stat["misses"], stat["hit_rate"]))
+
+
+class Session(object):
+    """
+    1回の実行の計測結果
+
+    Attributes
+    -----
+    report : dict
+        計測結果(report()と同じ形式)
+    profile_stats : pstats.Stats or None
+        cProfileの結果
+    memory_snapshot : tracemalloc.Snapshot or None
+        tracemallocの結果
+    """
+
+    def __init__(self):
+        self.report = None
+        self.profile_stats = None
+        self.memory_snapshot = None
+
+    def print_profile(self, n_lines=20, sort_key="cumulative", file=sys.stdout):
+        """
+        cProfileの結果を表示
+        """
+        self.profile_stats.stream = file
+        self.profile_stats.sort_stats(sort_key).print_stats(n_lines)
+
+    def print_memory(self, n_lines=20, file=sys.stdout):
+        """
+        メモリ確保の多い行を表示
+        """
+        for stat in self.memory_snapshot.statistics("lineno")[:n_lines]:
+            file.write("{}\n".format(stat))
+
+
+@contextlib.contextmanager
+def session(profile=False, memory=False):
+    """
+    1回の実行を計測するコンテキストマネージャ
+    計測を有効にし、終了時に元に戻す
+
+    Parameters
+    -----
+    profile : bool
+        cProfileで計測するかどうか
+    memory : bool
+        tracemallocで計測するかどうか
+
+    Examples
+    -----
+    >>> with instrument.session(profile=True) as s:
+    ...     simulator.run(1000)
+    >>> s.print_profile()
+    """
+    result = Session()
+    was_enabled = _enabled
+    reset()
+    enable()
+    profiler = cProfile.Profile() if profile else None
+    if memory:
+        tracemalloc.start()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield result
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            result.profile_stats = pstats.Stats(profiler)
+        if memory:
+            result.memory_snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+        result.report = report()
+        if not was_enabled:
+            disable()
@@ -1,22 +1,168 @@
 #!/user/bin/env python3
-from logging import getLogger, FileHandler, Formatter
+import time
+import atexit
+import threading
+from queue import SimpleQueue
+from logging import getLogger, FileHandler, Formatter, Filter
 from logging import DEBUG, INFO, WARNING, ERROR, CRITICAL
+from logging.handlers import QueueHandler, QueueListener
 
-def init_logger(log_file_name="temp.log"):
+#init_loggerで追加したハンドラー
+_handlers = []
+#非同期モードの書き込みスレッド
+_listener = None
+
+
+class BatchFileHandler(FileHandler):
+    """
+    batch_size件ごとにまとめてディスクに書き出すFileHandler
+    """
+
+    def __init__(self, filename, mode="a", batch_size=100):
+        """
+        Parameters
+        -----
+        filename : str
+            ログファイル名
+        mode : str
+            ファイルを開くモード
+        batch_size : int
+            まとめて書き出す件数
+        """
+        FileHandler.__init__(self, filename, mode)
+        self.batch_size = batch_size
+        self._n_pending = 0
+
+    def flush(self):
+        #1件ごとに呼ばれるので、batch_size件たまった時だけ書き出す
+        self._n_pending += 1
+        if self._n_pending >= self.batch_size:
+            self._n_pending = 0
+            FileHandler.flush(self)
+
+    def close(self):
+        FileHandler.flush(self)
+        FileHandler.close(self)
+
+
+class SamplingFilter(Filter):
+    """
+    大量に出るログを間引くフィルター
+    max_level以下のログだけを対象にし、それより重要なログは必ず通す
+    """
+
+    def __init__(self, sample_rate=1.0, max_records_per_sec=None, max_level=INFO):
+        """
+        Parameters
+        -----
+        sample_rate : float
+            残すログの割合(0~1, 一定間隔で残す)
+        max_records_per_sec : int, optional
+            1秒あたりに残すログの上限
+        max_level : int
+            間引く対象にするログレベルの上限
+        """
+        Filter.__init__(self)
+        self.sample_rate = sample_rate
+        self.max_records_per_sec = max_records_per_sec
+        self.max_level = max_level
+        self._sample_acc = 0.0
+        self._second = None
+        self._n_in_second = 0
+        #複数のスレッドからログが出るので、カウンターはロックして更新する
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+        with self._lock:
+            #割合で間引く
+            self._sample_acc += self.sample_rate
+            if self._sample_acc < 1:
+                return False
+            self._sample_acc -= 1
+            #1秒あたりの件数で制限する
+            if self.max_records_per_sec is not None:
+                second = int(time.monotonic())
+                if second != self._second:
+                    self._second = second
+                    self._n_in_second = 0
+                if self._n_in_second >= self.max_records_per_sec:
+                    return False
+                self._n_in_second += 1
+        return True
+
+
+def init_logger(log_file_name="temp.log", use_queue=False, level=DEBUG, batch_size=100
+                , sample_rate=1.0, max_records_per_sec=None):
+    """
+    dartsロガーの初期化
+    何度呼んでも、前回追加したハンドラーは置き換えられる
+
+    Parameters
+    -----
+    log_file_name : str
+        ログファイル名
+    use_queue : bool
+        キューと書き込みスレッドを使って非同期に書き出すかどうか
+    level : int
+        ログレベル
+    batch_size : int
+        非同期モードでまとめて書き出す件数
+    sample_rate : float
+        INFO以下のログを残す割合
+    max_records_per_sec : int, optional
+        INFO以下のログを1秒あたりに残す上限
+    """
+    global _listener
     logger = getLogger("darts")
-    
+    close_logger()
+
     #ロガーのレベル
-    logger.setLevel(DEBUG)
+    logger.setLevel(level)
     #ログファイル名
-    file_handler = FileHandler(log_file_name, "a")
+    if use_queue:
+        file_handler = BatchFileHandler(log_file_name, "a", batch_size=batch_size)
+    else:
+        file_handler = FileHandler(log_file_name, "a")
     #ファイルハンドラーの出力ログレベル
-    file_handler.setLevel(DEBUG)
+    file_handler.setLevel(level)
     #ログのフォーマット
     logger_format = Formatter("%(asctime)s [%(levelname)-8s] [%(process)d] %(module)-18s %(funcName)-10s %(lineno)4s: %(message)s")
     file_handler.setFormatter(logger_format)
+
+    if use_queue:
+        #書き込みはバックグラウンドのスレッドで行う
+        #メッセージ(msg % args)はログを出したスレッドで確定させるので、後から引数を書き換えても変わらない
+        queue = SimpleQueue()
+        handler = QueueHandler(queue)
+        _listener = QueueListener(queue, file_handler, respect_handler_level=True)
+        _listener.start()
+    else:
+        handler = file_handler
+    #ログを間引く
+    if sample_rate < 1 or max_records_per_sec is not None:
+        handler.addFilter(SamplingFilter(sample_rate, max_records_per_sec))
     #ハンドラーの追加
-    logger.addHandler(file_handler)
-    
-    
-    
-    
\ No newline at end of file
+    logger.addHandler(handler)
+    _handlers.append(handler)
+    if file_handler is not handler:
+        _handlers.append(file_handler)
+
+
+def close_logger():
+    """
+    init_loggerで追加したハンドラーを外して、残っているログを書き出す
+    """
+    global _listener
+    logger = getLogger("darts")
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    for handler in _handlers:
+        logger.removeHandler(handler)
+        handler.close()
+    _handlers.clear()
+
+
+atexit.register(close_logger)
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
-from pkg import strategy
+from pkg import instrument
+from pkg import strategy as pkg_strategy
 from pkg.board import Board
 from pkg.throw import Throw
 
@@ -30,7 +31,7 @@ class Player(Throw, Board):
     pkg.throw : トスクラス
     """
     
-    def __init__(self, score, sigma, game_type, logger=None, **game_params):
+    def __init__(self, score, sigma, game_type, logger=None, seed=None, strategy=None, **game_params):
         """
         Parameters
         -----
@@ -44,9 +45,13 @@ class Player(Throw, Board):
             戦略クラスのパラメーター
         logger : logger
             ロガー
+        seed : int or numpy.random.SeedSequence, optional
+            投げる時の乱数のシード
+        strategy : ZeroOne, optional
+            戦略クラス(省略時はgame_paramsから作成する, 複数のPlayerで使い回せる)
         """
         #親クラスの初期化
-        Throw.__init__(self, sigma)
+        Throw.__init__(self, sigma, seed)
         
         #==変数の初期化
         #スコア
@@ -56,8 +61,8 @@ class Player(Throw, Board):
         #Strategyクラス
         if game_type == "01":
             #TODO : strategy_parameter不正の処理
-            self._strategy = strategy.zeroone.ZeroOne(**game_params)
-            Board.__init__(self, game_params["bull_type"])
+            self._strategy = pkg_strategy.zeroone.ZeroOne(**game_params) if strategy is None else strategy
+            Board.__init__(self, game_params.get("bull_type", self._strategy.bull_type))
         else :
             raise ValueError("game_type must be 01 only.")
         #狙う場所
@@ -71,6 +76,7 @@ class Player(Throw, Board):
     def score(self, score):
         self._score = score
 
+    @instrument.timed("Player.calc_aims")
     def calc_aims(self, hit_point_list=[]):
         """
         狙う場所を計算する
@@ -86,6 +92,7 @@ class Player(Throw, Board):
         self._aim_points[len(hit_point_list):] = self._strategy.get_aims(self._score, hit_point_list)
         
         
+    @instrument.timed("Player.play")
     def play(self):
         """
         1ラウンドを行う関数。
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+import math
+
+import numpy as np
+
+from pkg.board import Board
+from pkg.throw import Throw
+
+#当たる場所の候補(場所, 基礎ポイント)
+OUTCOMES = ([("inner_bull", 25), ("outer_bull", 25)]
+            + [(place, point) for place in ["single", "triple", "double"] for point in range(1, 21)]
+            + [("out_board", 0)])
+
+#計算済みの狙う場所ごとの確率
+#{(sigma, bull_type) : TargetProbabilities}
+_target_probabilities = {}
+
+
+def _get_outcome_index():
+    """
+    (場所のコード, 基礎ポイント)からOUTCOMESのindexへの変換表
+    """
+    outcome_index = np.zeros((len(Board.place_names), 26), dtype=np.int64)
+    for idx, (place, point) in enumerate(OUTCOMES):
+        outcome_index[Board.place_names.index(place), point] = idx
+    return outcome_index
+
+
+_outcome_index = _get_outcome_index()
+#配列に使えるmath.erf
+_erf = np.frompyfunc(math.erf, 1, 1)
+
+
+def calc_hit_probabilities(r, theta, sigma, bull_type="fat", chunk_size=256):
+    """
+    狙う座標ごとに、当たる場所(OUTCOMES)の確率を計算する
+    Throw.aimと同じ誤差(距離は半正規分布, 角度は_theta_d_candidatesから一様)で、
+    誤差角度ごとの直線がリングとピザの境界を横切る距離で区切り、区間ごとに半正規分布の確率を足す
+
+    Parameters
+    -----
+    r : float or numpy.ndarray of float
+        狙う座標の距離部分
+    theta : float or numpy.ndarray of float
+        狙う座標の角度部分
+    sigma : float
+        命中精度(標準偏差)
+    bull_type : str (sepa or fat)
+        bullの種類
+    chunk_size : int
+        まとめて計算する狙う座標の数(メモリの使用量を抑える)
+
+    Returns
+    -----
+    probabilities : numpy.ndarray of float
+        (len(r), len(OUTCOMES))の確率
+    """
+    if sigma <= 0:
+        raise ValueError("sigma must be positive")
+    board = Board(bull_type)
+    r, theta = np.broadcast_arrays(np.atleast_1d(np.asarray(r, dtype=float)), np.atleast_1d(np.asarray(theta, dtype=float)))
+    probabilities = np.zeros((len(r), len(OUTCOMES)))
+    for start in range(0, len(r), chunk_size):
+        probabilities[start:start+chunk_size] = _calc_chunk(board, r[start:start+chunk_size]
+                                                            , theta[start:start+chunk_size], sigma)
+    return probabilities
+
+
+def _calc_chunk(board, r, theta, sigma):
+    #狙う座標と誤差の向き(直交座標)
+    aim_x, aim_y = r*np.cos(theta), r*np.sin(theta)
+    directions = Throw._theta_d_candidates
+    dir_x, dir_y = np.cos(directions), np.sin(directions)
+    n_aims, n_directions = len(r), len(directions)
+
+    #リング(円)を横切る距離 : |a + d*u|**2 = R**2
+    b = aim_x[:, None]*dir_x[None, :] + aim_y[:, None]*dir_y[None, :]
+    c = (r**2)[:, None, None] - (board._ring_edges**2)[None, None, :]
+    disc = b[:, :, None]**2 - c
+    root = np.sqrt(np.where(disc > 0, disc, np.nan))
+    ring_crossings = np.concatenate([-b[:, :, None] - root, -b[:, :, None] + root], axis=2)
+
+    #ピザの境界(原点を通る直線)を横切る距離 : (a + d*u)・n = 0
+    #境界は反対側の境界と同じ直線になる
+    lines = board._segment_edges[:len(board._segment_edges)//2]
+    normal_x, normal_y = -np.sin(lines), np.cos(lines)
+    aim_dot = aim_x[:, None]*normal_x[None, :] + aim_y[:, None]*normal_y[None, :]
+    dir_dot = dir_x[:, None]*normal_x[None, :] + dir_y[:, None]*normal_y[None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        line_crossings = -aim_dot[:, None, :] / dir_dot[None, :, :]
+
+    crossings = np.concatenate([ring_crossings, line_crossings], axis=2)
+    crossings = np.where(np.isfinite(crossings) & (crossings > 0), crossings, np.inf)
+    crossings.sort(axis=2)
+    edges = np.concatenate([np.zeros((n_aims, n_directions, 1)), crossings
+                            , np.full((n_aims, n_directions, 1), np.inf)], axis=2)
+    lower, upper = edges[:, :, :-1], edges[:, :, 1:]
+
+    #区間ごとの確率(半正規分布の累積分布関数の差)
+    finite = np.isfinite(edges)
+    cdf = np.ones(edges.shape)
+    cdf[finite] = _erf(edges[finite] / (sigma*math.sqrt(2))).astype(float)
+    weights = (cdf[:, :, 1:] - cdf[:, :, :-1]) / n_directions
+    #区間の中の点で当たる場所を判定する
+    with np.errstate(invalid="ignore"):
+        middle = np.where(np.isfinite(upper), (lower + upper) / 2, lower + 1)
+    middle = np.where(np.isfinite(middle), middle, 0)
+    hit_x = aim_x[:, None, None] + middle*dir_x[None, :, None]
+    hit_y = aim_y[:, None, None] + middle*dir_y[None, :, None]
+    hit_theta = np.arctan2(hit_y, hit_x)
+    hit_theta[hit_theta < 0] += 2*np.pi
+    _, place_code, base_point = board.calc_throw_results(np.sqrt(hit_x**2 + hit_y**2), hit_theta)
+    outcomes = _outcome_index[place_code, base_point]
+
+    rows = np.broadcast_to(np.arange(n_aims)[:, None, None], outcomes.shape)
+    return np.bincount((rows*len(OUTCOMES) + outcomes).ravel(), weights=weights.ravel()
+                       , minlength=n_aims*len(OUTCOMES)).reshape(n_aims, len(OUTCOMES))
+
+
+def get_target_probabilities(sigma, bull_type="fat"):
+    """
+    狙う場所ごとの当たる場所の確率を取得(sigma, bull_typeごとにキャッシュする)
+
+    Parameters
+    -----
+    sigma : float
+        命中精度(標準偏差)
+    bull_type : str (sepa or fat)
+        bullの種類
+
+    Returns
+    -----
+    target_probabilities : TargetProbabilities
+        狙う場所ごとの確率
+    """
+    key = (sigma, bull_type)
+    if key not in _target_probabilities:
+        _target_probabilities[key] = TargetProbabilities(sigma, bull_type)
+    return _target_probabilities[key]
+
+
+class TargetProbabilities(object):
+    """
+    Board.get_aim_coordinateで狙える全ての場所の、当たる場所(OUTCOMES)の確率
+
+    Attributes
+    -----
+    sigma : float
+        命中精度(標準偏差)
+    bull_type : str (sepa or fat)
+        bullの種類
+    targets : list of (mark, point)
+        狙う場所(ZeroOne.mark_namesの場所, 基礎ポイント)
+    matrix : numpy.ndarray of float
+        (len(targets), len(OUTCOMES))の確率
+    outcome_points : numpy.ndarray of int
+        当たる場所ごとのポイント
+    expected_scores : numpy.ndarray of float
+        狙う場所ごとの期待得点
+    """
+
+    def __init__(self, sigma, bull_type="fat"):
+        """
+        Parameters
+        -----
+        sigma : float
+            命中精度(標準偏差)
+        bull_type : str (sepa or fat)
+            bullの種類
+        """
+        self.sigma = sigma
+        self.bull_type = bull_type
+        board = Board(bull_type)
+
+        self.targets = [("inner_bull", 25), ("outer_bull", 25)]
+        for mark in ["inner_single", "outer_single", "triple", "double"]:
+            self.targets += [(mark, point) for point in range(1, 21)]
+        self._target_index = {target: idx for idx, target in enumerate(self.targets)}
+        coordinates = np.array([board.get_aim_coordinate(point, mark) for mark, point in self.targets])
+        self.matrix = calc_hit_probabilities(coordinates[:, 0], coordinates[:, 1], sigma, bull_type)
+        #読み取り専用にして使い回す
+        self.matrix.flags.writeable = False
+
+        place_code = np.array([board.place_names.index(place) for place, _ in OUTCOMES])
+        base_point = np.array([point for _, point in OUTCOMES])
+        self.outcome_points = board._place_coef[place_code]*base_point + board._place_bull_point[place_code]
+        self.expected_scores = self.matrix @ self.outcome_points
+
+    def index(self, mark, point):
+        """
+        狙う場所のindex
+
+        Parameters
+        -----
+        mark : str
+            狙う場所(ZeroOne.mark_names)
+        point : int
+            基礎ポイント(1~20, 25)
+        """
+        return self._target_index[(mark, point)]
+
+    def get(self, mark, point):
+        """
+        狙う場所の当たる場所の確率
+
+        Returns
+        -----
+        probabilities : numpy.ndarray of float
+            当たる場所(OUTCOMES)ごとの確率
+        """
+        return self.matrix[self.index(mark, point)]
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+import numpy as np
+
+from pkg.board import Board
+
+#上がり方の種類
+OUT_TYPES = ["everything", "master", "double"]
+
+
+class ZeroOneRules(object):
+    """
+    01のBURSTと上がりの判定
+    1投ずつ判定する(judge, apply_throw)か、多数のレッグをまとめて判定する(judge_many, apply_throws)
+
+    BURST : 残りポイントが上がれる下限(min_left)未満になる or 上がりに使えない場所で0点になる
+    上がり : 上がりに使える場所(finish_places)で0点になる
+
+    Attributes
+    -----
+    bull_type : str (sepa or fat)
+        bullの種類
+    out_type : str (everything, master, double)
+        上がり方の種類
+    min_left : int
+        上がれる残りポイントの下限
+    finish_places : tuple of str
+        上がりに使える場所(Board.place_names)
+    finish_place_flags : numpy.ndarray of bool
+        場所のコードごとの上がりに使えるかどうか
+    checkout_flags : numpy.ndarray of bool
+        1本で上がれる残りポイント(indexが残りポイント, 0~60)
+
+    Examples
+    -----
+    >>> rules = ZeroOneRules("fat", "double")
+    >>> rules.apply_throw(40, 0, 40, "double")
+    (0, 40, 'finish')
+    >>> left, round_point, burst, finish = rules.apply_throws(score, round_point, point, place_code)
+    """
+
+    def __init__(self, bull_type="fat", out_type="everything"):
+        """
+        Parameters
+        -----
+        bull_type : str (sepa or fat)
+            bullの種類
+        out_type : str (everything, master, double)
+            上がり方の種類
+        """
+        if out_type not in OUT_TYPES:
+            raise ValueError("out_type must be everything, master or double")
+        self.bull_type = bull_type
+        self.out_type = out_type
+
+        board = Board(bull_type)
+        self.min_left = 2 if out_type in ["double", "master"] else 1
+        if out_type == "double":
+            self.finish_places = ("inner_bull", "double")
+        elif out_type == "master":
+            self.finish_places = ("inner_bull", "outer_bull", "double", "triple")
+        else:
+            self.finish_places = tuple(board.place_names)
+        self.finish_place_flags = np.isin(board.place_names, self.finish_places)
+
+        #1本で取れるポイントのうち上がりに使えるもの
+        place_code = np.array([0, 1] + [code for code in [2, 3, 4] for _ in range(20)])
+        base_point = np.array([25, 25] + list(range(1, 21))*3)
+        points = board._place_coef[place_code] * base_point + board._place_bull_point[place_code]
+        self.checkout_flags = np.zeros(61, dtype=bool)
+        self.checkout_flags[points[self.finish_place_flags[place_code]]] = True
+
+    def judge(self, left, mark):
+        """
+        1投の結果を判定する
+
+        Parameters
+        -----
+        left : int
+            投げた後の残りポイント(BURSTの場合は負になる)
+        mark : str
+            当たった場所(Board.place_names)
+
+        Returns
+        -----
+        result : str or None
+            "burst", "finish", どちらでもない場合はNone
+        """
+        if left == 0:
+            return "finish" if mark in self.finish_places else "burst"
+        if left < self.min_left:
+            return "burst"
+        return None
+
+    def judge_many(self, left, place_code):
+        """
+        投げた結果をまとめて判定する(left, place_codeはブロードキャストする)
+
+        Parameters
+        -----
+        left : numpy.ndarray of int
+            投げた後の残りポイント
+        place_code : numpy.ndarray of int
+            当たった場所のコード(Board.place_namesのindex)
+
+        Returns
+        -----
+        burst : numpy.ndarray of bool
+            BURSTしたかどうか
+        finish : numpy.ndarray of bool
+            上がったかどうか
+        """
+        left = np.asarray(left)
+        finish_place = self.finish_place_flags[place_code]
+        zero = left == 0
+        finish = zero & finish_place
+        burst = ((left < self.min_left) & ~zero) | (zero & ~finish_place)
+        return burst, finish
+
+    def is_checkout(self, left):
+        """
+        1本で上がれる残りポイントかどうか(left, 配列でもよい)
+        """
+        left = np.asarray(left)
+        return (0 <= left) & (left <= 60) & self.checkout_flags[np.clip(left, 0, 60)]
+
+    def apply_throw(self, score, round_point, point, mark):
+        """
+        1投を反映する
+
+        Parameters
+        -----
+        score : int
+            ラウンド開始時の残りポイント
+        round_point : int
+            ラウンドでここまでに取ったポイント
+        point : int
+            取ったポイント
+        mark : str
+            当たった場所(Board.place_names)
+
+        Returns
+        -----
+        left : int
+            投げた後の残りポイント(BURSTの場合はラウンド開始時の残りポイント)
+        round_point : int
+            ラウンドで取ったポイント(BURSTの場合は0)
+        result : str or None
+            "burst", "finish", どちらでもない場合はNone
+        """
+        round_point += point
+        result = self.judge(score - round_point, mark)
+        if result == "burst":
+            round_point = 0
+        return score - round_point, round_point, result
+
+    def apply_throws(self, score, round_point, point, place_code):
+        """
+        多数のレッグの1投をまとめて反映する
+
+        Parameters
+        -----
+        score : numpy.ndarray of int
+            ラウンド開始時の残りポイント
+        round_point : numpy.ndarray of int
+            ラウンドでここまでに取ったポイント
+        point : numpy.ndarray of int
+            取ったポイント
+        place_code : numpy.ndarray of int
+            当たった場所のコード(Board.place_namesのindex)
+
+        Returns
+        -----
+        left : numpy.ndarray of int
+            投げた後の残りポイント(BURSTの場合はラウンド開始時の残りポイント)
+        round_point : numpy.ndarray of int
+            ラウンドで取ったポイント(BURSTの場合は0, 新しい配列)
+        burst : numpy.ndarray of bool
+            BURSTしたかどうか
+        finish : numpy.ndarray of bool
+            上がったかどうか
+        """
+        round_point = np.asarray(round_point) + point
+        burst, finish = self.judge_many(score - round_point, place_code)
+        round_point = np.where(burst, 0, round_point)
+        return score - round_point, round_point, burst, finish
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+import json
+import asyncio
+import itertools
+import threading
+from logging import getLogger
+
+from pkg.player import Player
+from pkg.stats import ZeroOneStats
+from pkg.strategy.zeroone import ZeroOne
+
+logger = getLogger("darts")
+
+#プロセスごとの戦略クラス
+#{(bull_type, out_type, use_policy) : ZeroOne}
+_strategies = {}
+#同じ戦略クラスを複数のスレッドで作らない(作成後の狙う場所の計算は同時に行える)
+_strategy_lock = threading.Lock()
+
+#ソケット経由で呼べる操作
+OPERATIONS = ["create_session", "start_leg", "get_aims", "submit_throw", "throw", "get_state", "close_session"]
+
+
+def _get_strategy(bull_type, out_type, use_policy):
+    """
+    戦略クラスを取得(プロセス内で使い回す)
+    """
+    key = (bull_type, out_type, use_policy)
+    with _strategy_lock:
+        if key not in _strategies:
+            _strategies[key] = ZeroOne(bull_type, out_type, use_policy=use_policy)
+        return _strategies[key]
+
+
+def _calc_aims(bull_type, out_type, use_policy, left_point, get):
+    """
+    狙う場所を計算する(executorで実行する)
+    """
+    return _get_strategy(bull_type, out_type, use_policy).get_aims(left_point, get)
+
+
+class _Session(object):
+    """
+    1人のプレイヤーの状態
+    """
+
+    def __init__(self, session_id, score, bull_type, out_type, player):
+        self.session_id = session_id
+        self.score = score
+        self.bull_type = bull_type
+        self.out_type = out_type
+        #シミュレーションで投げる場合のプレイヤー(人が投げる場合はNone)
+        self.player = player
+        #ルールの判定とレッグの集計
+        self.stats = ZeroOneStats(bull_type, out_type)
+        self.stats.start_leg(score)
+        #同じセッションへの操作は順番に行う
+        self.lock = asyncio.Lock()
+
+
+class GameService(object):
+    """
+    多数のレッグを同時に進めるasyncioのサービス
+    戦略の計算はexecutorで行い、状態ごとの狙う場所はキャッシュする
+
+    Attributes
+    -----
+    use_policy : bool
+        戦略クラスの方策テーブルを使うかどうか
+
+    Examples
+    -----
+    >>> service = GameService()
+    >>> session_id = await service.create_session(501, "fat", "double", sigma=20)
+    >>> while not (await service.get_state(session_id))["finished"]:
+    ...     await service.throw(session_id)
+
+    See Also
+    -----
+    serve : ソケットで公開する
+    GameClient : ソケットのクライアント
+    """
+
+    def __init__(self, executor=None, use_policy=False):
+        """
+        Parameters
+        -----
+        executor : concurrent.futures.Executor, optional
+            戦略の計算に使うexecutor(省略時はイベントループのデフォルト)
+        use_policy : bool
+            戦略クラスの方策テーブルを使うかどうか
+        """
+        self.use_policy = use_policy
+        self._executor = executor
+        self._sessions = {}
+        self._session_ids = itertools.count()
+        #状態ごとの狙う場所
+        #{(bull_type, out_type, ラウンド開始時の残りポイント, 投げた数, 取ったポイント) : aims}
+        self._aims_cache = {}
+        #計算中の狙う場所
+        #{key : asyncio.Future}
+        self._pending_aims = {}
+
+    @property
+    def n_sessions(self):
+        return len(self._sessions)
+
+    def _get_session(self, session_id):
+        if session_id not in self._sessions:
+            raise ValueError("unknown session : {}".format(session_id))
+        return self._sessions[session_id]
+
+    async def create_session(self, score=501, bull_type="fat", out_type="everything", sigma=None, seed=None):
+        """
+        セッションを作成する
+
+        Parameters
+        -----
+        score : int
+            レッグ開始時のスコア
+        bull_type : str (sepa or fat)
+            bullの種類
+        out_type : str (everything, master, double)
+            上がり方の種類
+        sigma : float, optional
+            命中精度(省略時は人が投げるセッションで、throwは使えない)
+        seed : int, optional
+            投げる時の乱数のシード
+
+        Returns
+        -----
+        session_id : int
+            セッションのID
+        """
+        player = None
+        if sigma is not None:
+            #戦略クラスの読み込みは重いのでexecutorで行う
+            loop = asyncio.get_running_loop()
+            strategy = await loop.run_in_executor(None, _get_strategy, bull_type, out_type, self.use_policy)
+            player = Player(score, sigma, "01", logger=logger, seed=seed, strategy=strategy)
+        session_id = next(self._session_ids)
+        self._sessions[session_id] = _Session(session_id, score, bull_type, out_type, player)
+        return session_id
+
+    async def start_leg(self, session_id):
+        """
+        新しいレッグを始める
+        """
+        session = self._get_session(session_id)
+        async with session.lock:
+            session.stats.start_leg(session.score)
+        return self._get_state(session)
+
+    async def close_session(self, session_id):
+        """
+        セッションを終了する
+
+        Returns
+        -----
+        summary : dict
+            セッションの集計結果(ZeroOneStats.summary)
+        """
+        session = self._get_session(session_id)
+        del self._sessions[session_id]
+        return session.stats.summary()
+
+    async def get_aims(self, session_id):
+        """
+        現在の状態で狙う場所を返す
+
+        Returns
+        -----
+        aims : list of [point, n_mark, place]
+            狙う場所のリスト
+        """
+        session = self._get_session(session_id)
+        async with session.lock:
+            return await self._get_aims(session)
+
+    async def _get_aims(self, session):
+        stats = session.stats
+        if stats.leg_finished:
+            return []
+        get = stats.round_darts
+        key = (session.bull_type, session.out_type, stats.left, len(get), sum(get))
+        if key not in self._aims_cache:
+            #同じ状態を計算中なら、その結果を待つ
+            if key not in self._pending_aims:
+                #戦略クラスは取ったポイントの合計と数しか使わない
+                get = ([sum(get)] + [0]*(len(get)-1)) if len(get) > 0 else []
+                loop = asyncio.get_running_loop()
+                self._pending_aims[key] = loop.run_in_executor(self._executor, _calc_aims, session.bull_type
+                                                               , session.out_type, self.use_policy, stats.left, get)
+            future = self._pending_aims[key]
+            try:
+                aims = await asyncio.shield(future)
+            finally:
+                if future.done() and self._pending_aims.get(key) is future:
+                    del self._pending_aims[key]
+            self._aims_cache[key] = aims
+        return [list(aim) for aim in self._aims_cache[key]]
+
+    async def submit_throw(self, session_id, point, mark):
+        """
+        投げた結果を追加する(人が投げる場合)
+
+        Parameters
+        -----
+        point : int
+            取ったポイント
+        mark : str
+            当たった場所(Board.place_names)
+
+        Returns
+        -----
+        state : dict
+            get_stateの結果とresult(burst, finish or None)
+        """
+        session = self._get_session(session_id)
+        async with session.lock:
+            result = session.stats.add_throw(point, mark)
+            return dict(self._get_state(session), result=result)
+
+    async def throw(self, session_id):
+        """
+        狙う場所を計算して投げる(シミュレーションの場合)
+
+        Returns
+        -----
+        state : dict
+            get_stateの結果とresult(burst, finish or None), 狙った場所(aim)と当たった場所(point, mark, place, r, theta)
+        """
+        session = self._get_session(session_id)
+        if session.player is None:
+            raise ValueError("session {} has no sigma".format(session_id))
+        async with session.lock:
+            aims = await self._get_aims(session)
+            if len(aims) == 0:
+                raise ValueError("leg is already finished")
+            player = session.player
+            r, theta = player.get_aim_coordinate(aims[0][2], aims[0][1])
+            r, theta = player.aim(r, theta)
+            point, mark, place = player.calc_throw_result(r, theta)
+            result = session.stats.add_throw(point, mark)
+            return dict(self._get_state(session), result=result, aim=aims[0]
+                        , point=point, mark=mark, place=place, r=r, theta=theta)
+
+    async def get_state(self, session_id):
+        """
+        セッションの状態を返す
+
+        Returns
+        -----
+        state : dict
+            session_id, score(レッグ開始時のスコア), left(残りポイント), round(ラウンド, 0始まり)
+            , round_darts(ラウンドで取ったポイント), finished(上がったかどうか)
+        """
+        return self._get_state(self._get_session(session_id))
+
+    def _get_state(self, session):
+        stats = session.stats
+        round_darts = stats.round_darts
+        return dict(session_id=session.session_id, score=session.score, left=stats.left - sum(round_darts)
+                    , round=stats.round_idx, round_darts=round_darts, finished=stats.leg_finished)
+
+
+async def serve(service, path=None, host="127.0.0.1", port=0):
+    """
+    サービスをソケットで公開する
+    1行1リクエストのJSON
+    {"id": 1, "op": "throw", "args": {"session_id": 0}} -> {"id": 1, "result": ...} or {"id": 1, "error": "..."}
+    同じ接続のリクエストも並行に処理するので、レスポンスの順番は変わる
+
+    Parameters
+    -----
+    service : GameService
+        公開するサービス
+    path : str, optional
+        UNIXドメインソケットのパス(省略時はTCP)
+    host : str
+        TCPのホスト
+    port : int
+        TCPのポート(0は空いているポート)
+
+    Returns
+    -----
+    server : asyncio.Server
+        サーバー
+    """
+    async def handle_request(line, writer):
+        response = dict(id=None)
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+            response["id"] = request.get("id")
+            if request.get("op") not in OPERATIONS:
+                raise ValueError("unknown op : {}".format(request.get("op")))
+            response["result"] = await getattr(service, request["op"])(**request.get("args", {}))
+        except Exception as e:
+            response["error"] = "{}: {}".format(type(e).__name__, e)
+        writer.write((json.dumps(response) + "\n").encode())
+
+    async def handle_connection(reader, writer):
+        tasks = set()
+        try:
+            async for line in reader:
+                task = asyncio.ensure_future(handle_request(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                await writer.drain()
+            await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    if path is not None:
+        return await asyncio.start_unix_server(handle_connection, path)
+    return await asyncio.start_server(handle_connection, host, port)
+
+
+class GameClient(object):
+    """
+    serveで公開したサービスのクライアント
+    GameServiceと同じメソッドを持つ
+    """
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._request_ids = itertools.count()
+        self._futures = {}
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    @classmethod
+    async def connect(cls, path=None, host="127.0.0.1", port=None):
+        """
+        サービスに接続する
+
+        Parameters
+        -----
+        path : str, optional
+            UNIXドメインソケットのパス(省略時はTCP)
+        host : str
+            TCPのホスト
+        port : int
+            TCPのポート
+        """
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def _receive(self):
+        try:
+            async for line in self._reader:
+                response = json.loads(line)
+                #idのないエラー(不正なリクエスト) or 呼び出し側がキャンセルしたリクエストは捨てる
+                future = self._futures.pop(response.get("id"), None)
+                if future is None:
+                    if "error" in response:
+                        logger.warning("service error : {}".format(response["error"]))
+                    continue
+                if future.done():
+                    continue
+                if "error" in response:
+                    future.set_exception(RuntimeError(response["error"]))
+                else:
+                    future.set_result(response["result"])
+        finally:
+            #受信が終わったら(切断, 不正なレスポンス, close)待っている呼び出しを全て失敗させる
+            futures, self._futures = list(self._futures.values()), {}
+            for future in futures:
+                if not future.done():
+                    future.set_exception(ConnectionError("connection closed"))
+
+    async def call(self, op, **args):
+        """
+        操作を呼ぶ
+
+        Parameters
+        -----
+        op : str
+            操作名(OPERATIONS)
+        args : dict
+            操作の引数
+        """
+        if self._receiver.done():
+            raise ConnectionError("connection closed")
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._futures[request_id] = future
+        self._writer.write((json.dumps(dict(id=request_id, op=op, args=args)) + "\n").encode())
+        await self._writer.drain()
+        return await future
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._receiver.cancel()
+
+    async def create_session(self, score=501, bull_type="fat", out_type="everything", sigma=None, seed=None):
+        return await self.call("create_session", score=score, bull_type=bull_type, out_type=out_type
+                               , sigma=sigma, seed=seed)
+
+    async def start_leg(self, session_id):
+        return await self.call("start_leg", session_id=session_id)
+
+    async def close_session(self, session_id):
+        return await self.call("close_session", session_id=session_id)
+
+    async def get_aims(self, session_id):
+        return await self.call("get_aims", session_id=session_id)
+
+    async def submit_throw(self, session_id, point, mark):
+        return await self.call("submit_throw", session_id=session_id, point=point, mark=mark)
+
+    async def throw(self, session_id):
+        return await self.call("throw", session_id=session_id)
+
+    async def get_state(self, session_id):
+        return await self.call("get_state", session_id=session_id)
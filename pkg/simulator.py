@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from pkg import instrument
+from pkg.board import Board
+from pkg.rules import ZeroOneRules
+from pkg.throw import Throw
+from pkg.strategy.zeroone import ZeroOne
+
+class ZeroOneSimulator(object):
+    """
+    01のレッグをまとめてシミュレーションするクラス
+    全レッグを1投ずつ同時に進める
+
+    Attributes
+    -----
+    score : int
+        レッグ開始時のスコア
+    bull_type : str (sepa or fat)
+        bullの種類
+    out_type : str (everything, master, double)
+        上がり方の種類
+
+    See Also
+    -----
+    main.py : 1レッグずつ進める場合
+    """
+
+    def __init__(self, sigma, bull_type="fat", out_type="everything", score=501, seed=None, strategy=None):
+        """
+        Parameters
+        -----
+        sigma : float
+            命中精度(標準偏差)
+        bull_type : str (sepa or fat)
+            bullの種類
+        out_type : str (everything, master, double)
+            上がり方の種類
+        score : int
+            レッグ開始時のスコア
+        seed : int or numpy.random.SeedSequence, optional
+            乱数のシード
+        strategy : ZeroOne, optional
+            戦略クラス(省略時は作成する)
+        """
+        self.score = score
+        self.bull_type = bull_type
+        self.out_type = out_type
+
+        self._board = Board(bull_type)
+        self._throw = Throw(sigma, seed)
+        self._strategy = ZeroOne(bull_type, out_type) if strategy is None else strategy
+        self._rules = ZeroOneRules(bull_type, out_type)
+
+        #狙う座標のキャッシュ
+        #{(残りポイント, ラウンドで投げた数, ラウンドで取ったポイント) : (r, theta, ポイント, 場所のコード, 基礎ポイント)}
+        self._aim_cache = {}
+        #狙う場所(場所のコード, 基礎ポイント)ごとの座標(方策テーブルをまとめて引く場合に使う)
+        self._aim_coordinate_table = np.full((len(ZeroOne.mark_names), 26, 2), np.nan)
+        for code, mark in enumerate(ZeroOne.mark_names):
+            for point in list(range(1, 21)) + [25]:
+                self._aim_coordinate_table[code, point] = self._board.get_aim_coordinate(point, mark)
+
+    def run(self, n_legs, max_rounds=50, event_store=None):
+        """
+        レッグをまとめてシミュレーションする
+
+        Parameters
+        -----
+        n_legs : int
+            レッグ数
+        max_rounds : int
+            1レッグの最大ラウンド数
+        event_store : ThrowEventStore, optional
+            1投ごとの記録の保存先
+
+        Returns
+        -----
+        n_darts : numpy.ndarray of int
+            上がるまでに投げた本数(max_roundsで上がれなかった場合は-1)
+        round_scores : numpy.ndarray of int
+            (n_legs, max_rounds)のラウンドごとの得点(バーストは0, 上がった後は0)
+        """
+        score = np.full(n_legs, self.score)
+        n_darts = np.full(n_legs, -1)
+        round_scores = np.zeros((n_legs, max_rounds), dtype=int)
+        if event_store is not None:
+            start_leg_id = event_store.allocate_legs(n_legs)
+
+        for round_idx in range(max_rounds):
+            #ラウンドを投げるレッグ
+            legs = np.flatnonzero(n_darts < 0)
+            if len(legs) == 0:
+                break
+            round_point = np.zeros(len(legs), dtype=int)
+            for n_throw in range(3):
+                if len(legs) == 0:
+                    break
+                aim_r, aim_theta, aims = self._get_aim_coordinates(score[legs], n_throw, round_point)
+                r, theta = self._throw.aim_many(aim_r, aim_theta)
+                point, place_code, base_point = self._board.calc_throw_results(r, theta)
+                left_before = score[legs] - round_point
+                #BURSTと上がりの判定(BURSTしたラウンドは0点)
+                _, round_point, burst_flag, finish_flag = self._rules.apply_throws(score[legs], round_point
+                                                                                    , point, place_code)
+
+                if event_store is not None:
+                    event_store.append(leg=start_leg_id + legs, round=round_idx, dart=n_throw, left=left_before
+                                       , aim_point=aims[:, 0], aim_mark=aims[:, 1], aim_place=aims[:, 2]
+                                       , r=r, theta=theta, point=point, mark=place_code, base_point=base_point
+                                       , burst=burst_flag, finish=finish_flag)
+
+                #上がりチェック
+                n_darts[legs[finish_flag]] = 3*round_idx + n_throw + 1
+
+                #ラウンドを終えたレッグを除く
+                done = finish_flag | burst_flag
+                score[legs[done]] -= round_point[done]
+                round_scores[legs[done], round_idx] = round_point[done]
+                legs, round_point = legs[~done], round_point[~done]
+
+            score[legs] -= round_point
+            round_scores[legs, round_idx] = round_point
+
+        return n_darts, round_scores
+
+    def _get_aim_coordinates(self, left_point, n_throw, round_point):
+        """
+        状態ごとに狙う座標を計算
+
+        Parameters
+        -----
+        left_point : numpy.ndarray of int
+            ラウンド開始時の残りポイント
+        n_throw : int
+            ラウンドで投げた数
+        round_point : numpy.ndarray of int
+            ラウンドで取ったポイント
+
+        Returns
+        -----
+        r : numpy.ndarray of float
+            狙う座標の距離部分
+        theta : numpy.ndarray of float
+            狙う座標の角度部分
+        aims : numpy.ndarray of int
+            (len(left_point), 3)の狙う場所(ポイント, 場所のコード, 基礎ポイント)
+        """
+        r, theta = np.zeros(len(left_point)), np.zeros(len(left_point))
+        #方策テーブルを持つ戦略クラスはまとめて引く
+        lookup_policy = getattr(self._strategy, "lookup_policy", None)
+        if lookup_policy is not None:
+            aims, found = lookup_policy(left_point, n_throw, round_point)
+            r[found], theta[found] = self._aim_coordinate_table[aims[found, 1], aims[found, 2]].T
+        else:
+            aims, found = np.zeros((len(left_point), 3), dtype=np.int64), np.zeros(len(left_point), dtype=bool)
+
+        #テーブルにない状態は状態ごとに計算する
+        rest = np.flatnonzero(~found)
+        if len(rest) > 0:
+            n_round_points = int(round_point[rest].max()) + 1
+            states, inverse = np.unique(left_point[rest]*n_round_points + round_point[rest], return_inverse=True)
+            coordinates = np.array([self._get_aim_coordinate(int(state // n_round_points), n_throw
+                                                             , int(state % n_round_points)) for state in states])
+            coordinates = coordinates[inverse.ravel()]
+            r[rest], theta[rest] = coordinates[:, 0], coordinates[:, 1]
+            aims[rest] = coordinates[:, 2:].astype(int)
+        return r, theta, aims
+
+    def _get_aim_coordinate(self, left_point, n_throw, round_point):
+        """
+        狙う座標を計算(キャッシュ付き)
+
+        Parameters
+        -----
+        left_point : int
+            ラウンド開始時の残りポイント
+        n_throw : int
+            ラウンドで投げた数
+        round_point : int
+            ラウンドで取ったポイント
+
+        Returns
+        -----
+        coordinate : tuple
+            狙う座標と場所(r, theta, ポイント, 場所のコード(ZeroOne.mark_names), 基礎ポイント)
+        """
+        key = (left_point, n_throw, round_point)
+        instrument.count_cache("ZeroOneSimulator.aim", key in self._aim_cache)
+        if key not in self._aim_cache:
+            #戦略クラスは取ったポイントの合計と数しか使わない
+            get = ([round_point] + [0]*(n_throw-1)) if n_throw > 0 else []
+            aim_point, place, point = self._strategy.get_aims(left_point, get)[0]
+            r, theta = self._board.get_aim_coordinate(point, place)
+            self._aim_cache[key] = (r, theta, aim_point, ZeroOne.mark_names.index(place), point)
+        return self._aim_cache[key]
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+import numpy as np
+
+from pkg import event_store
+from pkg.rules import ZeroOneRules
+from pkg.event_store import THROW_EVENT_DTYPE
+
+
+class RunningMoments(object):
+    """
+    平均と分散を逐次計算する(Welford法)
+    まとめて追加した場合や他の集計と合わせる場合はChanの方法で合成する
+
+    Attributes
+    -----
+    count : int
+        件数
+    mean : float
+        平均
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value):
+        """
+        1件追加する
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    def add_many(self, values):
+        """
+        まとめて追加する
+        """
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        mean = values.mean()
+        self._combine(len(values), mean, ((values - mean)**2).sum())
+
+    def merge(self, other):
+        """
+        他の集計を合わせる
+        """
+        self._combine(other.count, other.mean, other._m2)
+
+    def _combine(self, count, mean, m2):
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self._m2 += m2 + delta**2 * self.count * count / total
+        self.count = total
+
+    @property
+    def var(self):
+        return self._m2 / self.count if self.count > 0 else np.nan
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
+
+class ZeroOneStats(object):
+    """
+    01の投げた結果を逐次集計するクラス
+    集計は定数サイズで、ワーカーごとの集計はmergeで合わせられる
+
+    Player.play()の結果を1投ずつ(consume, add_throw)
+    または1投ごとの記録をまとめて(add_events)追加できる
+    ThrowEventStoreと同じappendを持つので、ZeroOneSimulator.runのevent_storeにも渡せる
+
+    Attributes
+    -----
+    bull_type : str (sepa or fat)
+        bullの種類
+    out_type : str (everything, master, double)
+        上がり方の種類
+    max_darts : int
+        上がるまでの本数のヒストグラムの上限(それ以上は最後のビンに入れる)
+    darts_histogram : numpy.ndarray of int
+        上がるまでの本数のヒストグラム(indexが本数)
+    darts_moments : RunningMoments
+        上がるまでの本数の平均と分散
+    round_moments : RunningMoments
+        ラウンドごとの得点の平均と分散(BURSTは0点)
+
+    Examples
+    -----
+    >>> stats = ZeroOneStats("fat", "double")
+    >>> stats.start_leg(501)
+    >>> while not stats.leg_finished:
+    ...     player.score = stats.left
+    ...     player.calc_aims()
+    ...     stats.consume(player.play(), player)
+    >>> stats.summary()
+    """
+
+    def __init__(self, bull_type="fat", out_type="everything", max_darts=150):
+        """
+        Parameters
+        -----
+        bull_type : str (sepa or fat)
+            bullの種類
+        out_type : str (everything, master, double)
+            上がり方の種類
+        max_darts : int
+            上がるまでの本数のヒストグラムの上限
+        """
+        #BURSTと上がりの判定(out_typeの確認を含む)
+        self._rules = ZeroOneRules(bull_type, out_type)
+        self.bull_type = bull_type
+        self.out_type = out_type
+        self.max_darts = max_darts
+
+        self.darts_histogram = np.zeros(max_darts+1, dtype=np.int64)
+        self.darts_moments = RunningMoments()
+        self.round_moments = RunningMoments()
+        self._n_points = 0
+        self._n_darts = 0
+        self._n_first9_points = 0
+        self._n_first9_darts = 0
+        self._n_bursts = 0
+        self._n_checkout_darts = 0
+        self._n_checkouts = 0
+        #add_eventsでラウンドが揃っていない記録
+        self._pending_events = np.zeros(0, dtype=THROW_EVENT_DTYPE)
+        self._next_leg_id = 0
+        #consumeで集計中のレッグ
+        self.left = None
+        self._round_idx = 0
+        self._round_darts = []
+        self._round_point = 0
+
+    @property
+    def leg_finished(self):
+        return self.left == 0
+
+    @property
+    def round_idx(self):
+        """
+        集計中のレッグのラウンド(0始まり)
+        """
+        return self._round_idx
+
+    @property
+    def round_darts(self):
+        """
+        集計中のラウンドで取ったポイント
+        """
+        return list(self._round_darts)
+
+    def start_leg(self, score):
+        """
+        1投ずつ集計するレッグを始める
+
+        Parameters
+        -----
+        score : int
+            レッグ開始時のスコア
+        """
+        self.left = score
+        self._round_idx = 0
+        self._round_darts = []
+        self._round_point = 0
+
+    def add_throw(self, point, mark):
+        """
+        1投の結果を追加する
+        BURSTか上がりか3投目でラウンドを終える
+
+        Parameters
+        -----
+        point : int
+            取ったポイント
+        mark : str
+            当たった場所(Board.place_names)
+
+        Returns
+        -----
+        result : str or None
+            "burst", "finish", ラウンドが続く場合はNone
+        """
+        if self.left is None or self.left == 0:
+            raise ValueError("start_leg must be called before add_throw")
+        self._n_darts += 1
+        if self._round_idx < 3:
+            self._n_first9_darts += 1
+        if self._rules.is_checkout(self.left - self._round_point):
+            self._n_checkout_darts += 1
+        self._round_darts.append(point)
+
+        _, self._round_point, result = self._rules.apply_throw(self.left, self._round_point, point, mark)
+        if result == "burst":
+            self._end_round(burst_flag=True)
+            return "burst"
+        if result == "finish":
+            self._n_checkouts += 1
+            self._add_darts(3*self._round_idx + len(self._round_darts))
+            self._end_round()
+            return "finish"
+        if len(self._round_darts) == 3:
+            self._end_round()
+        return None
+
+    def _end_round(self, burst_flag=False):
+        round_point = self._round_point
+        self._n_bursts += int(burst_flag)
+        self.round_moments.add(round_point)
+        self._n_points += round_point
+        if self._round_idx < 3:
+            self._n_first9_points += round_point
+        self.left -= round_point
+        self._round_idx += 1
+        self._round_darts = []
+        self._round_point = 0
+
+    def _add_darts(self, n_darts):
+        self.darts_moments.add(n_darts)
+        self.darts_histogram[min(n_darts, self.max_darts)] += 1
+
+    def consume(self, play_results, player=None):
+        """
+        Player.play()の結果を1ラウンド分追加する
+        BURSTか上がりで途中で止める
+
+        Parameters
+        -----
+        play_results : iterable of (hit_result, throw_result)
+            Player.play()の返り値
+        player : Player, optional
+            1投ごとに狙う場所を計算し直すプレイヤー
+
+        Returns
+        -----
+        result : str or None
+            最後に投げた結果(add_throwの返り値)
+        """
+        result = None
+        for _, throw_result in play_results:
+            result = self.add_throw(throw_result["point"], throw_result["mark"])
+            if len(self._round_darts) == 0:
+                break
+            if player is not None:
+                player.calc_aims(list(self._round_darts))
+        return result
+
+    def add_events(self, events):
+        """
+        1投ごとの記録をまとめて追加する
+        ラウンドの途中までしかない記録は、残りが追加されるまで保留する
+
+        Parameters
+        -----
+        events : numpy.ndarray
+            THROW_EVENT_DTYPEの構造化配列(ThrowEventStoreのチャンクなど)
+        """
+        events = np.concatenate([self._pending_events, np.asarray(events, dtype=THROW_EVENT_DTYPE)])
+        events = events[np.lexsort((events["dart"], events["round"], events["leg"]))]
+        #ラウンドごとに分ける
+        starts = self._round_starts(events)
+        end_flags = events["burst"] | events["finish"] | (events["dart"] == 2)
+        complete = np.add.reduceat(end_flags.astype(int), starts) > 0 if len(events) > 0 else np.zeros(0, dtype=bool)
+        complete_rows = np.repeat(complete, np.diff(np.append(starts, len(events))))
+        self._pending_events = events[~complete_rows]
+        events = events[complete_rows]
+        if len(events) == 0:
+            return
+        starts = self._round_starts(events)
+
+        #ラウンドごとの得点(BURSTは0点)
+        burst_flags = np.add.reduceat(events["burst"].astype(int), starts) > 0
+        round_points = np.where(burst_flags, 0, np.add.reduceat(events["point"].astype(np.int64), starts))
+        round_darts = np.diff(np.append(starts, len(events)))
+        first9_flags = events["round"][starts] < 3
+        self.round_moments.add_many(round_points)
+        self._n_points += int(round_points.sum())
+        self._n_darts += len(events)
+        self._n_first9_points += int(round_points[first9_flags].sum())
+        self._n_first9_darts += int(round_darts[first9_flags].sum())
+        self._n_bursts += int(burst_flags.sum())
+
+        #1本で上がれる残りポイントから投げた本数と上がった本数
+        self._n_checkout_darts += int(self._rules.is_checkout(events["left"]).sum())
+        finished = events[events["finish"]]
+        self._n_checkouts += len(finished)
+        n_darts = 3*finished["round"].astype(np.int64) + finished["dart"] + 1
+        self.darts_moments.add_many(n_darts)
+        self.darts_histogram += np.bincount(np.minimum(n_darts, self.max_darts), minlength=self.max_darts+1)
+
+    @staticmethod
+    def _round_starts(events):
+        """
+        レッグとラウンドでソートした記録の各ラウンドの開始位置
+        """
+        new_round = np.ones(len(events), dtype=bool)
+        new_round[1:] = (events["leg"][1:] != events["leg"][:-1]) | (events["round"][1:] != events["round"][:-1])
+        return np.flatnonzero(new_round)
+
+    def allocate_legs(self, n_legs):
+        """
+        ZeroOneSimulator.runから呼ばれる(ThrowEventStoreと同じ)
+        """
+        start_leg_id = self._next_leg_id
+        self._next_leg_id += n_legs
+        return start_leg_id
+
+    def append(self, **columns):
+        """
+        ZeroOneSimulator.runから呼ばれる(ThrowEventStoreと同じ)
+        """
+        self.add_events(event_store.to_events(**columns))
+
+    def merge(self, other):
+        """
+        他の集計を合わせる
+
+        Parameters
+        -----
+        other : ZeroOneStats
+            同じbull_type, out_type, max_dartsの集計
+        """
+        if (self.bull_type, self.out_type, self.max_darts) != (other.bull_type, other.out_type, other.max_darts):
+            raise ValueError("bull_type, out_type and max_darts must be the same")
+        self.darts_histogram += other.darts_histogram
+        self.darts_moments.merge(other.darts_moments)
+        self.round_moments.merge(other.round_moments)
+        self._n_points += other._n_points
+        self._n_darts += other._n_darts
+        self._n_first9_points += other._n_first9_points
+        self._n_first9_darts += other._n_first9_darts
+        self._n_bursts += other._n_bursts
+        self._n_checkout_darts += other._n_checkout_darts
+        self._n_checkouts += other._n_checkouts
+        self._pending_events = np.concatenate([self._pending_events, other._pending_events])
+        return self
+
+    def darts_percentile(self, q):
+        """
+        上がるまでの本数のパーセンタイル(ヒストグラムから計算)
+
+        Parameters
+        -----
+        q : float
+            パーセント(0~100)
+        """
+        if self.darts_moments.count == 0:
+            return np.nan
+        cumsum = np.cumsum(self.darts_histogram)
+        return int(np.searchsorted(cumsum, q/100 * cumsum[-1]))
+
+    def summary(self):
+        """
+        集計結果を取得
+
+        Returns
+        -----
+        summary : dict
+            n_legs : 上がったレッグ数
+            n_darts : 投げた本数
+            ppd : 1本あたりの得点
+            three_dart_average : 3本あたりの得点
+            first9_average : 最初の3ラウンドの3本あたりの得点
+            checkout_rate : 1本で上がれる残りポイントで投げた本数のうち上がった割合
+            burst_rate : BURSTしたラウンドの割合
+            mean_darts, std_darts, median_darts, p90_darts : 上がるまでの本数
+            mean_round, std_round : ラウンドごとの得点
+        """
+        def ratio(a, b):
+            return a / b if b > 0 else np.nan
+        ppd = ratio(self._n_points, self._n_darts)
+        return dict(n_legs=self.darts_moments.count, n_darts=self._n_darts, ppd=ppd, three_dart_average=3*ppd
+                    , first9_average=3*ratio(self._n_first9_points, self._n_first9_darts)
+                    , checkout_rate=ratio(self._n_checkouts, self._n_checkout_darts)
+                    , burst_rate=ratio(self._n_bursts, self.round_moments.count)
+                    , mean_darts=self.darts_moments.mean if self.darts_moments.count > 0 else np.nan
+                    , std_darts=self.darts_moments.std
+                    , median_darts=self.darts_percentile(50), p90_darts=self.darts_percentile(90)
+                    , mean_round=self.round_moments.mean if self.round_moments.count > 0 else np.nan
+                    , std_round=self.round_moments.std)
@@ -1 +1,2 @@
-from . import zeroone
\ No newline at end of file
+from . import zeroone
+from . import optimal
\ No newline at end of file
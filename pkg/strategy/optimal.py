@@ -0,0 +1,257 @@
+import sys
+
+import numpy as np
+
+from pkg import board
+from pkg import cache_util
+from pkg import probability
+from pkg import rules
+from pkg import throw
+from pkg.board import Board
+from pkg.rules import ZeroOneRules
+from pkg.strategy.zeroone import ZeroOne
+
+#解いた方策
+#{(bull_type, out_type, sigma, max_score) : dict of numpy.ndarray}
+_solved_tables = {}
+
+#方策の範囲外の状態で使う戦略(ルールごとに1つを使い回す)
+#{(bull_type, out_type) : ZeroOne}
+_fallback_strategies = {}
+
+class OptimalZeroOne(object):
+    """
+    命中精度を考慮した01の戦略
+    01のレッグをマルコフ決定過程として、上がるまでの本数の期待値が最小になる狙う場所を求める
+    ZeroOneと同じget_aimsで使える
+
+    Attributes
+    -----
+    bull_type : str (sepa or fat)
+        bullの種類
+    out_type : str (everything, master, double)
+        上がり方の種類
+    sigma : float
+        命中精度(標準偏差)
+    targets : list of [point, mark, place]
+        狙う場所の候補
+    hit_probabilities : numpy.ndarray of float
+        (len(targets), len(outcomes))の狙う場所ごとの当たる場所の確率
+    expected_darts : numpy.ndarray of float
+        ラウンド開始時の残りポイントごとの上がるまでの本数の期待値
+
+    Notes
+    -----
+    状態は(残りポイント, ラウンドで投げた数, ラウンド開始時の残りポイント)
+    BURSTするとラウンド開始時の残りポイントに戻り、ラウンドの残りの本数も投げたものとして数える
+    """
+
+    def __init__(self, bull_type, out_type, sigma, max_score=501, use_cache=True):
+        """
+        Parameters
+        -----
+        bull_type : str (sepa or fat)
+            bullの種類
+        out_type : str (everything, master, double)
+            上がり方の種類
+        sigma : float
+            命中精度(標準偏差)
+        max_score : int
+            ラウンド開始時の残りポイントの最大値
+        use_cache : bool
+            解いた方策をディスクのキャッシュから読み書きするかどうか
+        """
+        if out_type not in ["everything", "master", "double"]:
+            raise ValueError("out_type must be everything, master or double")
+        self.bull_type = bull_type
+        self.out_type = out_type
+        self.sigma = sigma
+        self.max_score = max_score
+        self._board = Board(bull_type)
+
+        #BURSTと上がりの判定
+        self._rules = ZeroOneRules(bull_type, out_type)
+        self._min_left = self._rules.min_left
+
+        self._set_targets()
+        self._set_outcomes()
+
+        key = (bull_type, out_type, sigma, max_score)
+        if key not in _solved_tables:
+            name = "optimal_{}_{}_{}_{}".format(bull_type, out_type, sigma, max_score)
+            version = cache_util.calc_source_hash(board, throw, probability, rules, sys.modules[__name__])
+            tables = cache_util.load_arrays(name, version) if use_cache else None
+            if tables is None:
+                tables = self._solve()
+                if use_cache:
+                    cache_util.save_arrays(name, version, **tables)
+            _solved_tables[key] = tables
+        tables = _solved_tables[key]
+        self.hit_probabilities = tables["hit_probabilities"]
+        self.expected_darts = tables["expected_darts"]
+        self._policies = [tables["policy_0"], tables["policy_1"], tables["policy_2"]]
+
+    def _set_targets(self):
+        """
+        狙う場所の候補を作成
+        """
+        self.targets = [[50, "inner_bull", 25]]
+        for place in range(1, 21):
+            self.targets += [[place, "inner_single", place], [3*place, "triple", place]
+                             , [place, "outer_single", place], [2*place, "double", place]]
+        self._target_coordinates = np.array([self._board.get_aim_coordinate(place, mark)
+                                             for _, mark, place in self.targets])
+
+    def _set_outcomes(self):
+        """
+        当たる場所の候補(場所のコードと基礎ポイント)を作成
+        """
+        place_names = self._board.place_names
+        self._outcomes = list(probability.OUTCOMES)
+
+        place_code = np.array([place_names.index(mark) for mark, _ in self._outcomes])
+        base_point = np.array([place for _, place in self._outcomes])
+        #当たる場所ごとのポイント
+        self._outcome_points = self._board._place_coef[place_code] * base_point + self._board._place_bull_point[place_code]
+        #当たる場所ごとの場所のコード(上がりの判定に使う)
+        self._outcome_place_codes = place_code
+
+    def _calc_hit_probabilities(self):
+        """
+        狙う場所ごとの当たる場所の確率を計算
+
+        Returns
+        -----
+        hit_probabilities : numpy.ndarray of float
+            (len(targets), len(outcomes))の確率
+        """
+        target_probabilities = probability.get_target_probabilities(self.sigma, self.bull_type)
+        rows = [target_probabilities.index(mark, place) for _, mark, place in self.targets]
+        return np.array(target_probabilities.matrix[rows])
+
+    def _solve(self):
+        """
+        ラウンド開始時の残りポイントの小さい順に方策を求める
+
+        Returns
+        -----
+        tables : dict of numpy.ndarray
+            hit_probabilities : 狙う場所ごとの当たる場所の確率
+            expected_darts : ラウンド開始時の残りポイントごとの本数の期待値
+            policy_n : n投目の狙う場所のindex([ラウンド開始時の残りポイント, 取ったポイント], -1は到達しない)
+        """
+        self.hit_probabilities = self._calc_hit_probabilities()
+        expected_darts = np.full(self.max_score+1, np.inf)
+        expected_darts[0] = 0
+        policies = [np.full((self.max_score+1, 60*n_throw+1), -1, dtype=np.int16) for n_throw in range(3)]
+
+        for start_point in range(self._min_left, self.max_score+1):
+            #BURSTして戻ってくる場合の期待値を仮定し、方策反復で不動点を求める
+            #大きい値から始めると、期待値は単調に減って収束する
+            x = 1e6
+            for _ in range(100):
+                value, slope, round_policies = self._solve_round(start_point, expected_darts, x)
+                if slope >= 1: #上がれない
+                    x = np.inf
+                    break
+                x_new = (value - slope*x) / (1 - slope)
+                if abs(x_new - x) <= 1e-10 * max(1, x_new):
+                    x = x_new
+                    break
+                x = x_new
+            expected_darts[start_point] = x
+            for n_throw, (lefts, targets) in enumerate(round_policies):
+                policies[n_throw][start_point, start_point - lefts] = targets
+
+        return dict(hit_probabilities=self.hit_probabilities, expected_darts=expected_darts
+                    , policy_0=policies[0], policy_1=policies[1], policy_2=policies[2])
+
+    def _solve_round(self, start_point, expected_darts, x):
+        """
+        ラウンド開始時の残りポイントの期待値をxと仮定して、ラウンド内の最適な狙う場所を求める
+
+        Parameters
+        -----
+        start_point : int
+            ラウンド開始時の残りポイント
+        expected_darts : numpy.ndarray of float
+            start_pointより小さい残りポイントの期待値
+        x : float
+            start_pointの期待値の仮定
+
+        Returns
+        -----
+        value : float
+            ラウンド開始時の期待値
+        slope : float
+            valueのxについての傾き(ラウンド開始時に戻る確率)
+        round_policies : list of (lefts, targets)
+            n投目の残りポイントと狙う場所のindex
+        """
+        #次のラウンド開始時の期待値とxについての傾き
+        values = expected_darts[:start_point+1].copy()
+        values[start_point] = x
+        slopes = np.zeros(start_point+1)
+        slopes[start_point] = 1
+
+        round_policies = [None] * 3
+        next_values, next_slopes = values, slopes
+        for n_throw in [2, 1, 0]:
+            lefts = np.arange(max(start_point - 60*n_throw, self._min_left), start_point+1)
+            next_lefts = lefts[:, None] - self._outcome_points[None, :]
+            burst_flags, finish_flags = self._rules.judge_many(next_lefts, self._outcome_place_codes[None, :])
+            continue_flags = ~(finish_flags | burst_flags)
+            idx = np.where(continue_flags, next_lefts, 0)
+            #BURSTはラウンド開始時に戻る(ラウンドの残りの本数も数える)
+            outcome_values = np.where(continue_flags, next_values[idx], 0) + np.where(burst_flags, x + 2 - n_throw, 0)
+            outcome_slopes = np.where(continue_flags, next_slopes[idx], 0) + burst_flags
+
+            target_values = 1 + outcome_values @ self.hit_probabilities.T
+            targets = np.argmin(target_values, axis=1)
+            rows = np.arange(len(lefts))
+            round_policies[n_throw] = (lefts, targets)
+
+            #投げる前の残りポイントごとの期待値
+            next_values = np.zeros(start_point+1)
+            next_slopes = np.zeros(start_point+1)
+            next_values[lefts] = target_values[rows, targets]
+            next_slopes[lefts] = (outcome_slopes @ self.hit_probabilities.T)[rows, targets]
+
+        return next_values[start_point], next_slopes[start_point], round_policies
+
+    def get_aims(self, left_point, get=[]):
+        """
+        狙う場所を返す
+        2投目以降は狙った場所に当たった場合の狙う場所
+
+        Parameters
+        -----
+        left_point : int
+            ラウンド開始時の残りポイント
+        get : list of int
+            同じラウンド中にとった得点
+
+        Returns
+        -----
+        aims : list of [point, n_mark, place]
+            狙う場所のリスト(方策の範囲外の状態(BURSTしかない残りポイントなど)はZeroOne.get_aimsを使うので、空にならない)
+        """
+        if not (0 <= left_point <= self.max_score):
+            raise ValueError("left_point must be 0 <= left_point <= {}".format(self.max_score))
+        aims = []
+        left = left_point - sum(get)
+        for n_throw in range(len(get), 3):
+            got_point = left_point - left
+            if not (self._min_left <= left and 0 <= got_point <= 60*n_throw):
+                break
+            target = self._policies[n_throw][left_point, got_point]
+            if target < 0:
+                break
+            aims.append(list(self.targets[target]))
+            left -= self.targets[target][0]
+        if len(aims) == 0:
+            key = (self.bull_type, self.out_type)
+            if key not in _fallback_strategies:
+                _fallback_strategies[key] = ZeroOne(self.bull_type, self.out_type)
+            aims = _fallback_strategies[key].get_aims(left_point, get)
+        return aims
@@ -1,7 +1,20 @@
+import sys
+from logging import getLogger
+
 import numpy as np
-import pandas as pd
 
-from pkg.arrange_helper import ArrangeHelper
+from pkg import arrange_helper
+from pkg import cache_util
+from pkg import instrument
+from pkg.arrange_helper import get_arrange_helper
+
+logger = getLogger("darts")
+
+#スコアマスタ・方策テーブルのバージョン
+#計算結果が変わる変更(arrange_helper, このモジュール)をしたら上げて、python -m pkg.build_tablesで同梱テーブルを作り直す
+#(python -m pkg.build_tables --checkで同梱テーブルが今のコードの計算結果と一致するか確認できる)
+#ユーザーのキャッシュはソースのハッシュで管理するので、上げ忘れても古いキャッシュは使われない
+TABLE_VERSION = 1
 
 class ZeroOne(object):
     """
@@ -16,14 +29,18 @@ class ZeroOne(object):
     columns : list of str
         上がり探索用のスコア格納用カラム名
     arrange_score_master : pandas.DataFrame
-        アレンジ用のデータフレーム
+        アレンジ用のデータフレーム(参照した時にpandasを読み込む)
     all_score_master : pands.DataFrame
-        180以下のスコアの上がり方のパターン数
+        180以下のスコアの上がり方のパターン数(参照した時にpandasを読み込む)
+    mark_names : list of str
+        狙う場所の名前(方策テーブルでのコード)
         
     
     """
     
-    def __init__(self, bull_type, out_type):
+    mark_names = ["inner_bull", "outer_bull", "inner_single", "outer_single", "double", "triple"]
+    
+    def __init__(self, bull_type, out_type, use_cache=True, use_policy=False, max_score=501):
         """
         Parameters
         -----
@@ -31,19 +48,102 @@ class ZeroOne(object):
             bullの種類
         out_type : str (everything, master, double)
             上がり方の種類 
+        use_cache : bool
+            スコアマスタ・方策テーブルをディスクのキャッシュから読み書きするかどうか
+        use_policy : bool
+            全状態の狙う場所を事前計算した方策テーブルを使うかどうか
+        max_score : int
+            方策テーブルに含めるラウンド開始時の残りポイントの最大値
         """
         
         #bullの種類と上がり方
         self.bull_type = bull_type
         self.out_type = out_type
+        #上がりの探索と、上がりを気にしない探索(アレンジ用)
+        self._arrange_helper = get_arrange_helper(bull_type, out_type)
+        self._everything_helper = get_arrange_helper(bull_type, "everything")
         
         #スコア格納用dfのパラメータ
         columns = ["point", "n_throw", "n_pattern"]
-        self.arrange_score_master = pd.DataFrame([], columns=columns)
-        self.all_score_master = pd.DataFrame([], columns=columns)
+        self._columns = columns
+        self._arrange_score_master = None
+        self._all_score_master = None
         
         #スコア計算
-        self._calc_scores(columns)
+        if use_cache:
+            self._load_scores(columns)
+        else:
+            self._calc_scores(columns)
+        self._index_scores()
+        
+        #方策テーブル
+        #policy[残りポイント, 投げた数, 取ったポイント] : 狙う場所の[point, markのコード, place]の配列
+        self._policy = None
+        self._policy_n_aims = None
+        if use_policy:
+            self.compile_policy(max_score, use_cache)
+    
+    def _get_cache_version(self):
+        """
+        ユーザーのキャッシュのバージョン(ルールのコードから計算するので、コードが変わると無効になる)
+        """
+        return cache_util.calc_source_hash(arrange_helper, sys.modules[__name__])
+    
+    def _get_bundled_version(self):
+        """
+        同梱テーブルのバージョン(TABLE_VERSIONから作る)
+        """
+        return cache_util.make_version(TABLE_VERSION)
+    
+    def _load_scores(self, columns):
+        """
+        スコアマスタをキャッシュから読み込む
+        キャッシュがない場合は計算して保存する
+        
+        See Also
+        -----
+        pkg.cache_util
+        """
+        name = "zeroone_{}_{}".format(self.bull_type, self.out_type)
+        version = self._get_cache_version()
+        arrays = cache_util.load_arrays(name, version, self._get_bundled_version())
+        if arrays is None:
+            self._calc_scores(columns)
+            cache_util.save_arrays(name, version, arrange_score_master=self._arrange_scores
+                                   , all_score_master=self._all_scores)
+        else:
+            self._arrange_scores = arrays["arrange_score_master"]
+            self._all_scores = arrays["all_score_master"]
+    
+    @property
+    def arrange_score_master(self):
+        if self._arrange_score_master is None:
+            import pandas as pd
+            self._arrange_score_master = pd.DataFrame(self._arrange_scores, columns=self._columns)
+        return self._arrange_score_master
+    
+    @property
+    def all_score_master(self):
+        if self._all_score_master is None:
+            import pandas as pd
+            self._all_score_master = pd.DataFrame(self._all_scores, columns=self._columns)
+        return self._all_score_master
+    
+    def _index_scores(self):
+        """
+        スコアマスタを残りトス数ごとのNumPy配列にする
+        アレンジ候補はパターン数の多い順、取得可能なポイントはポイントをindexにしたフラグ
+        """
+        #{n_throw : numpy.ndarray of int}
+        self._arrange_points = {}
+        #{n_throw : numpy.ndarray of bool}
+        self._all_point_flags = {}
+        for n_throw in range(1, 4):
+            arrange_flags = self._arrange_scores[:, 1] == n_throw
+            self._arrange_points[n_throw] = self._arrange_scores[arrange_flags, 0]
+            all_flags = self._all_scores[:, 1] == n_throw
+            self._all_point_flags[n_throw] = np.zeros(181, dtype=bool)
+            self._all_point_flags[n_throw][self._all_scores[all_flags, 0]] = True
     
     def _calc_scores(self, columns):
         """
@@ -55,37 +155,198 @@ class ZeroOne(object):
         -----
         arrange_helper
         """
+        import pandas as pd
+        arrange_score_master = pd.DataFrame([], columns=columns, dtype=object)
+        all_score_master = pd.DataFrame([], columns=columns, dtype=object)
         for n_throw in range(1,4):
+            arrange_rows = []
+            all_rows = []
             for point in range(1, 60 * n_throw + 1):
                 #上がり条件がある得点一覧
                 #flagがTrueの時は、上がれる可能性がある
-                flag, point_list = ArrangeHelper.search(point, get_init=[0]*(3-n_throw)
-                                                        , bull_type=self.bull_type, out_type=self.out_type)
+                flag, point_list = self._arrange_helper.search(point, get_init=[0]*(3-n_throw))
                 if flag :
-                    self.arrange_score_master = pd.concat([self.arrange_score_master
-                                                           , pd.DataFrame([[point, n_throw, len(point_list)]]
-                                                           , columns=columns)])
+                    arrange_rows.append([point, n_throw, len(point_list)])
 
                 #上がりを気にしないで取得できる得点一覧
                 #out_type をeverythingにしておくと180点以内で取得できる得点のパターンを全て計算できる
-                flag, point_list = ArrangeHelper.search(point, get_init=[0]*(3-n_throw)
-                                                        , bull_type=self.bull_type, out_type="everything")
+                flag, point_list = self._everything_helper.search(point, get_init=[0]*(3-n_throw))
                 if flag :
-                    self.all_score_master = pd.concat([self.all_score_master
-                                                       , pd.DataFrame([[point, n_throw, len(point_list)]]
-                                                       , columns=columns)])
-            #値をソート
-            self.arrange_score_master = self.arrange_score_master.sort_values("n_pattern", axis=0, ascending=False)
-            self.all_score_master = self.all_score_master.sort_values("n_pattern", axis=0, ascending=False)
+                    all_rows.append([point, n_throw, len(point_list)])
+            #追加して値をソート
+            arrange_score_master = pd.concat([arrange_score_master
+                                              , pd.DataFrame(arrange_rows, columns=columns, dtype=object)]
+                                             , ignore_index=True)
+            all_score_master = pd.concat([all_score_master
+                                          , pd.DataFrame(all_rows, columns=columns, dtype=object)]
+                                         , ignore_index=True)
+            arrange_score_master = arrange_score_master.sort_values("n_pattern", axis=0, ascending=False)
+            all_score_master = all_score_master.sort_values("n_pattern", axis=0, ascending=False)
+        self._arrange_scores = arrange_score_master[columns].to_numpy(dtype=np.int64)
+        self._all_scores = all_score_master[columns].to_numpy(dtype=np.int64)
 
+    def export_tables(self, cache_dir, max_score=None, compress=True):
+        """
+        スコアマスタ(と方策テーブル)をキャッシュと同じ形式・同梱テーブルのバージョンで保存する
+        
+        Parameters
+        -----
+        cache_dir : str
+            保存先
+        max_score : int, optional
+            方策テーブルに含めるラウンド開始時の残りポイントの最大値(省略時は方策テーブルを保存しない)
+        compress : bool
+            圧縮するかどうか
+        
+        Returns
+        -----
+        names : list of str
+            保存したファイル名
+        """
+        version = self._get_bundled_version()
+        name = "zeroone_{}_{}".format(self.bull_type, self.out_type)
+        cache_util.save_arrays(name, version, cache_dir=cache_dir, compress=compress
+                               , arrange_score_master=self._arrange_scores, all_score_master=self._all_scores)
+        names = ["{}_{}.npz".format(name, version)]
+        if max_score is not None:
+            self.compile_policy(max_score, use_cache=False)
+            name = "zeroone_policy_{}_{}_{}".format(self.bull_type, self.out_type, max_score)
+            cache_util.save_arrays(name, version, cache_dir=cache_dir, compress=compress
+                                   , policy=self._policy, n_aims=self._policy_n_aims)
+            names.append("{}_{}.npz".format(name, version))
+        return names
+    
+    def compile_policy(self, max_score=501, use_cache=True):
+        """
+        到達可能な全状態(ラウンド開始時の残りポイント, 投げた数, 取ったポイント)の
+        狙う場所を事前計算し、get_aimsを配列の参照にする
+        
+        Parameters
+        -----
+        max_score : int
+            ラウンド開始時の残りポイントの最大値
+        use_cache : bool
+            ディスクのキャッシュから読み書きするかどうか
+        """
+        name = "zeroone_policy_{}_{}_{}".format(self.bull_type, self.out_type, max_score)
+        version = self._get_cache_version()
+        arrays = cache_util.load_arrays(name, version, self._get_bundled_version()) if use_cache else None
+        if arrays is None:
+            arrays = self._calc_policy(max_score)
+            if use_cache:
+                cache_util.save_arrays(name, version, **arrays)
+        self._policy = arrays["policy"]
+        self._policy_n_aims = arrays["n_aims"]
+    
+    def _calc_policy(self, max_score):
+        """
+        方策テーブルを計算
+        
+        Parameters
+        -----
+        max_score : int
+            ラウンド開始時の残りポイントの最大値
+        
+        Returns
+        -----
+        arrays : dict of numpy.ndarray
+            policy : 狙う場所の[point, markのコード, place]
+            n_aims : 狙う場所の数(0は到達しない状態)
+        """
+        policy = np.zeros((max_score+1, 3, 181, 3, 3), dtype=np.int16)
+        n_aims = np.zeros((max_score+1, 3, 181), dtype=np.int8)
+        
+        #1投で取れるポイント(外れた場合の0を含む)
+        dart_points = {0, 50} | {p*n_mark for p in range(1, 21) for n_mark in range(1, 4)}
+        if self.bull_type == "sepa":
+            dart_points.add(25)
+        #投げた数ごとの取ったポイントの候補
+        got_points_list = [[0]]
+        for _ in range(2):
+            got_points_list.append(sorted({got + p for got in got_points_list[-1] for p in dart_points}))
+        
+        for left_point in range(1, max_score+1):
+            for n_got, got_points in enumerate(got_points_list):
+                for got_point in got_points:
+                    #BURST or 上がっている
+                    if got_point >= left_point:
+                        break
+                    #戦略は取ったポイントの合計と数しか使わない
+                    get = [got_point] + [0]*(n_got-1) if n_got > 0 else []
+                    aims = self._calc_aims(left_point, get)
+                    n_aims[left_point, n_got, got_point] = len(aims)
+                    policy[left_point, n_got, got_point, :len(aims)] = [[p, self.mark_names.index(mark), place]
+                                                                         for p, mark, place in aims]
+        return dict(policy=policy, n_aims=n_aims)
+    
+    @instrument.timed("ZeroOne.get_aims")
     def get_aims(self, left_point, get=[]):
         """
         狙う場所を返す
+        方策テーブルがあれば参照する
+        
+        Parameters
+        -----
+        left_point : int
+            残りポイント
+        get : list of int
+            同じラウンド中にとった得点
+        
+         Returns
+         -----
+         aims : list of [point, n_mark, place]
+             狙う場所のリスト
+        """
+        if self._policy is not None and len(get) < 3 and 0 <= sum(get) <= 180 and left_point < self._policy.shape[0]:
+            n_aims = self._policy_n_aims[left_point, len(get), sum(get)]
+            instrument.count_cache("ZeroOne.policy", n_aims > 0)
+            if n_aims > 0:
+                return [[p, self.mark_names[mark], place]
+                        for p, mark, place in self._policy[left_point, len(get), sum(get), :n_aims].tolist()]
+        return self._calc_aims(left_point, get)
+    
+    def lookup_policy(self, left_point, n_throw, round_point):
+        """
+        方策テーブルから次に狙う場所をまとめて引く
+        テーブルにある状態はget_aims(left_point, get)[0]と同じ
+        
+        Parameters
+        -----
+        left_point : numpy.ndarray of int
+            ラウンド開始時の残りポイント
+        n_throw : int
+            ラウンドで投げた数
+        round_point : numpy.ndarray of int
+            ラウンドで取ったポイント
+        
+        Returns
+        -----
+        aims : numpy.ndarray of int
+            (len(left_point), 3)の狙う場所[point, markのコード, place]
+        found : numpy.ndarray of bool
+            方策テーブルにある状態かどうか(ない状態はget_aimsで計算する)
+        """
+        left_point, round_point = np.asarray(left_point), np.asarray(round_point)
+        aims = np.zeros((len(left_point), 3), dtype=np.int64)
+        found = np.zeros(len(left_point), dtype=bool)
+        if self._policy is None or not (0 <= n_throw < 3):
+            return aims, found
+        found = ((0 <= left_point) & (left_point < self._policy.shape[0])
+                 & (0 <= round_point) & (round_point <= 180))
+        found[found] = self._policy_n_aims[left_point[found], n_throw, round_point[found]] > 0
+        aims[found] = self._policy[left_point[found], n_throw, round_point[found], 0]
+        return aims, found
+    
+    def _calc_aims(self, left_point, get=[]):
+        """
+        狙う場所を計算する
         
         Parameters
         -----
         left_point : int
             残りポイント
+        get : list of int
+            同じラウンド中にとった得点
         
          Returns
          -----
@@ -98,26 +359,24 @@ class ZeroOne(object):
         if 180 + 180*(n_throw)/3 < left_point: #聴牌できない
             aims = self._get_aims_not_finishable(n_throw)
         else: #聴牌できる or 上がれる
-            flag, point_list = ArrangeHelper.search(left_point, get_init=get, bull_type=self.bull_type, out_type=self.out_type)
-            if flag : #上がれる
+            #一番スコアが高い組み合わせだけ探す
+            point_list = self._arrange_helper.search_top(left_point, get_init=get, k=1)
+            if len(point_list) > 0 : #上がれる
                 #一番スコアが高い点の組み合わせを取得
                 aim_point_list = point_list[0]
                 #変換
                 aims = self.convert_point_list(aim_point_list)  
             else : #上がれない
                 arrange_point = self.get_arrange_point(left_point, get)
-                print("arrange_point: ",arrange_point)
-                print(get)
+                logger.debug("arrange_point : {}, get : {}".format(arrange_point, get))
                 if arrange_point is None: #アレンジできない
                     aims = self._get_aims_not_finishable(n_throw)
                 else: #アレンジできる
-                    print(left_point, arrange_point)
-                    _, point_list = ArrangeHelper.search(left_point-arrange_point, get_init=get
-                                                         , bull_type=self.bull_type, out_type="everything")
+                    point_list = self._everything_helper.search_top(left_point-arrange_point, get_init=get, k=1)
                     #一番スコアが高い点の組み合わせを取得
                     aim_point_list = point_list[0]
-                    #変換
-                    aims = self.convert_point_list(aim_point_list)
+                    #変換(アレンジなので上がり方の制限なし)
+                    aims = self.convert_point_list(aim_point_list, self._everything_helper)
         return aims
 
     def _get_aims_not_finishable(self, n_throw):
@@ -140,7 +399,7 @@ class ZeroOne(object):
             aims = [[60, "triple", 20]] * n_throw
         return aims
     
-    def convert_point_list(self, point_list):
+    def convert_point_list(self, point_list, helper=None):
         """
         ポイントリストを変換する
         [p1, p2, p3] -> [[point, n_mark, place],[point, n_mark, place], [point, n_mark, place]]
@@ -149,6 +408,8 @@ class ZeroOne(object):
         -----
         point_list : list of int
             狙うポイントの組み合わせ
+        helper : ArrangeHelper, optional
+            変換に使う探索(省略時はこの戦略の上がり方)
         
         Returns
         -----
@@ -173,9 +434,10 @@ class ZeroOne(object):
                 point_list = sorted(point_list, reverse=True)
         
         #変換
+        helper = self._arrange_helper if helper is None else helper
         for idx, p in enumerate(point_list):
             last_flag = (len(point_list) == idx+1)
-            board_place = ArrangeHelper.convert_point(p, last_flag)
+            board_place = helper.convert_point(p, last_flag)
             board_place_list.append([p] + board_place)
         
         return board_place_list
@@ -197,26 +459,25 @@ class ZeroOne(object):
         arrange_point : int
             アレンジで目指すポイント
         """
+        #残りトス数
+        n_throw = 3 - len(get)
+        if n_throw not in self._arrange_points:
+            return None
         #探索する得点の範囲
-        p_range = self._get_point_range(left_point-sum(get))
+        unenough_point = left_point - sum(get)
+        p_range = self._get_point_range(unenough_point)
+        #アレンジ候補(パターン数の多い順)
+        arrange_points = self._arrange_points[n_throw]
+        #アレンジ後に残るポイント
+        rest_points = unenough_point - arrange_points
         #ポイントの範囲で絞る
-        arrange_point_list = self.arrange_score_master[self.arrange_score_master.point.map(lambda x : p_range[0] <= x <= p_range[1])]
-        if arrange_point_list.shape[0] == 0:
+        flags = ((p_range[0] <= arrange_points) & (arrange_points <= p_range[1])
+                 & (0 <= rest_points) & (rest_points <= 180))
+        #アレンジのための点数を残りのトス数で取得できるか
+        flags[flags] = self._all_point_flags[n_throw][rest_points[flags]]
+        if not flags.any():
             return None
-        else :
-            #残りトス数で絞る
-            arrange_point_list = arrange_point_list[arrange_point_list.n_throw==(3-len(get))]
-            if arrange_point_list.shape[0] == 0:
-                return None
-            else :
-                #アレンジのための点数を取得できるか
-                for arrange_point in arrange_point_list.point.values:
-                    #残りのトス数で取れるポイントの一覧を取得
-                    candidate_point_list = self.all_score_master[self.all_score_master.n_throw==(3-len(get))].point.values
-                    if left_point - sum(get) - arrange_point in candidate_point_list:
-                        return int(arrange_point)
-                else:
-                    return None
+        return int(arrange_points[np.argmax(flags)])
         
     def _get_point_range(self, left_point):
         """
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from pkg.simulator import ZeroOneSimulator
+from pkg.strategy.zeroone import ZeroOne
+
+#ワーカープロセスごとの戦略クラス
+#{(bull_type, out_type) : ZeroOne}
+_strategies = {}
+
+
+def run_sweep(sigmas, bull_types=["fat"], out_types=["everything"], n_legs=10000, score=501
+              , seed=None, max_rounds=50, legs_per_task=5000, max_workers=None):
+    """
+    sigma, bull_type, out_typeの全組み合わせをプロセスプールでシミュレーションする
+    タスクごとにSeedSequenceから独立した乱数を作るので、seedが同じなら結果も同じ
+
+    Parameters
+    -----
+    sigmas : list of float
+        命中精度(標準偏差)の一覧
+    bull_types : list of str
+        bullの種類の一覧
+    out_types : list of str
+        上がり方の種類の一覧
+    n_legs : int
+        組み合わせごとのレッグ数
+    score : int
+        レッグ開始時のスコア
+    seed : int, optional
+        乱数のシード
+    max_rounds : int
+        1レッグの最大ラウンド数
+    legs_per_task : int
+        1タスクで計算するレッグ数
+    max_workers : int, optional
+        プロセス数(省略時はCPU数)
+
+    Returns
+    -----
+    summary : pandas.DataFrame
+        組み合わせごとの集計結果
+
+    See Also
+    -----
+    summarize : 集計の内容
+    """
+    configs = list(itertools.product(sigmas, bull_types, out_types))
+    #組み合わせをタスクに分ける
+    tasks = []
+    for config_idx in range(len(configs)):
+        for start in range(0, n_legs, legs_per_task):
+            tasks.append((config_idx, min(legs_per_task, n_legs-start)))
+    seed_seqs = np.random.SeedSequence(seed).spawn(len(tasks))
+
+    n_darts_list = [[] for _ in configs]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_run_task, *configs[config_idx], n_task_legs, score, seed_seq, max_rounds)
+                   for (config_idx, n_task_legs), seed_seq in zip(tasks, seed_seqs)]
+        for (config_idx, _), future in zip(tasks, futures):
+            n_darts_list[config_idx].append(future.result())
+
+    #ワーカープロセスの起動を軽くするため、pandasは集計する時に読み込む
+    import pandas as pd
+    rows = []
+    for (sigma, bull_type, out_type), n_darts in zip(configs, n_darts_list):
+        row = dict(sigma=sigma, bull_type=bull_type, out_type=out_type)
+        row.update(summarize(np.concatenate(n_darts), score))
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def summarize(n_darts, score=501):
+    """
+    上がるまでの本数を集計する
+
+    Parameters
+    -----
+    n_darts : numpy.ndarray of int
+        レッグごとの上がるまでに投げた本数(上がれなかった場合は-1)
+    score : int
+        レッグ開始時のスコア
+
+    Returns
+    -----
+    summary : dict
+        n_legs, finish_rate, mean_darts, std_darts, median_darts, p90_darts, ppd(1本あたりの得点)
+    """
+    finished = n_darts[n_darts > 0]
+    if len(finished) == 0:
+        stats = dict(mean_darts=np.nan, std_darts=np.nan, median_darts=np.nan, p90_darts=np.nan, ppd=np.nan)
+    else:
+        stats = dict(mean_darts=finished.mean(), std_darts=finished.std(), median_darts=np.median(finished)
+                     , p90_darts=np.percentile(finished, 90), ppd=score*len(finished)/finished.sum())
+    return dict(n_legs=len(n_darts), finish_rate=len(finished)/len(n_darts), **stats)
+
+
+def _run_task(sigma, bull_type, out_type, n_legs, score, seed_seq, max_rounds):
+    """
+    ワーカープロセスでレッグをシミュレーションする
+    戦略クラスはプロセス内で使い回す
+
+    Returns
+    -----
+    n_darts : numpy.ndarray of int
+        上がるまでに投げた本数
+    """
+    key = (bull_type, out_type)
+    if key not in _strategies:
+        _strategies[key] = ZeroOne(bull_type, out_type)
+    simulator = ZeroOneSimulator(sigma, bull_type, out_type, score=score, seed=seed_seq, strategy=_strategies[key])
+    n_darts, _ = simulator.run(n_legs, max_rounds)
+    return n_darts
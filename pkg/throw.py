@@ -11,14 +11,21 @@ class Throw(object):
     sigma : float
         狙った地点からずれた距離の分散
     """
-    def __init__(self, sigma):
+    
+    #誤差角度の候補
+    _theta_d_candidates = np.arange(-1, 1, 0.01) * np.pi
+    
+    def __init__(self, sigma, seed=None):
         """
         Parameters
         -----
         sigma : float
             狙った地点からずれた距離の分散
+        seed : int or numpy.random.SeedSequence, optional
+            乱数のシード(同じシードなら同じ結果になる)
         """
         self.sigma = sigma
+        self._rng = np.random.default_rng(seed)
         
     def aim(self, r, theta):
         """
@@ -38,26 +45,47 @@ class Throw(object):
         theta_hit : float
             当たった座標の角度部分
         """
+        r_hit, theta_hit = self.aim_many(r, theta, 1)
+        return float(r_hit[0]), float(theta_hit[0])
+    
+    def aim_many(self, r, theta, n=None):
+        """
+        当たった地点の座標をまとめて求める
+        
+        Parameters
+        -----
+        r : float or numpy.ndarray of float
+            狙った地点の座標の距離部分
+        theta: float or numpy.ndarray of float
+            狙った地点の座標の角度部分
+        n : int, optional
+            投げる回数(省略時はr, thetaの大きさ)
+            
+        Returns
+        -----
+        r_hit : numpy.ndarray of float
+            当たった座標の距離部分
+        theta_hit : numpy.ndarray of float
+            当たった座標の角度部分
+        """
+        r, theta = np.broadcast_arrays(np.asarray(r, dtype=float), np.asarray(theta, dtype=float))
+        if n is not None:
+            r, theta = np.broadcast_to(r, (n,)), np.broadcast_to(theta, (n,))
+        
         #誤差距離と誤差角度の計算
-        r_d = np.abs(np.random.normal(0, self.sigma))
-        theta_d = np.random.choice(np.arange(-1, 1, 0.01)) * np.pi
+        r_d = np.abs(self._rng.normal(0, self.sigma, r.shape))
+        theta_d = self._theta_d_candidates[self._rng.integers(0, len(self._theta_d_candidates), r.shape)]
         
         #当たった座標を計算
         #直交座標系で計算する
-        x = r*np.cos(theta)
-        y = r*np.sin(theta)
-        
-        #誤差分
-        x_d = r_d*np.cos(theta_d)
-        y_d = r_d*np.sin(theta_d)
+        x = r*np.cos(theta) + r_d*np.cos(theta_d)
+        y = r*np.sin(theta) + r_d*np.sin(theta_d)
         
         #極座標にもどす
-        r_hit = np.sqrt((x+x_d)**2+(y+y_d)**2)
+        r_hit = np.sqrt(x**2+y**2)
         #np.arctan2(a, b):arctan(a/b)
         #戻り値：[-pi, pi]
-        theta_hit = np.arctan2(y+y_d, x+x_d)
-        if theta_hit < 0 :
-            theta_hit += 2*np.pi
+        theta_hit = np.arctan2(y, x)
+        theta_hit[theta_hit < 0] += 2*np.pi
         
-        return r_hit,theta_hit
-    
+        return r_hit, theta_hit
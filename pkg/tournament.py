@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from pkg.simulator import ZeroOneSimulator
+from pkg.strategy.zeroone import ZeroOne
+
+#ワーカープロセスごとの戦略クラス(ルールごとに1つを全プレイヤーで使い回す)
+#{(bull_type, out_type) : ZeroOne}
+_strategies = {}
+
+
+class PlayerProfile(object):
+    """
+    トーナメントに参加するプレイヤーの設定
+
+    Attributes
+    -----
+    name : str
+        プレイヤーの名前
+    sigma : float
+        命中精度(標準偏差)
+    bull_type : str (sepa or fat)
+        bullの種類
+    out_type : str (everything, master, double)
+        上がり方の種類
+    score : int
+        レッグ開始時のスコア(ハンデをつける場合はプレイヤーごとに変える)
+    """
+
+    def __init__(self, name, sigma, bull_type="fat", out_type="double", score=501):
+        self.name = name
+        self.sigma = sigma
+        self.bull_type = bull_type
+        self.out_type = out_type
+        self.score = score
+
+    @classmethod
+    def from_player(cls, name, player):
+        """
+        Playerの命中精度, 戦略クラスのルール, スコアから作成する
+
+        Parameters
+        -----
+        name : str
+            プレイヤーの名前
+        player : Player
+            01のプレイヤー
+        """
+        strategy = player._strategy
+        return cls(name, player.sigma, strategy.bull_type, strategy.out_type, player.score)
+
+    def __repr__(self):
+        return "PlayerProfile({!r}, sigma={}, bull_type={!r}, out_type={!r}, score={})".format(
+            self.name, self.sigma, self.bull_type, self.out_type, self.score)
+
+
+def wilson_interval(successes, n, z=1.96):
+    """
+    二項分布の割合のWilsonの信頼区間
+
+    Parameters
+    -----
+    successes : int or numpy.ndarray
+        成功数
+    n : int or numpy.ndarray
+        試行数
+    z : float
+        標準正規分布の分位点(1.96で95%区間)
+
+    Returns
+    -----
+    low : float or numpy.ndarray
+        下限
+    high : float or numpy.ndarray
+        上限
+    """
+    successes, n = np.asarray(successes, dtype=float), np.asarray(n, dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p = successes / n
+        denominator = 1 + z**2/n
+        center = (p + z**2/(2*n)) / denominator
+        half = z * np.sqrt(p*(1-p)/n + z**2/(4*n**2)) / denominator
+    return center - half, center + half
+
+
+def run_round_robin(profiles, n_leagues=1000, legs=5, sets=1, seed=None, max_rounds=50
+                    , matches_per_task=2000, max_workers=None, z=1.96):
+    """
+    総当たりのリーグ戦をn_leagues回シミュレーションする
+    全ての組み合わせがn_leagues試合ずつ対戦し、k回目のリーグ戦は各組み合わせのk試合目の結果で順位を決める
+
+    Parameters
+    -----
+    profiles : list of PlayerProfile
+        参加するプレイヤー
+    n_leagues : int
+        リーグ戦の回数(組み合わせごとの試合数)
+    legs : int
+        1セットのレッグ数(best of legs)
+    sets : int
+        1試合のセット数(best of sets)
+    seed : int, optional
+        乱数のシード
+    max_rounds : int
+        1レッグの最大ラウンド数
+    matches_per_task : int
+        1タスクで計算する試合数
+    max_workers : int, optional
+        プロセス数(省略時はCPU数, 0はプロセスを使わない)
+    z : float
+        信頼区間の標準正規分布の分位点
+
+    Returns
+    -----
+    head_to_head : pandas.DataFrame
+        組み合わせごとの対戦成績(player_aの勝率と信頼区間, 平均獲得レッグ数)
+    standings : pandas.DataFrame
+        プレイヤーごとの平均勝利数とリーグ優勝確率(勝利数, レッグ差, 抽選の順で順位を決める)
+    """
+    pairs = list(itertools.combinations(range(len(profiles)), 2))
+    match_seed, tiebreak_seed = np.random.SeedSequence(seed).spawn(2)
+    results = _play_pairs(profiles, pairs, [n_leagues]*len(pairs), legs, sets, match_seed, max_rounds
+                          , matches_per_task, max_workers)
+
+    #リーグ戦ごとの勝利数とレッグ差
+    wins = np.zeros((n_leagues, len(profiles)), dtype=np.int64)
+    leg_diffs = np.zeros((n_leagues, len(profiles)), dtype=np.int64)
+    rows = []
+    for (a, b), (a_won, legs_a, legs_b) in zip(pairs, results):
+        wins[:, a] += a_won
+        wins[:, b] += ~a_won
+        leg_diffs[:, a] += legs_a - legs_b
+        leg_diffs[:, b] += legs_b - legs_a
+        low, high = wilson_interval(a_won.sum(), n_leagues, z)
+        rows.append(dict(player_a=profiles[a].name, player_b=profiles[b].name, n_matches=n_leagues
+                         , win_rate=a_won.mean(), ci_low=low, ci_high=high
+                         , mean_legs_a=legs_a.mean(), mean_legs_b=legs_b.mean()))
+
+    #同じ勝利数はレッグ差、それも同じなら抽選
+    rng = np.random.default_rng(tiebreak_seed)
+    max_diff = np.abs(leg_diffs).max() + 1 if leg_diffs.size > 0 else 1
+    keys = (wins*(2*max_diff+1) + leg_diffs + max_diff) + rng.random(wins.shape)
+    champions = np.bincount(np.argmax(keys, axis=1), minlength=len(profiles))
+
+    #ワーカープロセスの起動を軽くするため、pandasは集計する時に読み込む
+    import pandas as pd
+    standing_rows = []
+    for idx, profile in enumerate(profiles):
+        low, high = wilson_interval(champions[idx], n_leagues, z)
+        standing_rows.append(dict(player=profile.name, sigma=profile.sigma, out_type=profile.out_type
+                                  , mean_wins=wins[:, idx].mean(), mean_leg_diff=leg_diffs[:, idx].mean()
+                                  , league_win_rate=champions[idx]/n_leagues, ci_low=low, ci_high=high))
+    standings = pd.DataFrame(standing_rows).sort_values("mean_wins", ascending=False, ignore_index=True)
+    return pd.DataFrame(rows), standings
+
+
+def run_knockout(profiles, n_tournaments=1000, legs=5, sets=1, seed=None, max_rounds=50
+                 , matches_per_task=2000, max_workers=None, z=1.96):
+    """
+    トーナメント(ノックアウト)をn_tournaments回シミュレーションする
+    profilesの順番をシード順とし、1回戦は1位と最下位, 2位と下から2番目, ...を組み合わせる
+    1位と2位は決勝まで当たらない山に分け、2のべき乗に足りない枠は上位シードの1回戦を不戦勝にする
+    (6人なら1回戦は0-不戦勝, 3-4, 1-不戦勝, 2-5)
+
+    Parameters
+    -----
+    profiles : list of PlayerProfile
+        参加するプレイヤー(シード順)
+    n_tournaments : int
+        トーナメントの回数
+    legs, sets, seed, max_rounds, matches_per_task, max_workers, z :
+        run_round_robinと同じ
+
+    Returns
+    -----
+    summary : pandas.DataFrame
+        プレイヤーごとの優勝確率と信頼区間, round_k : k回戦(1始まり)まで勝ち残る確率
+    """
+    n_rounds = max(int(np.ceil(np.log2(len(profiles)))), 1)
+    #枠ごとのプレイヤーのindex(-1は不戦勝の空き枠)
+    order = _seeded_order(2**n_rounds)
+    order = [idx if idx < len(profiles) else -1 for idx in order]
+    slots = np.tile(np.array(order, dtype=np.int64), (n_tournaments, 1))
+    reach = np.zeros((n_rounds+1, len(profiles)), dtype=np.int64)
+    seed_seqs = np.random.SeedSequence(seed).spawn(n_rounds)
+
+    for round_idx in range(n_rounds):
+        reach[round_idx] = np.bincount(slots[slots >= 0], minlength=len(profiles))
+        a, b = slots[:, 0::2], slots[:, 1::2]
+        winners = np.where(b < 0, a, b)
+        #対戦する組み合わせごとにまとめて試合をする
+        played = (a >= 0) & (b >= 0)
+        pairs, inverse = np.unique(np.stack([a[played], b[played]], axis=1), axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        counts = np.bincount(inverse, minlength=len(pairs))
+        results = _play_pairs(profiles, [tuple(pair) for pair in pairs.tolist()], counts.tolist(), legs, sets
+                              , seed_seqs[round_idx], max_rounds, matches_per_task, max_workers)
+        played_winners = np.zeros(len(inverse), dtype=np.int64)
+        for pair_idx, ((pair_a, pair_b), (a_won, _, _)) in enumerate(zip(pairs.tolist(), results)):
+            rows = np.flatnonzero(inverse == pair_idx)
+            played_winners[rows] = np.where(a_won, pair_a, pair_b)
+        winners[played] = played_winners
+        slots = winners
+    reach[n_rounds] = np.bincount(slots.ravel(), minlength=len(profiles))
+
+    import pandas as pd
+    rows = []
+    for idx, profile in enumerate(profiles):
+        low, high = wilson_interval(reach[n_rounds, idx], n_tournaments, z)
+        row = dict(player=profile.name, sigma=profile.sigma, out_type=profile.out_type
+                   , win_rate=reach[n_rounds, idx]/n_tournaments, ci_low=low, ci_high=high)
+        row.update({"round_{}".format(round_idx+1): reach[round_idx, idx]/n_tournaments
+                    for round_idx in range(n_rounds)})
+        rows.append(row)
+    return pd.DataFrame(rows).sort_values("win_rate", ascending=False, ignore_index=True)
+
+
+def _seeded_order(n_slots):
+    """
+    シード順(0始まり)の標準的なトーナメントの並び
+    隣り合う2枠が1回戦で対戦し、各回戦でシード順の和が一定になるように組み合わせる
+
+    Parameters
+    -----
+    n_slots : int
+        枠の数(2のべき乗)
+
+    Returns
+    -----
+    order : list of int
+        枠ごとのシード順(8枠なら[0, 7, 3, 4, 1, 6, 2, 5])
+    """
+    order = [0]
+    while len(order) < n_slots:
+        size = 2 * len(order)
+        order = [slot for idx in order for slot in [idx, size-1-idx]]
+    return order
+
+
+def _play_pairs(profiles, pairs, n_matches_list, legs, sets, seed, max_rounds, matches_per_task, max_workers):
+    """
+    組み合わせごとに試合をする
+    タスクごとにSeedSequenceから独立した乱数を作るので、seedが同じなら結果も同じ
+
+    Returns
+    -----
+    results : list of (a_won, legs_a, legs_b)
+        組み合わせごとのplay_matchesの結果
+    """
+    tasks = []
+    for pair_idx, n_matches in enumerate(n_matches_list):
+        for start in range(0, n_matches, matches_per_task):
+            tasks.append((pair_idx, min(matches_per_task, n_matches-start)))
+    seed_seq = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    seed_seqs = seed_seq.spawn(len(tasks))
+
+    task_args = [(profiles[pairs[pair_idx][0]], profiles[pairs[pair_idx][1]], n_task_matches, legs, sets
+                  , task_seed, max_rounds) for (pair_idx, n_task_matches), task_seed in zip(tasks, seed_seqs)]
+    if max_workers == 0:
+        task_results = [play_matches(*args) for args in task_args]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            task_results = [future.result() for future in [executor.submit(play_matches, *args) for args in task_args]]
+
+    results = [[] for _ in pairs]
+    for (pair_idx, _), task_result in zip(tasks, task_results):
+        results[pair_idx].append(task_result)
+    return [tuple(np.concatenate(arrays) for arrays in zip(*pair_results)) if len(pair_results) > 0
+            else (np.zeros(0, dtype=bool), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+            for pair_results in results]
+
+
+def play_matches(profile_a, profile_b, n_matches, legs=5, sets=1, seed=None, max_rounds=50):
+    """
+    2人のプレイヤーの試合をまとめてシミュレーションする
+    01では相手の投げた結果が自分の投げ方に影響しないので、各プレイヤーのレッグを別々にシミュレーションし、
+    上がったラウンドを比べて勝敗を決める(同じラウンドで上がった場合は先攻の勝ち)
+    先攻はレッグごとに交代し、奇数番目の試合はprofile_bが先攻で始める
+    どちらもmax_roundsで上がれなかったレッグは先攻の勝ち
+
+    Parameters
+    -----
+    profile_a, profile_b : PlayerProfile
+        対戦するプレイヤー
+    n_matches : int
+        試合数
+    legs : int
+        1セットのレッグ数(best of legs, 先に過半数を取った方がセットを取る)
+    sets : int
+        1試合のセット数(best of sets)
+    seed : int or numpy.random.SeedSequence, optional
+        乱数のシード
+    max_rounds : int
+        1レッグの最大ラウンド数
+
+    Returns
+    -----
+    a_won : numpy.ndarray of bool
+        profile_aが勝ったかどうか
+    legs_a : numpy.ndarray of int
+        profile_aが取ったレッグ数
+    legs_b : numpy.ndarray of int
+        profile_bが取ったレッグ数
+    """
+    legs_to_win, sets_to_win = legs//2 + 1, sets//2 + 1
+    max_legs = (2*legs_to_win - 1) * (2*sets_to_win - 1)
+    seed_a, seed_b = (seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)).spawn(2)
+    #試合で投げる可能性のある全てのレッグの、上がるまでのラウンド数
+    rounds_a = _simulate_rounds(profile_a, n_matches*max_legs, seed_a, max_rounds).reshape(n_matches, max_legs)
+    rounds_b = _simulate_rounds(profile_b, n_matches*max_legs, seed_b, max_rounds).reshape(n_matches, max_legs)
+
+    a_starts = np.arange(n_matches) % 2 == 0
+    set_legs = np.zeros((n_matches, 2), dtype=np.int64)
+    match_sets = np.zeros((n_matches, 2), dtype=np.int64)
+    total_legs = np.zeros((n_matches, 2), dtype=np.int64)
+    active = np.ones(n_matches, dtype=bool)
+    for leg_idx in range(max_legs):
+        a_first = a_starts ^ (leg_idx % 2 == 1)
+        a_wins = np.where(a_first, rounds_a[:, leg_idx] <= rounds_b[:, leg_idx], rounds_a[:, leg_idx] < rounds_b[:, leg_idx])
+        winner = np.where(a_wins, 0, 1)
+        rows = np.flatnonzero(active)
+        set_legs[rows, winner[rows]] += 1
+        total_legs[rows, winner[rows]] += 1
+        #セットを取った試合
+        set_won = rows[set_legs[rows, winner[rows]] == legs_to_win]
+        match_sets[set_won, winner[set_won]] += 1
+        set_legs[set_won] = 0
+        active &= match_sets.max(axis=1) < sets_to_win
+        if not active.any():
+            break
+    return match_sets[:, 0] > match_sets[:, 1], total_legs[:, 0], total_legs[:, 1]
+
+
+def _simulate_rounds(profile, n_legs, seed_seq, max_rounds):
+    """
+    ワーカープロセスでレッグをシミュレーションし、上がるまでのラウンド数を返す
+    戦略クラスは同じルールのプレイヤーで使い回す
+
+    Returns
+    -----
+    n_rounds : numpy.ndarray of int
+        上がったラウンド(1始まり, 上がれなかった場合はmax_rounds+1)
+    """
+    key = (profile.bull_type, profile.out_type)
+    if key not in _strategies:
+        _strategies[key] = ZeroOne(profile.bull_type, profile.out_type, use_policy=True)
+    simulator = ZeroOneSimulator(profile.sigma, profile.bull_type, profile.out_type, score=profile.score
+                                 , seed=seed_seq, strategy=_strategies[key])
+    n_darts, _ = simulator.run(n_legs, max_rounds)
+    return np.where(n_darts > 0, (n_darts + 2) // 3, max_rounds + 1)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+import itertools
+
+import pytest
+
+from pkg import arrange_helper
+from pkg.arrange_helper import ArrangeHelper
+
+RULES = list(itertools.product(["fat", "sepa"], ["everything", "master", "double"]))
+#(残りポイント, 残りのトス数)
+CASES = [(point, n_throw) for n_throw in range(1, 4) for point in range(1, 60*n_throw + 2, 7)] + [(170, 3), (180, 3)]
+
+
+def _brute_force_search(helper, point, n_throw):
+    """
+    メモ化しない深さ優先探索で全ての組み合わせを探す(ArrangeHelperの最初の実装と同じ規則)
+    """
+    singles = list(range(1, 21))
+    doubles = [2*place for place in singles]
+    triples = [3*place for place in singles]
+    bulls = [50] if helper.bull_type == "fat" else [25, 50]
+    if helper.out_type == "double":
+        out_points = [50] + doubles
+    elif helper.out_type == "master":
+        out_points = bulls + doubles + triples
+    else:
+        out_points = []
+    all_points = bulls + singles + doubles + triples
+    found = []
+
+    def search(get, out_flag):
+        unenough_point = point - sum(get)
+        if unenough_point < 0 or len(get) == n_throw:
+            return
+        if unenough_point in (all_points if out_flag else out_points):
+            points = sorted(get + [unenough_point])
+            if points not in found:
+                found.append(points)
+        left_throws = n_throw - len(get)
+        candidates = []
+        if unenough_point <= 60*left_throws:
+            candidates += triples
+        if unenough_point <= 50*left_throws:
+            candidates += [50]
+        if unenough_point <= 40*left_throws:
+            candidates += doubles
+        if helper.bull_type == "sepa" and unenough_point <= 25*left_throws:
+            candidates += [25]
+        if unenough_point <= 20*left_throws:
+            candidates += singles
+        for candidate in list(set(candidates)):
+            search(get + [candidate], out_flag or candidate in out_points)
+
+    search([], helper.out_type == "everything")
+    return sorted(found, key=helper.calc_score, reverse=True)
+
+
+@pytest.mark.parametrize("bull_type, out_type", RULES)
+def test_search_matches_brute_force(bull_type, out_type):
+    helper = ArrangeHelper(bull_type, out_type)
+    arrange_helper.clear_cache()
+    for point, n_throw in CASES:
+        expected = _brute_force_search(helper, point, n_throw)
+        flag, points = helper.search(point, get_init=[0]*(3-n_throw))
+        assert flag == (len(expected) > 0)
+        #同じスコアの並び(見つかった順)も含めて一致する
+        assert (points or []) == expected, (point, n_throw)
+
+
+@pytest.mark.parametrize("bull_type, out_type", RULES)
+def test_search_with_get_init(bull_type, out_type):
+    #確定している得点は残りポイントとトス数に反映する
+    helper = ArrangeHelper(bull_type, out_type)
+    for point, get_init in [(100, [20]), (60, [19, 1]), (41, [1])]:
+        expected = _brute_force_search(helper, point - sum(get_init), 3 - len(get_init))
+        flag, points = helper.search(point, get_init=get_init)
+        assert (points or []) == expected
+
+
+@pytest.mark.parametrize("bull_type, out_type", RULES)
+def test_search_top_and_iter_ranked_match_full_sort(bull_type, out_type):
+    helper = ArrangeHelper(bull_type, out_type)
+    for point, n_throw in CASES:
+        get_init = [0]*(3-n_throw)
+        arrange_helper.clear_cache()
+        #全件は時間がかかるので、残りポイントが大きい場合は先頭だけ取り出す
+        n_ranked = None if point <= 60 else 10
+        ranked = list(itertools.islice(helper.iter_ranked(point, get_init), n_ranked))
+        _, points = helper.search(point, get_init)
+        points = points or []
+        assert ranked == points[:n_ranked], (point, n_throw)
+        for k in [0, 1, 3, 10]:
+            #上位k件(同じスコアは見つかった順)が一致する
+            assert helper.search_top(point, get_init, k) == points[:k], (point, n_throw, k)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+import numpy as np
+import pytest
+
+from pkg.board import Board
+
+#角度0から反時計回りの基礎ポイント
+SEGMENT_POINTS = [20, 1, 18, 4, 13, 6, 10, 15, 2, 17, 3, 19, 7, 16, 8, 11, 14, 9, 12, 5]
+
+
+def _reference_result(board, r, theta):
+    """
+    1点ずつif文で判定する(境界は内側の区間に含める)
+    """
+    if r <= 9:
+        return board.bull["inner_bull"], "inner_bull", 25
+    if r <= 22:
+        return board.bull["outer_bull"], "outer_bull", 25
+    if r <= 106 or 126 < r <= 178:
+        place, coef = "single", 1
+    elif r <= 126:
+        place, coef = "triple", 3
+    elif r <= 198:
+        place, coef = "double", 2
+    else:
+        return 0, "out_board", 0
+    for idx in range(20):
+        if theta <= (2*idx + 1)*np.pi/20:
+            return coef*SEGMENT_POINTS[idx], place, SEGMENT_POINTS[idx]
+    return coef*20, place, 20
+
+
+@pytest.mark.parametrize("bull_type", ["fat", "sepa"])
+def test_calc_throw_results_matches_scalar(bull_type):
+    board = Board(bull_type)
+    rng = np.random.default_rng(0)
+    #ランダムな点, リングの境界ちょうど, ピザの境界ちょうどとその前後
+    ring_edges = np.array([0, 9, 22, 106, 126, 178, 198], dtype=float)
+    segment_edges = np.arange(1, 40, 2) * np.pi / 20
+    r = np.concatenate([rng.uniform(0, 220, 5000), np.repeat(ring_edges, 40)
+                        , np.nextafter(ring_edges, np.inf).repeat(40), rng.uniform(0, 220, 3*len(segment_edges))])
+    theta = np.concatenate([rng.uniform(0, 2*np.pi, 5000), np.tile(rng.uniform(0, 2*np.pi, 40), 2*len(ring_edges))
+                            , segment_edges, np.nextafter(segment_edges, 0), np.nextafter(segment_edges, 4)])
+    theta = np.concatenate([theta, [0.0, 2*np.pi]])
+    r = np.concatenate([r, [150.0, 150.0]])
+
+    points, place_codes, base_points = board.calc_throw_results(r, theta)
+    for idx in range(len(r)):
+        expected = _reference_result(board, r[idx], theta[idx])
+        actual = (int(points[idx]), board.place_names[place_codes[idx]], int(base_points[idx]))
+        assert actual == expected, (r[idx], theta[idx])
+        assert board.calc_throw_result(r[idx], theta[idx]) == expected
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+import numpy as np
+import pytest
+
+from pkg import board_raster
+from pkg.board import Board
+from pkg.board_raster import BoardRaster
+
+
+def _sample_points(rng, n):
+    #ボード全体, ワイヤー(リングとピザの境界)のすぐ近く, ボードの外
+    r = np.concatenate([rng.uniform(0, 200, n), rng.choice(Board._ring_edges, n) + rng.uniform(-1e-6, 1e-6, n)
+                        , rng.uniform(0, 200, n), rng.uniform(200, 400, n)])
+    theta = np.concatenate([rng.uniform(0, 2*np.pi, n), rng.uniform(0, 2*np.pi, n)
+                            , rng.choice(Board._segment_edges, n) + rng.uniform(-1e-9, 1e-9, n), rng.uniform(0, 2*np.pi, n)])
+    return r, np.mod(theta, 2*np.pi)
+
+
+@pytest.mark.parametrize("bull_type", ["fat", "sepa"])
+def test_raster_matches_board(bull_type):
+    r, theta = _sample_points(np.random.default_rng(0), 50000)
+    raster = BoardRaster(bull_type, resolution=1.0, use_cache=False)
+    expected = Board(bull_type).calc_throw_results(r, theta)
+    actual = raster.calc_throw_results(r*np.cos(theta), r*np.sin(theta))
+    for expected_values, actual_values in zip(expected, actual):
+        np.testing.assert_array_equal(actual_values, expected_values)
+    assert raster.calc_throw_result(0.0, 0.0) == Board(bull_type).calc_throw_result(0.0, 0.0)
+
+
+def test_raster_without_writable_cache(tmp_path, monkeypatch):
+    #キャッシュに保存できなくても計算したラスターを使う
+    cache_file = tmp_path / "not_a_directory"
+    cache_file.write_text("")
+    monkeypatch.setenv("DARTS_CACHE_DIR", str(cache_file))
+    monkeypatch.setattr(board_raster, "_rasters", {})
+    raster = BoardRaster("fat", resolution=2.0, use_cache=True)
+    assert isinstance(raster.raster, np.ndarray)
+    assert raster.calc_throw_result(0.0, 0.0) == (50, "inner_bull", 25)
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+import os
+import glob
+import itertools
+
+import pytest
+
+from pkg import cache_util
+from pkg.build_tables import check_tables
+from pkg.strategy.zeroone import TABLE_VERSION
+
+RULES = list(itertools.product(["fat", "sepa"], ["everything", "master", "double"]))
+
+
+def test_bundled_table_names_match_current_version():
+    version = cache_util.make_version(TABLE_VERSION)
+    expected = set()
+    for bull_type, out_type in RULES:
+        expected.add("zeroone_{}_{}_{}.npz".format(bull_type, out_type, version))
+        expected.add("zeroone_policy_{}_{}_501_{}.npz".format(bull_type, out_type, version))
+    shipped = {os.path.basename(path) for path in glob.glob(os.path.join(cache_util.get_data_dir(), "zeroone_*.npz"))}
+    assert shipped == expected
+
+
+def test_bundled_score_masters_match_current_code():
+    #方策テーブルは時間がかかるので、スコアマスタだけ計算し直して比べる
+    assert check_tables(max_score=None) == []
+
+
+@pytest.mark.skipif(not os.environ.get("DARTS_SLOW_TESTS"), reason="set DARTS_SLOW_TESTS=1 to rebuild policy tables")
+def test_bundled_tables_match_current_code():
+    assert check_tables() == []
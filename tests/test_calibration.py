@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+import numpy as np
+import pytest
+
+from pkg.board import Board
+from pkg.calibration import fit_anisotropic_sigma, fit_events, fit_sigma
+from pkg.event_store import ThrowEventStore
+from pkg.simulator import ZeroOneSimulator
+from pkg.throw import Throw
+
+N_THROWS = 50000
+
+
+def _sample_aims(rng, n):
+    board = Board()
+    places = rng.choice(["triple", "double", "inner_single", "outer_single"], n)
+    points = rng.integers(1, 21, n)
+    coordinates = np.array([board.get_aim_coordinate(int(point), place) for point, place in zip(points, places)])
+    return coordinates[:, 0], coordinates[:, 1]
+
+
+@pytest.mark.parametrize("sigma", [5.0, 20.0, 60.0])
+def test_fit_sigma_recovers_sigma(sigma):
+    aim_r, aim_theta = _sample_aims(np.random.default_rng(0), N_THROWS)
+    hit_r, hit_theta = Throw(sigma, seed=1).aim_many(aim_r, aim_theta)
+    result = fit_sigma(aim_r, aim_theta, hit_r, hit_theta)
+    assert result["n_throws"] == N_THROWS
+    assert abs(result["sigma"] - sigma) <= 4*result["stderr"]
+    #向きによらないずれなので、方向別の推定も同じ値になる
+    anisotropic = fit_anisotropic_sigma(aim_r, aim_theta, hit_r, hit_theta)
+    assert anisotropic["sigma_r"] == pytest.approx(sigma, rel=0.03)
+    assert anisotropic["sigma_t"] == pytest.approx(sigma, rel=0.03)
+    assert anisotropic["log_likelihood"] >= result["log_likelihood"]
+
+
+def test_fit_anisotropic_sigma_recovers_sigmas():
+    rng = np.random.default_rng(2)
+    aim_r, aim_theta = _sample_aims(rng, N_THROWS)
+    #Throwと同じ向きが一様で距離が半正規分布のずれを、距離方向と角度方向で別々に伸ばす
+    distance = np.abs(rng.normal(0, 1, N_THROWS))
+    direction = Throw._theta_d_candidates[rng.integers(0, len(Throw._theta_d_candidates), N_THROWS)]
+    radial, tangential = 30*distance*np.cos(direction), 10*distance*np.sin(direction)
+    x = (aim_r + radial)*np.cos(aim_theta) - tangential*np.sin(aim_theta)
+    y = (aim_r + radial)*np.sin(aim_theta) + tangential*np.cos(aim_theta)
+    result = fit_anisotropic_sigma(aim_r, aim_theta, np.hypot(x, y), np.arctan2(y, x))
+    assert result["sigma_r"] == pytest.approx(30, rel=0.03)
+    assert result["sigma_t"] == pytest.approx(10, rel=0.03)
+
+
+def test_fit_events_recovers_simulated_sigma(tmp_path):
+    with ThrowEventStore(str(tmp_path)) as store:
+        ZeroOneSimulator(15, "fat", "double", seed=3).run(2000, event_store=store)
+    result = fit_events(np.concatenate(ThrowEventStore(str(tmp_path)).read()))
+    assert abs(result["sigma"] - 15) <= 4*result["stderr"]
+
+
+def test_no_throws_is_rejected():
+    with pytest.raises(ValueError):
+        fit_sigma([], [], [], [])
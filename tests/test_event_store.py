@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+import numpy as np
+import pytest
+
+from pkg.event_store import THROW_EVENT_DTYPE, ThrowEventStore
+
+
+def test_append_read_round_trip(tmp_path):
+    #チャンクをまたぐ追加, スカラーの列, 空の追加
+    with ThrowEventStore(str(tmp_path), chunk_size=4) as store:
+        store.append(leg=np.arange(6), point=np.arange(6)*10, mark=2)
+        store.append(leg=np.array([], dtype=np.int64), point=np.array([], dtype=np.int64))
+        store.append(leg=6, point=60)
+        assert len(store) == 7
+    chunks = ThrowEventStore(str(tmp_path)).read()
+    assert [len(chunk) for chunk in chunks] == [4, 3]
+    assert all(isinstance(chunk, np.memmap) and chunk.dtype == THROW_EVENT_DTYPE for chunk in chunks)
+    events = np.concatenate(chunks)
+    np.testing.assert_array_equal(events["leg"], np.arange(7))
+    np.testing.assert_array_equal(events["point"], np.arange(7)*10)
+    np.testing.assert_array_equal(events["mark"], [2]*6 + [0])
+    #省略した列の既定値
+    np.testing.assert_array_equal(events["aim_mark"], -1)
+
+
+def test_empty_store(tmp_path):
+    with ThrowEventStore(str(tmp_path)) as store:
+        store.append(leg=np.array([]), point=np.array([]))
+        assert len(store) == 0
+    assert ThrowEventStore(str(tmp_path)).read() == []
+
+
+def test_reopen_continues_leg_ids(tmp_path):
+    with ThrowEventStore(str(tmp_path)) as store:
+        start = store.allocate_legs(3)
+        store.append(leg=start + np.arange(3), point=1)
+    store = ThrowEventStore(str(tmp_path))
+    assert store.next_leg_id == 3
+    #読むだけなら書き込み用のバッファは作らない
+    assert store._buffer is None
+
+
+def test_schema_version_is_checked(tmp_path):
+    with ThrowEventStore(str(tmp_path / "new")) as store:
+        store.append(leg=0, point=1)
+    assert len(ThrowEventStore(str(tmp_path / "new")).read()) == 1
+    #バージョンのファイルがない古い形式(leftがない)の記録
+    old_path = tmp_path / "old"
+    old_path.mkdir()
+    old_dtype = [field for field in THROW_EVENT_DTYPE.descr if field[0] != "left"]
+    np.save(str(old_path / "chunk_000000.npy"), np.zeros(3, dtype=old_dtype))
+    with pytest.raises(ValueError, match="schema version 1"):
+        ThrowEventStore(str(old_path))
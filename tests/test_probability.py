@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+import numpy as np
+import pytest
+
+from pkg import probability
+from pkg.board import Board
+from pkg.board_raster import BoardRaster
+from pkg.heatmap import HeatMap
+from pkg.probability import OUTCOMES, calc_hit_probabilities
+from pkg.throw import Throw
+
+AIMS = [(20, "triple"), (16, "double"), (25, "inner_bull"), (11, "outer_single")]
+
+
+def _get_aims(bull_type):
+    board = Board(bull_type)
+    coordinates = np.array([board.get_aim_coordinate(point, place) for point, place in AIMS])
+    return coordinates[:, 0], coordinates[:, 1]
+
+
+@pytest.mark.parametrize("bull_type", ["fat", "sepa"])
+@pytest.mark.parametrize("sigma", [1.0, 15.0, 80.0])
+def test_probabilities_sum_to_one(bull_type, sigma):
+    rng = np.random.default_rng(0)
+    #ボードの外を狙う場合も含める
+    r, theta = rng.uniform(0, 250, 50), rng.uniform(0, 2*np.pi, 50)
+    probabilities = calc_hit_probabilities(r, theta, sigma, bull_type)
+    assert probabilities.shape == (50, len(OUTCOMES))
+    assert (probabilities >= 0).all()
+    np.testing.assert_allclose(probabilities.sum(axis=1), 1, atol=1e-12)
+
+
+def test_non_positive_sigma_is_rejected():
+    with pytest.raises(ValueError):
+        calc_hit_probabilities(0, 0, 0)
+
+
+def test_probabilities_match_heatmap():
+    r, theta = _get_aims("sepa")
+    probabilities = calc_hit_probabilities(r, theta, 15, "sepa")
+    heatmap = HeatMap(15, "sepa", resolution=1.0)
+    #ヒートマップは格子で近似するので、許容誤差を大きめにとる
+    #場所ごとの合計と、狙った場所の周りの基礎ポイントで比べる
+    for place in Board.place_names:
+        columns = [idx for idx, (outcome_place, _) in enumerate(OUTCOMES) if outcome_place == place]
+        expected = heatmap.lookup(heatmap.hit_probability(place), r, theta)
+        np.testing.assert_allclose(probabilities[:, columns].sum(axis=1), expected, atol=0.01)
+    for place, point in [("triple", 20), ("double", 16), ("single", 1), ("single", 5), ("single", 8)]:
+        expected = heatmap.lookup(heatmap.hit_probability(place, point), r, theta)
+        np.testing.assert_allclose(probabilities[:, OUTCOMES.index((place, point))], expected, atol=0.01)
+
+
+def test_probabilities_match_sampled_throws_on_raster():
+    r, theta = _get_aims("sepa")
+    probabilities = calc_hit_probabilities(r, theta, 15, "sepa")
+    raster = BoardRaster("sepa", resolution=1.0, use_cache=False)
+    n = 200000
+    for idx in range(len(r)):
+        hit_r, hit_theta = Throw(15, seed=idx).aim_many(r[idx], theta[idx], n)
+        _, place_code, base_point = raster.calc_throw_results(hit_r*np.cos(hit_theta), hit_r*np.sin(hit_theta))
+        frequencies = np.bincount(probability._outcome_index[place_code, base_point], minlength=len(OUTCOMES)) / n
+        #標準誤差の5倍まで
+        tolerance = 5*np.sqrt(probabilities[idx]*(1-probabilities[idx])/n) + 1e-4
+        assert (np.abs(frequencies - probabilities[idx]) <= tolerance).all()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+import itertools
+
+import numpy as np
+import pytest
+
+from pkg.board import Board
+from pkg.rules import ZeroOneRules, OUT_TYPES
+
+RULES = list(itertools.product(["fat", "sepa"], OUT_TYPES))
+
+
+@pytest.mark.parametrize("bull_type, out_type", RULES)
+def test_judge_matches_judge_many(bull_type, out_type):
+    #1投ずつの判定とまとめた判定が全ての残りポイント・場所で一致する
+    rules = ZeroOneRules(bull_type, out_type)
+    place_names = Board(bull_type).place_names
+    left, place_code = np.meshgrid(np.arange(-60, 10), np.arange(len(place_names)), indexing="ij")
+    burst, finish = rules.judge_many(left, place_code)
+    for (i, j), value in np.ndenumerate(left):
+        result = rules.judge(int(value), place_names[place_code[i, j]])
+        assert burst[i, j] == (result == "burst")
+        assert finish[i, j] == (result == "finish")
+
+
+@pytest.mark.parametrize("bull_type, out_type, left, mark, expected", [
+    ("fat", "double", 0, "double", "finish"),
+    ("fat", "double", 0, "inner_bull", "finish"),
+    ("fat", "double", 0, "single", "burst"),
+    ("fat", "double", 0, "triple", "burst"),
+    ("fat", "double", 1, "single", "burst"),
+    ("fat", "double", 2, "single", None),
+    ("sepa", "double", 0, "outer_bull", "burst"),
+    ("fat", "master", 0, "double", "finish"),
+    ("fat", "master", 0, "triple", "finish"),
+    ("fat", "master", 0, "single", "burst"),
+    ("fat", "master", 1, "triple", "burst"),
+    ("sepa", "master", 0, "outer_bull", "finish"),
+    ("sepa", "master", 0, "inner_bull", "finish"),
+    ("sepa", "master", 1, "outer_bull", "burst"),
+    ("fat", "everything", 0, "single", "finish"),
+    ("fat", "everything", 1, "single", None),
+    ("fat", "everything", -1, "single", "burst"),
+])
+def test_judge_finish_and_burst(bull_type, out_type, left, mark, expected):
+    assert ZeroOneRules(bull_type, out_type).judge(left, mark) == expected
+
+
+def test_apply_throws_resets_round_point_on_burst():
+    rules = ZeroOneRules("fat", "double")
+    place_code = Board("fat").place_names.index("single")
+    #40点から20点取った後に30点でBURST, 10点なら続行
+    left, round_point, burst, finish = rules.apply_throws(
+        np.array([40, 40]), np.array([20, 20]), np.array([30, 10]), np.array([place_code, place_code]))
+    np.testing.assert_array_equal(left, [40, 10])
+    np.testing.assert_array_equal(round_point, [0, 30])
+    np.testing.assert_array_equal(burst, [True, False])
+    np.testing.assert_array_equal(finish, [False, False])
+    assert rules.apply_throw(40, 20, 30, "single") == (40, 0, "burst")
+    assert rules.apply_throw(40, 20, 10, "single") == (10, 30, None)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+import numpy as np
+import pytest
+
+from pkg.event_store import ThrowEventStore, to_events
+from pkg.simulator import ZeroOneSimulator
+from pkg.stats import RunningMoments, ZeroOneStats
+
+
+def test_running_moments_merge_matches_single_pass():
+    values = np.random.default_rng(0).normal(100, 20, 1000)
+    single = RunningMoments()
+    for value in values:
+        single.add(value)
+    #1件ずつ, まとめて, 空の集計を合わせる
+    merged = RunningMoments()
+    merged.add_many(values[:300])
+    other = RunningMoments()
+    for value in values[300:310]:
+        other.add(value)
+    other.add_many(values[310:])
+    merged.merge(other)
+    merged.merge(RunningMoments())
+    assert merged.count == single.count == len(values)
+    assert merged.mean == pytest.approx(values.mean())
+    assert merged.var == pytest.approx(values.var())
+    assert single.mean == pytest.approx(values.mean())
+    assert single.var == pytest.approx(values.var())
+
+
+def test_stats_merge_matches_single_pass(tmp_path):
+    with ThrowEventStore(str(tmp_path)) as store:
+        ZeroOneSimulator(25, "fat", "double", seed=0).run(500, event_store=store)
+    events = np.concatenate(ThrowEventStore(str(tmp_path)).read())
+    single = ZeroOneStats("fat", "double")
+    single.add_events(events)
+    #レッグで分けて集計し、合わせる
+    first, second = ZeroOneStats("fat", "double"), ZeroOneStats("fat", "double")
+    first.add_events(events[events["leg"] < 200])
+    second.add_events(events[events["leg"] >= 200])
+    merged = first.merge(second).summary()
+    for key, value in single.summary().items():
+        assert merged[key] == pytest.approx(value, nan_ok=True), key
+
+
+def test_empty_events():
+    assert len(to_events(leg=np.array([]), point=np.array([]))) == 0
+    assert len(to_events(leg=1, point=3)) == 1
+    stats = ZeroOneStats("fat", "double")
+    stats.append(leg=np.array([]), point=np.array([]))
+    assert stats.summary()["n_legs"] == 0
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+import numpy as np
+import pytest
+
+from pkg.tournament import PlayerProfile, _seeded_order, play_matches, run_knockout, wilson_interval
+
+
+def test_seeded_order():
+    assert _seeded_order(1) == [0]
+    assert _seeded_order(2) == [0, 1]
+    assert _seeded_order(8) == [0, 7, 3, 4, 1, 6, 2, 5]
+    for n_slots in [4, 8, 16, 32]:
+        order = _seeded_order(n_slots)
+        assert sorted(order) == list(range(n_slots))
+        #1回戦はシード順の和が一定, 1位と2位は別の山
+        assert {a + b for a, b in zip(order[0::2], order[1::2])} == {n_slots - 1}
+        assert (order.index(0) < n_slots//2) != (order.index(1) < n_slots//2)
+
+
+def test_wilson_interval_edges():
+    low, high = wilson_interval(0, 100)
+    assert low == pytest.approx(0, abs=1e-12) and 0 < high < 0.05
+    low, high = wilson_interval(100, 100)
+    assert 0.95 < low < 1 and high == pytest.approx(1, abs=1e-12)
+    low, high = wilson_interval(np.array([10, 50]), np.array([100, 100]))
+    assert (low < np.array([0.1, 0.5])).all() and (np.array([0.1, 0.5]) < high).all()
+    #50%は対称
+    assert 0.5 - low[1] == pytest.approx(high[1] - 0.5)
+
+
+def test_knockout_byes_go_to_top_seeds():
+    profiles = [PlayerProfile("p{}".format(idx), 10 + 10*idx) for idx in range(6)]
+    summary = run_knockout(profiles, n_tournaments=200, seed=0, max_workers=0).set_index("player")
+    #上位2シードは不戦勝で2回戦に進む
+    assert summary.loc["p0", "round_2"] == 1 and summary.loc["p1", "round_2"] == 1
+    assert (summary.loc[["p2", "p3", "p4", "p5"], "round_2"] < 1).all()
+    #3-4, 2-5の勝者だけが2回戦に進む
+    assert summary.loc[["p3", "p4"], "round_2"].sum() == pytest.approx(1)
+    assert summary.loc[["p2", "p5"], "round_2"].sum() == pytest.approx(1)
+    assert summary["win_rate"].sum() == pytest.approx(1)
+
+
+def test_play_matches_is_reproducible():
+    a, b = PlayerProfile("a", 15), PlayerProfile("b", 40)
+    first = play_matches(a, b, 300, legs=5, seed=1)
+    second = play_matches(a, b, 300, legs=5, seed=1)
+    for first_values, second_values in zip(first, second):
+        np.testing.assert_array_equal(first_values, second_values)
+    a_won, legs_a, legs_b = first
+    #best of 5は先に3レッグ取った方の勝ち
+    np.testing.assert_array_equal(np.maximum(legs_a, legs_b), 3)
+    np.testing.assert_array_equal(a_won, legs_a > legs_b)
+    assert a_won.mean() > 0.5